@@ -8,7 +8,7 @@ from alembic import context
 
 from app.core.settings import settings
 from app.db.base import Base
-from app.db.models.portfolio import Position, Transaction, InvestmentAmount  # noqa
+from app.db.models.portfolio import Position, Transaction, InvestmentAmount, PortfolioSnapshot  # noqa
 from app.db.models.market import Sector, StockSymbol  # noqa
 
 config = context.config
@@ -0,0 +1,32 @@
+"""Normalize portfolio tickers
+
+Revision ID: 4e2f8a1b6c37
+Revises: d7a3b9c05f18
+Create Date: 2026-10-19 18:05:12.482913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e2f8a1b6c37'
+down_revision: Union[str, None] = 'd7a3b9c05f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rows written before tickers were normalized on input; the list filters
+    # compare the stored value as-is so they can use the ticker indexes
+    for table in ('positions', 'transactions'):
+        op.execute(
+            f"UPDATE {table} SET ticker = UPPER(TRIM(ticker)) WHERE ticker != UPPER(TRIM(ticker))"
+        )
+
+
+def downgrade() -> None:
+    # The original spelling is not kept
+    pass
@@ -0,0 +1,39 @@
+"""Add portfolio snapshots
+
+Revision ID: 5b8e2d4c7a91
+Revises: ec6af361d293
+Create Date: 2026-10-19 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e2d4c7a91'
+down_revision: Union[str, None] = 'ec6af361d293'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('portfolio_snapshots',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('ticker', sa.String(length=10), nullable=False),
+    sa.Column('quantity', sa.DECIMAL(precision=15, scale=6), nullable=False),
+    sa.Column('close', sa.DECIMAL(precision=15, scale=6), nullable=True),
+    sa.Column('value', sa.DECIMAL(precision=20, scale=6), nullable=False),
+    sa.Column('invested', sa.DECIMAL(precision=20, scale=6), nullable=False),
+    sa.Column('profit_loss', sa.DECIMAL(precision=20, scale=6), nullable=False),
+    sa.Column('realized_profit_loss', sa.DECIMAL(precision=20, scale=6), server_default=sa.text('0'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('date', 'ticker', name='uq_portfolio_snapshots_date_ticker')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('portfolio_snapshots')
@@ -0,0 +1,32 @@
+"""Add portfolio list indexes
+
+Revision ID: 9c41f0a6d2e7
+Revises: 5b8e2d4c7a91
+Create Date: 2026-10-19 14:37:05.902115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c41f0a6d2e7'
+down_revision: Union[str, None] = '5b8e2d4c7a91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_positions_ticker_id', 'positions', ['ticker', 'id'], unique=False)
+    op.create_index('ix_transactions_date_id', 'transactions', ['transaction_date', 'id'], unique=False)
+    op.create_index('ix_transactions_ticker_date_id', 'transactions', ['ticker', 'transaction_date', 'id'], unique=False)
+    op.create_index('ix_transactions_type_date_id', 'transactions', ['transaction_type', 'transaction_date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_type_date_id', table_name='transactions')
+    op.drop_index('ix_transactions_ticker_date_id', table_name='transactions')
+    op.drop_index('ix_transactions_date_id', table_name='transactions')
+    op.drop_index('ix_positions_ticker_id', table_name='positions')
@@ -0,0 +1,34 @@
+"""Add market and portfolio indexes
+
+Revision ID: d7a3b9c05f18
+Revises: 9c41f0a6d2e7
+Create Date: 2026-10-19 16:52:48.660173
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a3b9c05f18'
+down_revision: Union[str, None] = '9c41f0a6d2e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_sector_level', 'sector', ['level'], unique=False)
+    op.create_index('ix_stock_symbol_symbol', 'stock_symbol', ['symbol'], unique=False)
+    op.create_index('ix_stock_symbol_sector_level_3', 'stock_symbol', ['id_sector_level_3', 'symbol'], unique=False)
+    op.create_index('ix_stock_symbol_sector_level_4', 'stock_symbol', ['id_sector_level_4', 'symbol'], unique=False)
+    op.create_index('ix_positions_purchase_date', 'positions', ['purchase_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_positions_purchase_date', table_name='positions')
+    op.drop_index('ix_stock_symbol_sector_level_4', table_name='stock_symbol')
+    op.drop_index('ix_stock_symbol_sector_level_3', table_name='stock_symbol')
+    op.drop_index('ix_stock_symbol_symbol', table_name='stock_symbol')
+    op.drop_index('ix_sector_level', table_name='sector')
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.routes import health, portfolio, sector, timeseries, report
+from app.api.v1.routes import health, portfolio, sector, timeseries, report, universe
 
 api_router = APIRouter()
 
@@ -8,3 +8,4 @@ api_router.include_router(portfolio.router)
 api_router.include_router(sector.router)
 api_router.include_router(timeseries.router)
 api_router.include_router(report.router)
+api_router.include_router(universe.router)
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Request
 from app.schemas.backtest import BacktestRequest, BacktestResponse
 from app.services.backtest_service import run_backtest
-from fastapi_cache.decorator import cache
+from app.cache import cache, backtest_key_builder
+from app.cache.keys import canonical_backtest_request
 from loguru import logger
 import hashlib
 import json
@@ -9,11 +10,12 @@ import json
 router = APIRouter(prefix="/backtest", tags=["backtest"])
 
 @router.post("", response_model=BacktestResponse)
-@cache(expire=3600)
+@cache(namespace="backtest", expire=3600, key_builder=backtest_key_builder, depends_on=("stocks", "feature_store"))
 async def backtest_strategy(request: BacktestRequest) -> BacktestResponse:
     """
     Run backtest for a given strategy.
     """
+    request = canonical_backtest_request(request)
     # Log request details for debugging
     logger.debug(f"Received backtest request: strategy={request.strategy}, start_date={request.start_date}")
     
@@ -30,7 +32,8 @@ async def backtest_strategy(request: BacktestRequest) -> BacktestResponse:
     result = await run_backtest(
         strategy_name=request.strategy,
         start_date=request.start_date,
-        symbols=request.symbols
+        symbols=request.symbols,
+        universe=request.universe,
     )
     
     return BacktestResponse(**result)
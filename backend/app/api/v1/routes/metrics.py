@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from app.core.metrics import registry
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)  # GET /metrics
+async def metrics() -> Response:
+    """Expose Prometheus metrics for the API process."""
+    return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -1,8 +1,11 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from typing import Iterator, List, Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.db.base import get_db
+from app.db.base import SessionLocal, get_db
 from app.schemas.portfolio import (
     Position,
     PositionCreate,
@@ -11,16 +14,55 @@ from app.schemas.portfolio import (
     InvestmentAmount,
     InvestmentAmountCreate,
     PortfolioSummary,
+    PortfolioAnalytics,
+    PortfolioValuation,
+    LedgerSummary,
+    LotMethod,
     OptimizationRequest,
     OptimizationResult,
+    BatchOptimizationRequest,
+    BatchOptimizationResult,
+    WalkForwardRequest,
+    WalkForwardResult,
     ClosePositionRequest,
     ClosePositionResponse,
+    BulkFormat,
+    BulkImportResult,
 )
-from app.services import portfolio_service
+from app.services.pagination import MAX_PAGE_SIZE, page_response, page_responses
+from app.services import bulk_io, ledger, portfolio_analytics, portfolio_service, valuation, walk_forward
 
 router = APIRouter(prefix="/portfolio", tags=["portfolio"])
 
 
+async def _bulk_import(
+    kind: str, request: Request, format: BulkFormat | None, atomic: bool, db: Session
+) -> BulkImportResult:
+    body = await request.body()
+    fmt = format or bulk_io.format_for(request.headers.get("content-type"))
+    try:
+        return await run_in_threadpool(bulk_io.import_rows, db, kind, body, fmt, atomic)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _bulk_export(kind: str, format: BulkFormat) -> StreamingResponse:
+    def stream() -> Iterator[bytes]:
+        # The response outlives the request's session; stream from one of our own
+        db = SessionLocal()
+        try:
+            yield from bulk_io.export_rows(db, kind, format)
+        finally:
+            db.close()
+
+    extension = "arrows" if format == BulkFormat.ARROW else "ndjson" if format == BulkFormat.JSON else "csv"
+    return StreamingResponse(
+        stream(),
+        media_type=bulk_io.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{kind}.{extension}"'},
+    )
+
+
 @router.post("/positions", response_model=Position)
 def create_position(
     position: PositionCreate,
@@ -29,9 +71,44 @@ def create_position(
     return portfolio_service.create_position(db, position)
 
 
-@router.get("/positions", response_model=List[Position])
-async def list_positions(db: Session = Depends(get_db)) -> List[Position]:
-    return await portfolio_service.get_positions(db)
+@router.get("/positions", response_class=Response, responses=page_responses(Position))
+def list_positions(
+    ticker: str | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    fields: str | None = None,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+) -> Response:
+    """
+    Positions ordered by ticker, optionally filtered by ticker and purchase date range.
+
+    `fields` is a comma-separated subset of the position fields. With `limit`,
+    one page is returned and the `X-Next-Cursor` header holds the cursor of the
+    next page (absent on the last one).
+    """
+    try:
+        rows, next_cursor = portfolio_service.list_positions(db, ticker, start_date, end_date, fields, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return page_response(rows, next_cursor)
+
+
+@router.post("/positions/import", response_model=BulkImportResult)
+async def import_positions(
+    request: Request,
+    format: BulkFormat | None = None,
+    atomic: bool = False,
+    db: Session = Depends(get_db),
+) -> BulkImportResult:
+    """Insert positions from a CSV, JSON/NDJSON or Arrow stream body; invalid rows are reported, not inserted."""
+    return await _bulk_import("positions", request, format, atomic, db)
+
+
+@router.get("/positions/export")
+def export_positions(format: BulkFormat = BulkFormat.CSV) -> StreamingResponse:
+    return _bulk_export("positions", format)
 
 
 @router.get("/positions/{position_id}", response_model=Position)
@@ -91,9 +168,47 @@ def create_transaction(
     return portfolio_service.create_transaction(db, transaction)
 
 
-@router.get("/transactions", response_model=List[Transaction])
-def list_transactions(db: Session = Depends(get_db)) -> List[Transaction]:
-    return portfolio_service.get_transactions(db)
+@router.get("/transactions", response_class=Response, responses=page_responses(Transaction))
+def list_transactions(
+    ticker: str | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    transaction_type: Literal["buy", "sell"] | None = None,
+    fields: str | None = None,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+) -> Response:
+    """
+    Transactions newest first, optionally filtered by ticker, date range and type.
+
+    `fields` is a comma-separated subset of the transaction fields. With `limit`,
+    one page is returned and the `X-Next-Cursor` header holds the cursor of the
+    next page (absent on the last one).
+    """
+    try:
+        rows, next_cursor = portfolio_service.list_transactions(
+            db, ticker, start_date, end_date, transaction_type, fields, limit, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return page_response(rows, next_cursor)
+
+
+@router.post("/transactions/import", response_model=BulkImportResult)
+async def import_transactions(
+    request: Request,
+    format: BulkFormat | None = None,
+    atomic: bool = False,
+    db: Session = Depends(get_db),
+) -> BulkImportResult:
+    """Insert transactions from a CSV, JSON/NDJSON or Arrow stream body; invalid rows are reported, not inserted."""
+    return await _bulk_import("transactions", request, format, atomic, db)
+
+
+@router.get("/transactions/export")
+def export_transactions(format: BulkFormat = BulkFormat.CSV) -> StreamingResponse:
+    return _bulk_export("transactions", format)
 
 
 @router.get("/transactions/{transaction_id}", response_model=Transaction)
@@ -136,9 +251,68 @@ async def get_portfolio_summary(db: Session = Depends(get_db)) -> PortfolioSumma
     return await portfolio_service.get_portfolio_summary(db)
 
 
+@router.get("/history", response_model=List[PortfolioValuation])
+def get_valuation_history(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    ticker: str | None = None,
+    db: Session = Depends(get_db),
+) -> List[PortfolioValuation]:
+    """Daily portfolio value, cost basis and P/L from the valuation snapshots."""
+    return valuation.get_valuation_history(db, start_date, end_date, ticker)
+
+
+@router.get("/ledger", response_model=LedgerSummary)
+def get_ledger(method: LotMethod = LotMethod.FIFO, db: Session = Depends(get_db)) -> LedgerSummary:
+    """Positions, cost basis and realized P/L replayed from the transactions with FIFO or average-cost lots."""
+    return ledger.get_ledger(db, method)
+
+
+@router.get("/analytics", response_model=PortfolioAnalytics)
+async def get_portfolio_analytics(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    benchmark_level: int = 3,
+    benchmark_id: int | None = None,
+    db: Session = Depends(get_db),
+) -> PortfolioAnalytics:
+    """Equity curve, drawdown, volatility and beta against a sector index for the current holdings."""
+    try:
+        return await portfolio_analytics.get_portfolio_analytics(db, start_date, end_date, benchmark_level, benchmark_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("/optimize", response_model=OptimizationResult)
 def optimize_portfolio(
     body: OptimizationRequest,
     db: Session = Depends(get_db),
 ) -> OptimizationResult:
-    return portfolio_service.optimize_portfolio(db, body)
+    try:
+        return portfolio_service.optimize_portfolio(db, body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/optimize/batch", response_model=BatchOptimizationResult)
+async def optimize_portfolio_batch(
+    body: BatchOptimizationRequest,
+    db: Session = Depends(get_db),
+) -> BatchOptimizationResult:
+    """Run several optimization methods and an efficient frontier over one risk model."""
+    try:
+        return await portfolio_service.optimize_portfolio_batch(db, body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/optimize/walk-forward", response_model=WalkForwardResult)
+async def optimize_walk_forward(
+    body: WalkForwardRequest,
+    db: Session = Depends(get_db),
+) -> WalkForwardResult:
+    """Re-optimize on a rolling window at each rebalance and simulate the portfolio with costs."""
+    try:
+        return await walk_forward.run_walk_forward(db, body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,27 +1,59 @@
-from fastapi import APIRouter
-from fastapi_cache.decorator import cache
-from app.schemas.timeseries import TimeseriesResponse, TimeseriesRequest
+from typing import Optional
+
+from fastapi import APIRouter, Header, Response
+from app.schemas.timeseries import (
+    TimeseriesResponse,
+    TimeseriesRequest,
+    BatchTimeseriesRequest,
+    BatchTimeseriesResponse,
+)
 from app.schemas.sector import SectorTimeseries
-from app.services.stock_service import get_stock_timeseries, get_sector_timeseries
+from app.services.stock_service import (
+    get_cached_stock_timeseries,
+    get_cached_batch_timeseries,
+    get_sector_timeseries,
+)
+from app.services.timeseries_format import ARROW_STREAM_MEDIA_TYPE, timeseries_response
 
 router = APIRouter(prefix="/timeseries", tags=["timeseries"])
 
-@router.post("/{symbol}", response_model=TimeseriesResponse)
-@cache(expire=300)  # Cache for 5 minutes
+# Declared before "/{symbol}" so "batch" is not taken as a symbol
+@router.post(
+    "/batch",
+    response_model=BatchTimeseriesResponse,
+    responses={200: {"content": {ARROW_STREAM_MEDIA_TYPE: {}}}},
+)
+async def get_batch_timeseries(
+    request: BatchTimeseriesRequest,
+    accept: Optional[str] = Header(default=None),
+) -> Response:
+    """
+    Get aligned timeseries for several symbols with a shared indicator spec.
+
+    All symbols are read in one Delta scan and returned on a common date axis
+    (null where a symbol has no bar). Arrow responses use `SYMBOL.series` columns.
+    """
+    batch = await get_cached_batch_timeseries(request=request)
+    return timeseries_response(batch, accept)
+
+@router.post(
+    "/{symbol}",
+    response_model=TimeseriesResponse,
+    responses={200: {"content": {ARROW_STREAM_MEDIA_TYPE: {}}}},
+)
 async def get_symbol_timeseries(
     symbol: str,
-    request: TimeseriesRequest
-) -> TimeseriesResponse:
+    request: TimeseriesRequest,
+    accept: Optional[str] = Header(default=None),
+) -> Response:
     """
     Get timeseries data for a symbol with optional technical indicators.
+
+    Send `Accept: application/vnd.apache.arrow.stream` to receive an Arrow IPC
+    stream (one column per series) instead of JSON.
     """
-    return await get_stock_timeseries(
-        symbol=symbol,
-        interval=request.interval,
-        indicators=request.indicators,
-        start_date=request.start_date,
-        end_date=request.end_date
-    )
+    frame = await get_cached_stock_timeseries(symbol=symbol, request=request)
+    return timeseries_response(frame, accept)
 
 @router.post("/sector/{sector_level}", response_model=SectorTimeseries)
 async def sector_timeseries(
@@ -32,4 +64,4 @@ async def sector_timeseries(
     """
     return await get_sector_timeseries(
         sector_level=sector_level
-    )
\ No newline at end of file
+    )
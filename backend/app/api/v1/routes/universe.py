@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException
+
+from app.schemas.universe import CustomUniverseUpdate, Universe, UniverseList, UniverseSummary
+from app.services.universe_service import ALL, universes
+
+router = APIRouter(prefix="/universe", tags=["universe"])
+
+
+@router.get("", response_model=UniverseList)
+def list_universes() -> UniverseList:
+    """Watchlist and custom universes; sectors are addressed as ``sector:<level>:<id>``."""
+    return UniverseList(universes=[UniverseSummary(id=k, size=v) for k, v in universes.list().items()])
+
+
+@router.get("/{universe_id}", response_model=Universe)
+def get_universe(universe_id: str) -> Universe:
+    if universe_id == ALL:
+        raise HTTPException(status_code=400, detail="The 'all' universe has no member list")
+    return Universe(id=universe_id, symbols=universes.resolve(universe_id))
+
+
+@router.put("/custom/{name}", response_model=Universe)
+def save_custom_universe(name: str, body: CustomUniverseUpdate) -> Universe:
+    return Universe(id=f"custom:{name}", symbols=universes.save_custom(name, body.symbols))
+
+
+@router.delete("/custom/{name}")
+def delete_custom_universe(name: str) -> dict:
+    if not universes.delete_custom(name):
+        raise HTTPException(status_code=404, detail="Universe not found")
+    return {"message": "Universe deleted successfully"}
@@ -0,0 +1,17 @@
+from .decorator import cache, invalidate_dependents
+from .instrumented import InstrumentedBackend
+from .keys import (
+    CanonicalKeyBuilder,
+    backtest_key_builder,
+    batch_timeseries_key_builder,
+    portfolio_analytics_key_builder,
+    timeseries_key_builder,
+)
+from .memory import BoundedMemoryBackend
+from .sqlite import SQLiteBackend
+from .versioning import DeltaVersionPoller, version_poller
+
+__all__ = ['cache', 'invalidate_dependents', 'InstrumentedBackend', 'CanonicalKeyBuilder',
+           'backtest_key_builder', 'batch_timeseries_key_builder', 'portfolio_analytics_key_builder',
+           'timeseries_key_builder', 'BoundedMemoryBackend',
+           'SQLiteBackend', 'DeltaVersionPoller', 'version_poller']
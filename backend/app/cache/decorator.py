@@ -0,0 +1,171 @@
+import asyncio
+from functools import wraps
+from inspect import isawaitable, iscoroutinefunction
+from collections import defaultdict
+from typing import Any, Callable, Dict, Optional, Sequence, Set, Type
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi.dependencies.utils import get_typed_return_annotation
+from fastapi_cache import FastAPICache
+from fastapi_cache.coder import Coder
+from fastapi_cache.types import KeyBuilder
+from loguru import logger
+
+from .keys import normalized_hits
+from .versioning import version_poller
+
+# Cache keys currently being computed, so concurrent misses wait for one result
+_inflight: Dict[str, asyncio.Future] = {}
+
+# Delta table name -> cache namespaces whose entries are derived from it
+_dependents: Dict[str, Set[str]] = defaultdict(set)
+
+
+def _version_tag(depends_on: Sequence[str]) -> Optional[str]:
+    """Encode the current versions of ``depends_on`` tables, or None if unknown."""
+    parts = []
+    for table in depends_on:
+        version = version_poller.get(table)
+        if version is None:
+            return None
+        parts.append(f"{table}@{version}")
+    return ",".join(parts)
+
+
+async def invalidate_dependents(table: str, old_version: Optional[int], new_version: int) -> None:
+    """Drop cached entries computed from an older version of ``table``."""
+    if old_version is None:
+        return
+    try:
+        prefix = FastAPICache.get_prefix()
+        backend = FastAPICache.get_backend()
+    except AssertionError:  # cache not initialised
+        return
+    for namespace in _dependents.get(table, ()):
+        cleared = await backend.clear(namespace=f"{prefix}:{namespace}:")
+        logger.info(f"Invalidated {cleared} '{namespace}' cache entries after {table} v{new_version}")
+
+
+version_poller.subscribe(invalidate_dependents)
+
+
+def _consume_exception(future: asyncio.Future) -> None:
+    # Avoid "exception was never retrieved" when no follower was waiting
+    if not future.cancelled():
+        future.exception()
+
+
+async def _call(func: Callable, args: tuple, kwargs: dict) -> Any:
+    if iscoroutinefunction(func):
+        return await func(*args, **kwargs)
+    return await run_in_threadpool(func, *args, **kwargs)
+
+
+def cache(
+    expire: Optional[int] = None,
+    coder: Optional[Type[Coder]] = None,
+    key_builder: Optional[KeyBuilder] = None,
+    namespace: str = "",
+    depends_on: Sequence[str] = (),
+    versioned_expire: bool = False,
+) -> Callable:
+    """Cache the result of an endpoint or service coroutine.
+
+    Drop-in for ``fastapi_cache.decorator.cache`` with two differences:
+
+    - the HTTP method is not inspected, so the POST query endpoints
+      (timeseries, backtest) are cached too; fastapi-cache skips every
+      non-GET request, which left those routes uncached.
+    - concurrent misses for the same key are coalesced: the first caller
+      computes the value and the others await its result.
+
+    ``depends_on`` names Delta tables (see ``version_poller``) the result is
+    derived from. Their current versions become part of the key and the
+    entry is kept without expiry; when a table moves to a new version the
+    namespace is cleared. ``expire`` only applies while a version is unknown,
+    unless ``versioned_expire`` is set for results that also depend on the
+    clock.
+
+    ``None`` results are not stored: they mean "not available" (or a
+    swallowed error) and would otherwise stick until the next version.
+    """
+    if depends_on and not namespace:
+        raise ValueError("cache(depends_on=...) requires a namespace")
+    for table in depends_on:
+        _dependents[table].add(namespace)
+
+    def wrapper(func: Callable) -> Callable:
+        return_type = get_typed_return_annotation(func)
+
+        @wraps(func)
+        async def inner(*args, **kwargs):
+            if not FastAPICache.get_enable():
+                return await _call(func, args, kwargs)
+
+            prefix = FastAPICache.get_prefix()
+            _coder = coder or FastAPICache.get_coder()
+            _expire = expire or FastAPICache.get_expire()
+            _key_builder = key_builder or FastAPICache.get_key_builder()
+            backend = FastAPICache.get_backend()
+
+            cache_key = _key_builder(
+                func,
+                f"{prefix}:{namespace}",
+                request=None,
+                response=None,
+                args=args,
+                kwargs=kwargs,
+            )
+            if isawaitable(cache_key):
+                cache_key = await cache_key
+            raw_key = None
+            if hasattr(_key_builder, "raw_key"):
+                raw_key = _key_builder.raw_key(func, f"{prefix}:{namespace}", args, kwargs)
+
+            version_tag = _version_tag(depends_on) if depends_on else None
+            if version_tag is not None:
+                cache_key = f"{cache_key}:{version_tag}"
+                if not versioned_expire:
+                    _expire = None
+
+            try:
+                cached = await backend.get(cache_key)
+            except Exception as e:
+                logger.warning(f"Error retrieving cache key '{cache_key}': {e}")
+                cached = None
+            if cached is not None:
+                if raw_key is not None:
+                    normalized_hits.record_hit(namespace, cache_key, raw_key)
+                return _coder.decode_as_type(cached, type_=return_type)
+
+            pending = _inflight.get(cache_key)
+            if pending is not None:
+                return await asyncio.shield(pending)
+
+            future = asyncio.get_running_loop().create_future()
+            future.add_done_callback(_consume_exception)
+            _inflight[cache_key] = future
+            try:
+                result = await _call(func, args, kwargs)
+                if result is not None:
+                    try:
+                        await backend.set(cache_key, _coder.encode(result), _expire)
+                        if raw_key is not None:
+                            normalized_hits.record_set(cache_key, raw_key)
+                    except Exception as e:
+                        logger.warning(f"Error setting cache key '{cache_key}': {e}")
+                future.set_result(result)
+                return result
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except BaseException as e:
+                if not future.done():
+                    future.set_exception(e)
+                raise
+            finally:
+                _inflight.pop(cache_key, None)
+
+        return inner
+
+    return wrapper
@@ -0,0 +1,45 @@
+from typing import Optional, Tuple
+
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.types import Backend
+
+from app.core.metrics import CACHE_REQUESTS, set_cache_size_source
+
+
+def _namespace(key: str) -> str:
+    """Extract the namespace from a ``prefix:namespace:digest`` cache key."""
+    parts = key.split(":", 2)
+    return parts[1] if len(parts) > 2 else ""
+
+
+class InstrumentedBackend(Backend):
+    """Wrap a fastapi-cache backend and record hit/miss counts and size."""
+
+    def __init__(self, backend: Backend):
+        self.backend = backend
+        set_cache_size_source(self.size)
+
+    def size(self) -> Tuple[int, int]:
+        """Return ``(entries, bytes)`` held by the wrapped backend."""
+        if hasattr(self.backend, "size"):
+            return self.backend.size()
+        if isinstance(self.backend, InMemoryBackend):
+            values = list(self.backend._store.values())
+            return len(values), sum(len(v.data) for v in values)
+        return 0, 0
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[bytes]]:
+        ttl, value = await self.backend.get_with_ttl(key)
+        CACHE_REQUESTS.labels(_namespace(key), "miss" if value is None else "hit").inc()
+        return ttl, value
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self.backend.get(key)
+        CACHE_REQUESTS.labels(_namespace(key), "miss" if value is None else "hit").inc()
+        return value
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        await self.backend.set(key, value, expire)
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        return await self.backend.clear(namespace, key)
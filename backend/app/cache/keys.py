@@ -0,0 +1,170 @@
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi_cache import default_key_builder
+
+from app.core.metrics import CACHE_NORMALIZED_HITS
+from app.schemas.backtest import BacktestRequest
+from app.schemas.timeseries import INDICATOR_DEFAULTS, BatchTimeseriesRequest, IndicatorParams, TimeseriesRequest
+from app.services.universe_service import universes
+
+
+def _normalize_value(value: Any) -> Any:
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def normalize_indicators(indicators: List[IndicatorParams]) -> List[IndicatorParams]:
+    """Return the indicator list in canonical form.
+
+    Names are lower-cased, parameters equal to their default are dropped and
+    the list is sorted by name. When a name repeats, only the last entry is
+    kept since that is the one whose output ends up in the response.
+    """
+    by_name: Dict[str, IndicatorParams] = {}
+    for ind in indicators:
+        name = ind.name.strip().lower()
+        defaults = INDICATOR_DEFAULTS.get(name, {})
+        params = {
+            k: _normalize_value(v)
+            for k, v in ind.params.items()
+            if k not in defaults or defaults[k] != v
+        }
+        by_name[name] = IndicatorParams(name=name, params=dict(sorted(params.items())))
+    return [by_name[name] for name in sorted(by_name)]
+
+
+def normalize_symbols(symbols: Optional[List[str]]) -> Optional[List[str]]:
+    """Upper-case, de-duplicate and sort symbols; an empty list means None."""
+    if not symbols:
+        return None
+    return sorted({s.strip().upper() for s in symbols if s.strip()}) or None
+
+
+def canonical_timeseries_request(symbol: str, request: TimeseriesRequest) -> Tuple[str, TimeseriesRequest]:
+    """Normalize a timeseries query so semantically equal requests compare equal."""
+    return symbol.strip().upper(), request.model_copy(
+        update={"indicators": normalize_indicators(request.indicators)}
+    )
+
+
+def canonical_batch_timeseries_request(request: BatchTimeseriesRequest) -> BatchTimeseriesRequest:
+    """Normalize a batch timeseries query (symbol set and indicators)."""
+    return request.model_copy(update={
+        "symbols": normalize_symbols(request.symbols) or [],
+        "indicators": normalize_indicators(request.indicators),
+    })
+
+
+def canonical_backtest_request(request: BacktestRequest) -> BacktestRequest:
+    """Normalize a backtest query so semantically equal requests compare equal.
+
+    A universe is resolved to its members, so the key changes when the
+    universe does; ``all`` stays symbolic.
+    """
+    symbols = normalize_symbols(request.symbols)
+    if symbols is None and request.universe:
+        symbols = normalize_symbols(universes.resolve(request.universe))
+    return request.model_copy(update={"symbols": symbols, "universe": None if symbols else request.universe})
+
+
+class CanonicalKeyBuilder:
+    """fastapi-cache key builder hashing a canonical form of the call arguments.
+
+    ``canonicalize`` receives the endpoint's arguments and returns a JSON
+    serializable value. ``raw_key`` gives the key the default builder would
+    have produced, which the cache decorator uses to count hits that only
+    happened thanks to normalization.
+    """
+
+    def __init__(self, canonicalize: Callable[..., Any]):
+        self.canonicalize = canonicalize
+
+    def __call__(
+        self,
+        func: Callable[..., Any],
+        namespace: str = "",
+        *,
+        request=None,
+        response=None,
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any],
+    ) -> str:
+        payload = json.dumps(self.canonicalize(*args, **kwargs), sort_keys=True, default=str)
+        digest = hashlib.md5(f"{func.__module__}:{func.__name__}:{payload}".encode()).hexdigest()  # noqa: S324
+        return f"{namespace}:{digest}"
+
+    @staticmethod
+    def raw_key(func: Callable[..., Any], namespace: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> str:
+        return default_key_builder(func, namespace, args=args, kwargs=kwargs)
+
+
+def _timeseries_payload(symbol: str, request: TimeseriesRequest, **_: Any) -> Any:
+    symbol, request = canonical_timeseries_request(symbol, request)
+    return {"symbol": symbol, "request": request.model_dump()}
+
+
+def _batch_timeseries_payload(request: BatchTimeseriesRequest, **_: Any) -> Any:
+    return canonical_batch_timeseries_request(request).model_dump()
+
+
+def _backtest_payload(request: BacktestRequest, **_: Any) -> Any:
+    return canonical_backtest_request(request).model_dump()
+
+
+def _portfolio_analytics_payload(holdings, start_date=None, end_date=None, benchmark_level=3, benchmark_id=None, **_: Any) -> Any:
+    # Holdings are frozen dataclasses already sorted by the service
+    return {
+        "holdings": [[h.ticker, h.quantity, str(h.purchase_date), h.purchase_price] for h in holdings],
+        "start_date": start_date,
+        "end_date": end_date,
+        "benchmark": [benchmark_level, benchmark_id] if benchmark_id is not None else None,
+    }
+
+
+timeseries_key_builder = CanonicalKeyBuilder(_timeseries_payload)
+batch_timeseries_key_builder = CanonicalKeyBuilder(_batch_timeseries_payload)
+backtest_key_builder = CanonicalKeyBuilder(_backtest_payload)
+portfolio_analytics_key_builder = CanonicalKeyBuilder(_portfolio_analytics_payload)
+
+
+class NormalizedHitTracker:
+    """Remember which raw keys each canonical key has served (bounded LRU).
+
+    A hit is counted per namespace when its raw key never populated the
+    entry and was not credited before: with the default key builder it
+    would have been a miss. Later hits from the same raw key would have
+    been ordinary hits, as would hits after the entry was evicted and
+    repopulated by another spelling.
+    """
+
+    def __init__(self, max_keys: int = 10_000):
+        self.max_keys = max_keys
+        self._seen: "OrderedDict[str, Set[str]]" = OrderedDict()
+
+    def _raw_keys(self, cache_key: str) -> Set[str]:
+        seen = self._seen.get(cache_key)
+        if seen is None:
+            seen = self._seen[cache_key] = set()
+        self._seen.move_to_end(cache_key)
+        while len(self._seen) > self.max_keys:
+            self._seen.popitem(last=False)
+        return seen
+
+    def record_set(self, cache_key: str, raw_key: str) -> None:
+        self._raw_keys(cache_key).add(raw_key)
+
+    def record_hit(self, namespace: str, cache_key: str, raw_key: str) -> None:
+        if cache_key not in self._seen:
+            # Populated before the tracker saw it (or forgotten): no baseline to compare with
+            return
+        seen = self._raw_keys(cache_key)
+        if raw_key not in seen:
+            seen.add(raw_key)
+            CACHE_NORMALIZED_HITS.labels(namespace).inc()
+
+
+normalized_hits = NormalizedHitTracker()
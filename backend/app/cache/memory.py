@@ -0,0 +1,153 @@
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Generic, List, Optional, Tuple, TypeVar
+
+from fastapi_cache.types import Backend
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+def pack(value: bytes, min_bytes: int, level: int) -> Tuple[bytes, bool]:
+    """Compress ``value`` when it is large enough and compression pays off."""
+    if len(value) < min_bytes:
+        return value, False
+    packed = zlib.compress(value, level)
+    if len(packed) >= len(value):
+        return value, False
+    return packed, True
+
+
+def unpack(data: bytes, compressed: bool) -> bytes:
+    return zlib.decompress(data) if compressed else data
+
+
+@dataclass
+class _Entry:
+    data: bytes
+    compressed: bool
+    expires_at: Optional[float]
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+
+class ByteBudgetLRU(Generic[K, V]):
+    """Least recently used mapping evicted down to a byte budget.
+
+    Each value is stored with its size in bytes; once the sizes add up to
+    more than ``max_bytes`` the least recently used values are dropped. A
+    value larger than the whole budget is not stored, since it would flush
+    everything else. Not thread safe: owners guard it with their own lock.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[K, Tuple[V, int]]" = OrderedDict()
+        self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._items
+
+    def keys(self) -> List[K]:
+        return list(self._items)
+
+    def get(self, key: K) -> Optional[V]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        self._items.move_to_end(key)
+        return item[0]
+
+    def put(self, key: K, value: V, size: int) -> bool:
+        """Store ``value`` as most recently used; False when it exceeds the whole budget."""
+        if size > self.max_bytes:
+            self.pop(key)
+            return False
+        self.pop(key)
+        self._items[key] = (value, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, evicted) = self._items.popitem(last=False)
+            self.bytes -= evicted
+        return True
+
+    def pop(self, key: K) -> Optional[V]:
+        item = self._items.pop(key, None)
+        if item is None:
+            return None
+        self.bytes -= item[1]
+        return item[0]
+
+
+class BoundedMemoryBackend(Backend):
+    """In-process LRU cache backend with a byte budget.
+
+    Unlike ``InMemoryBackend`` the store is bounded: once the stored payloads
+    exceed ``max_bytes`` the least recently used entries are evicted.
+    Payloads of at least ``compress_min_bytes`` are zlib-compressed, which
+    shrinks the JSON timeseries and backtest responses several times over.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        compress_min_bytes: int = 4096,
+        compression_level: int = 3,
+    ):
+        self.max_bytes = max_bytes
+        self.compress_min_bytes = compress_min_bytes
+        self.compression_level = compression_level
+        self._store: ByteBudgetLRU[str, _Entry] = ByteBudgetLRU(max_bytes)
+        self._lock = threading.Lock()
+
+    def size(self) -> Tuple[int, int]:
+        """Return ``(entries, bytes)`` currently held."""
+        return len(self._store), self._store.bytes
+
+    def _get(self, key: str) -> Optional[_Entry]:
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at is not None and entry.expires_at < time.time():
+            self._store.pop(key)
+            return None
+        return entry
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[bytes]]:
+        with self._lock:
+            entry = self._get(key)
+        if entry is None:
+            return 0, None
+        ttl = -1 if entry.expires_at is None else int(entry.expires_at - time.time())
+        return ttl, unpack(entry.data, entry.compressed)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._get(key)
+        return None if entry is None else unpack(entry.data, entry.compressed)
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        data, compressed = pack(value, self.compress_min_bytes, self.compression_level)
+        entry = _Entry(data, compressed, time.time() + expire if expire else None)
+        with self._lock:
+            self._store.put(key, entry, entry.size)
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        with self._lock:
+            if namespace:
+                keys = [k for k in self._store.keys() if k.startswith(namespace)]
+            elif key:
+                keys = [key] if key in self._store else []
+            else:
+                keys = self._store.keys()
+            for k in keys:
+                self._store.pop(k)
+        return len(keys)
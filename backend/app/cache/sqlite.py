@@ -0,0 +1,145 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+from fastapi_cache.types import Backend
+
+from .memory import pack, unpack
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    compressed INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed_at ON cache_entries (accessed_at);
+"""
+
+
+class SQLiteBackend(Backend):
+    """Cache backend shared by every worker on a host through one SQLite file.
+
+    The database runs in WAL mode so readers in one worker never block on
+    a writer in another. Like ``BoundedMemoryBackend`` it keeps a byte
+    budget, evicting the least recently accessed rows, and compresses large
+    payloads. Blocking sqlite calls run in a worker thread.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 1024 * 1024 * 1024,
+        compress_min_bytes: int = 4096,
+        compression_level: int = 3,
+        touch_interval: float = 30.0,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.compress_min_bytes = compress_min_bytes
+        self.compression_level = compression_level
+        # Only rewrite accessed_at this often per key, to keep hits read-only
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def size(self) -> Tuple[int, int]:
+        """Return ``(entries, bytes)`` currently held."""
+        row = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries"
+        ).fetchone()
+        return int(row[0]), int(row[1])
+
+    def _get(self, key: str) -> Tuple[int, Optional[bytes]]:
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT value, compressed, expires_at, accessed_at FROM cache_entries WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return 0, None
+        value, compressed, expires_at, accessed_at = row
+        now = time.time()
+        if expires_at is not None and expires_at < now:
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            return 0, None
+        if now - accessed_at > self.touch_interval:
+            conn.execute("UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key))
+        ttl = -1 if expires_at is None else int(expires_at - now)
+        return ttl, unpack(value, bool(compressed))
+
+    def _set(self, key: str, value: bytes, expire: Optional[int]) -> None:
+        data, compressed = pack(value, self.compress_min_bytes, self.compression_level)
+        if len(data) > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries "
+                "(key, value, compressed, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, data, int(compressed), len(data), now + expire if expire else None, now),
+            )
+            self._evict(conn, now)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM cache_entries ORDER BY accessed_at"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM cache_entries WHERE key = ?", victims)
+
+    def _clear(self, namespace: Optional[str], key: Optional[str]) -> int:
+        conn = self._connect()
+        if namespace:
+            # Escape LIKE wildcards so the namespace is matched literally
+            pattern = namespace.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            cur = conn.execute("DELETE FROM cache_entries WHERE key LIKE ? ESCAPE '\\'", (pattern,))
+        elif key:
+            cur = conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+        else:
+            cur = conn.execute("DELETE FROM cache_entries")
+        return cur.rowcount
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[bytes]]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        _, value = await asyncio.to_thread(self._get, key)
+        return value
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        await asyncio.to_thread(self._set, key, value, expire)
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        return await asyncio.to_thread(self._clear, namespace, key)
@@ -0,0 +1,91 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from deltalake import DeltaTable
+from loguru import logger
+
+from app.core.settings import settings
+
+VersionListener = Callable[[str, Optional[int], int], Awaitable[None]]
+
+
+class DeltaVersionPoller:
+    """Track the current version of the Delta tables cached results depend on.
+
+    Each table is opened once and refreshed with ``update_incremental``,
+    which only reads log entries committed since the last poll, so polling
+    every few seconds is cheap. Listeners are notified when a version moves.
+    """
+
+    def __init__(self, tables: Dict[str, str]):
+        self.tables = tables
+        self.versions: Dict[str, Optional[int]] = {name: None for name in tables}
+        self._handles: Dict[str, DeltaTable] = {}
+        self._listeners: List[VersionListener] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, listener: VersionListener) -> None:
+        """Call ``listener(table, old_version, new_version)`` on every change."""
+        self._listeners.append(listener)
+
+    def get(self, table: str) -> Optional[int]:
+        return self.versions.get(table)
+
+    def _read_version(self, name: str) -> int:
+        dt = self._handles.get(name)
+        if dt is None:
+            dt = DeltaTable(self.tables[name], storage_options=settings.delta_storage_options)
+            self._handles[name] = dt
+        else:
+            dt.update_incremental()
+        return dt.version()
+
+    async def poll(self) -> None:
+        for name in self.tables:
+            try:
+                version = await asyncio.to_thread(self._read_version, name)
+            except Exception as e:
+                logger.warning(f"Could not read version of Delta table {name}: {e}")
+                self._handles.pop(name, None)
+                continue
+            previous = self.versions.get(name)
+            if previous == version:
+                continue
+            self.versions[name] = version
+            if previous is not None:
+                logger.info(f"Delta table {name} moved from version {previous} to {version}")
+            for listener in self._listeners:
+                try:
+                    await listener(name, previous, version)
+                except Exception as e:
+                    logger.error(f"Version listener failed for {name}: {e}")
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.poll()
+
+    async def start(self, interval: float) -> None:
+        """Read initial versions, then keep polling in the background."""
+        if self._task is not None:
+            return
+        await self.poll()
+        self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+version_poller = DeltaVersionPoller({
+    "stocks": settings.stocks_delta_table,
+    "feature_store": settings.stocks_feature_store,
+    "sector": settings.sector_delta_table,
+    "wichart_report": settings.wichart_report_delta_table,
+})
@@ -0,0 +1,254 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from numba.core import event as numba_event
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+# Dedicated registry so /metrics only exposes what the API records
+registry = CollectorRegistry(auto_describe=True)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latency of HTTP requests by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+    registry=registry,
+)
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Response cache lookups by namespace and result (hit/miss)",
+    ["namespace", "result"],
+    registry=registry,
+)
+CACHE_NORMALIZED_HITS = Counter(
+    "cache_normalized_hits_total",
+    "Cache hits that only matched because the request key was canonicalized",
+    ["namespace"],
+    registry=registry,
+)
+CACHE_ENTRIES = Gauge(
+    "cache_entries",
+    "Number of entries held by the response cache backend",
+    registry=registry,
+)
+CACHE_BYTES = Gauge(
+    "cache_bytes",
+    "Bytes held by the response cache backend",
+    registry=registry,
+)
+
+DELTA_SCANS = Counter(
+    "delta_scans_total",
+    "Delta table scans by table",
+    ["table"],
+    registry=registry,
+)
+DELTA_BYTES_READ = Counter(
+    "delta_bytes_read_total",
+    "Arrow bytes materialized from Delta table scans",
+    ["table"],
+    registry=registry,
+)
+DELTA_ROWS_READ = Counter(
+    "delta_rows_read_total",
+    "Rows materialized from Delta table scans",
+    ["table"],
+    registry=registry,
+)
+DELTA_SCAN_DURATION = Histogram(
+    "delta_scan_duration_seconds",
+    "Duration of Delta table scans by table",
+    ["table"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+    registry=registry,
+)
+
+DELTA_FILES = Counter(
+    "delta_files_total",
+    "Data files considered by Delta scans, by outcome (scanned/pruned)",
+    ["table", "outcome"],
+    registry=registry,
+)
+DELTA_ROW_GROUPS = Counter(
+    "delta_row_groups_total",
+    "Parquet row groups in scanned files, by outcome (scanned/pruned)",
+    ["table", "outcome"],
+    registry=registry,
+)
+DELTA_UNFILTERED_SCANS = Counter(
+    "delta_unfiltered_scans_total",
+    "Delta scans that read without a pushed-down filter, by reason",
+    ["table", "reason"],
+    registry=registry,
+)
+
+NUMBA_COMPILE_SECONDS = Counter(
+    "numba_compile_seconds_total",
+    "Time spent in numba JIT compilation by function",
+    ["function"],
+    registry=registry,
+)
+NUMBA_COMPILES = Counter(
+    "numba_compiles_total",
+    "Number of numba JIT compilations by function",
+    ["function"],
+    registry=registry,
+)
+
+MODEL_INFERENCE_ROWS = Counter(
+    "model_inference_rows_total",
+    "Rows scored by each ML model",
+    ["model"],
+    registry=registry,
+)
+MODEL_INFERENCE_DURATION = Histogram(
+    "model_inference_duration_seconds",
+    "Duration of a single ML model predict call",
+    ["model"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+    registry=registry,
+)
+
+
+def route_template(scope: dict) -> str:
+    """Rebuild the route template (``/timeseries/{symbol}``) from a request scope.
+
+    Path parameter values are swapped back for their names so that latency
+    labels don't grow with every symbol or id requested.
+    """
+    if "endpoint" not in scope:
+        return "unmatched"
+    segments = scope["path"].split("/")
+    for name, value in (scope.get("path_params") or {}).items():
+        for i in range(len(segments) - 1, -1, -1):
+            if segments[i] == str(value):
+                segments[i] = "{" + name + "}"
+                break
+    return "/".join(segments)
+
+
+def _table_label(table_uri: str) -> str:
+    """Use the last path segment of a Delta table URI as its metric label."""
+    return table_uri.rstrip("/").rsplit("/", 1)[-1]
+
+
+class DeltaScan:
+    """Mutable handle yielded by ``track_delta_scan`` to report what was read.
+
+    ``pushdown`` is None when the caller asked for no filter, True when a
+    filter was pushed into the scan and False when one was requested but the
+    scan fell back to reading unfiltered. File and row group counts are only
+    filled in by scans that prune (``app.stores.delta_scan``).
+    """
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.bytes = 0
+        self.pushdown: Optional[bool] = None
+        self.files_total = 0
+        self.files_scanned = 0
+        self.row_groups_total = 0
+        self.row_groups_scanned = 0
+
+    @property
+    def files_pruned(self) -> int:
+        return self.files_total - self.files_scanned
+
+    @property
+    def row_groups_pruned(self) -> int:
+        return self.row_groups_total - self.row_groups_scanned
+
+    def record(self, table) -> None:
+        """Record rows/bytes of a ``pyarrow.Table`` or ``pandas.DataFrame``."""
+        if hasattr(table, "nbytes"):
+            self.rows += table.num_rows
+            self.bytes += table.nbytes
+        else:
+            self.rows += len(table)
+            self.bytes += int(table.memory_usage(deep=False).sum())
+
+
+@contextmanager
+def track_delta_scan(table_uri: str):
+    """Count and time one Delta scan; call ``record`` on the yielded handle."""
+    label = _table_label(table_uri)
+    scan = DeltaScan()
+    start = time.perf_counter()
+    try:
+        yield scan
+    finally:
+        DELTA_SCANS.labels(label).inc()
+        DELTA_SCAN_DURATION.labels(label).observe(time.perf_counter() - start)
+        DELTA_ROWS_READ.labels(label).inc(scan.rows)
+        DELTA_BYTES_READ.labels(label).inc(scan.bytes)
+        if scan.files_total:
+            DELTA_FILES.labels(label, "scanned").inc(scan.files_scanned)
+            DELTA_FILES.labels(label, "pruned").inc(scan.files_pruned)
+            DELTA_ROW_GROUPS.labels(label, "scanned").inc(scan.row_groups_scanned)
+            DELTA_ROW_GROUPS.labels(label, "pruned").inc(scan.row_groups_pruned)
+        if scan.pushdown is False:
+            DELTA_UNFILTERED_SCANS.labels(label, "fallback").inc()
+
+
+@contextmanager
+def track_inference(model: str, rows: int):
+    """Time one model predict call over ``rows`` samples."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        MODEL_INFERENCE_DURATION.labels(model).observe(time.perf_counter() - start)
+        MODEL_INFERENCE_ROWS.labels(model).inc(rows)
+
+
+def set_cache_size_source(source: Optional[Callable[[], tuple[int, int]]]) -> None:
+    """Register a callable returning ``(entries, bytes)`` for the cache gauges."""
+    if source is None:
+        CACHE_ENTRIES.set_function(lambda: 0)
+        CACHE_BYTES.set_function(lambda: 0)
+        return
+    CACHE_ENTRIES.set_function(lambda: source()[0])
+    CACHE_BYTES.set_function(lambda: source()[1])
+
+
+class _NumbaCompileListener(numba_event.Listener):
+    """Accumulate numba compile time per dispatcher.
+
+    Compilation can nest (a jitted function calling another one), so start
+    times are kept on a per-thread stack.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def on_start(self, event) -> None:
+        self._stack().append(time.perf_counter())
+
+    def on_end(self, event) -> None:
+        stack = self._stack()
+        if not stack:
+            return
+        elapsed = time.perf_counter() - stack.pop()
+        dispatcher = (event.data or {}).get("dispatcher")
+        name = getattr(getattr(dispatcher, "py_func", None), "__name__", "unknown")
+        NUMBA_COMPILE_SECONDS.labels(name).inc(elapsed)
+        NUMBA_COMPILES.labels(name).inc()
+
+
+_numba_listener: Optional[_NumbaCompileListener] = None
+
+
+def install_numba_listener() -> None:
+    """Register the compile-time listener with numba once per process."""
+    global _numba_listener
+    if _numba_listener is None:
+        _numba_listener = _NumbaCompileListener()
+        numba_event.register("numba:compile", _numba_listener)
@@ -1,8 +1,11 @@
 import os
 from typing import List
-from pydantic import AnyHttpUrl
+from pydantic import AnyHttpUrl, field_validator
 from pydantic_settings import BaseSettings
 
+# Relative data file paths resolve against the backend directory, not the process cwd
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 
 class Settings(BaseSettings):
     project_name: str = "Investment Tracker API"
@@ -14,6 +17,15 @@ class Settings(BaseSettings):
         "DATABASE_URL",
         "sqlite:///./portfolio.db"  # SQLite file in current directory by default
     )
+    # Log every SQL statement (noisy; for debugging only)
+    database_echo: bool = os.getenv("DATABASE_ECHO", "false").lower() in ("1", "true", "yes")
+    # Connection pool for server databases (PostgreSQL, MySQL)
+    database_pool_size: int = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+    database_max_overflow: int = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+    database_pool_recycle_seconds: int = int(os.getenv("DATABASE_POOL_RECYCLE_SECONDS", "1800"))
+    # SQLite page cache (KiB) and memory-mapped I/O (bytes) per connection
+    sqlite_cache_size_kib: int = int(os.getenv("SQLITE_CACHE_SIZE_KIB", str(64 * 1024)))
+    sqlite_mmap_size: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
 
     # CORS
     backend_cors_origins: List[AnyHttpUrl | str] = [
@@ -31,6 +43,16 @@ class Settings(BaseSettings):
         "*",
     ]
 
+    # Response cache: "memory" (per worker) or "sqlite" (shared by all workers on the host)
+    cache_backend: str = os.getenv("CACHE_BACKEND", "memory")
+    cache_sqlite_path: str = os.getenv("CACHE_SQLITE_PATH", "/tmp/investment-tracker/cache.sqlite3")
+    cache_max_bytes: int = int(os.getenv("CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    cache_compress_min_bytes: int = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "4096"))
+    # Memory budget of the weekly/monthly rollups and the daily bars they are kept with
+    rollup_max_bytes: int = int(os.getenv("ROLLUP_MAX_BYTES", str(64 * 1024 * 1024)))
+    # How often to check Delta table versions for cache invalidation
+    cache_version_poll_seconds: float = float(os.getenv("CACHE_VERSION_POLL_SECONDS", "15"))
+
     # Delta Lake
     minio_access_key: str = os.getenv("MINIO_ACCESS_KEY", "")
     minio_secret_key: str = os.getenv("MINIO_SECRET_KEY", "")
@@ -39,11 +61,23 @@ class Settings(BaseSettings):
     sector_delta_table: str = os.getenv("SECTOR_DELTA_TABLE", "s3://delta-table-storage/wichart_sector")
     wichart_report_delta_table: str = os.getenv("WICHART_REPORT_DELTA_TABLE", "s3://delta-table-storage/raw_wichart_report")
     stocks_feature_store: str = os.getenv("STOCKS_FEATURE_STORE", "s3://delta-table-storage/stocks_feature_store")
+    # Fail a Delta read whose filter cannot be pushed down instead of scanning the whole table
+    delta_scan_strict: bool = os.getenv("DELTA_SCAN_STRICT", "false").lower() in ("1", "true", "yes")
     model_path: str = os.getenv("MODEL_PATH", "models")
+    # Worker processes for batch portfolio optimization (0 = one per CPU)
+    optimization_workers: int = int(os.getenv("OPTIMIZATION_WORKERS", "0"))
+    # Symbol universes: the watchlist CSV and the JSON file holding custom lists
+    watchlist_path: str = os.path.join(BACKEND_DIR, os.getenv("WATCHLIST_PATH", "models/watchlist.csv"))
+    universe_path: str = os.path.join(BACKEND_DIR, os.getenv("UNIVERSE_PATH", "models/universes.json"))
     xgb_model_path: str = os.getenv("XGB_MODEL_PATH", "models/xgboost_model_05_19_2025.ubj")
     lgb_model_path: str = os.getenv("LGB_MODEL_PATH", "models/lightgbm_model_05_19_2025.ubj")
     catboost_model_path: str = os.getenv("CATBOOST_MODEL_PATH", "models/catboost_model_05_19_2025.cbm")
 
+    @field_validator("watchlist_path", "universe_path")
+    @classmethod
+    def _anchor_to_backend(cls, path: str) -> str:
+        return os.path.join(BACKEND_DIR, path)
+
     @property
     def delta_storage_options(self) -> dict:
         return {
@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.pool import StaticPool
 
@@ -8,16 +9,56 @@ from app.core.settings import settings
 Base = declarative_base()
 
 # Import all models to ensure they're registered with SQLAlchemy
-from app.db.models.portfolio import Position, Transaction, InvestmentAmount
+from app.db.models.portfolio import Position, Transaction, InvestmentAmount, PortfolioSnapshot
 from app.db.models.market import Sector, StockSymbol
 
-# Create SQLite engine with thread-safe connection pool
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if settings.database_url.startswith("sqlite") else {},
-    poolclass=StaticPool,
-    echo=settings.environment == "development"
-)
+
+def _is_sqlite_memory(url: str) -> bool:
+    return url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None) -> None:
+    """Per-connection SQLite tuning.
+
+    WAL lets readers run alongside the writer, and with it synchronous=NORMAL
+    only syncs at checkpoints (still durable against application crashes).
+    The page cache and mmap sizes keep the hot indexes in memory.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kib)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def make_engine(url: str) -> Engine:
+    """Engine for ``url``: tuned connections for SQLite, a pre-pinged, recycled pool otherwise."""
+    if not url.startswith("sqlite"):
+        return create_engine(
+            url,
+            pool_size=settings.database_pool_size,
+            max_overflow=settings.database_max_overflow,
+            pool_recycle=settings.database_pool_recycle_seconds,
+            pool_pre_ping=True,
+            echo=settings.database_echo,
+        )
+    options = {}
+    if _is_sqlite_memory(url):
+        # An in-memory database only exists on its one connection
+        options["poolclass"] = StaticPool
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        echo=settings.database_echo,
+        **options,
+    )
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+    return engine
+
+
+engine = make_engine(settings.database_url)
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
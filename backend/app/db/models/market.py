@@ -1,9 +1,11 @@
-from sqlalchemy import Column, Integer, String, DECIMAL, TIMESTAMP, text
+from sqlalchemy import Column, Integer, String, DECIMAL, TIMESTAMP, Index, text
 from app.db.base import Base
 
 
 class Sector(Base):
     __tablename__ = "sector"
+    # Sectors are listed per level; the (id, level) primary key cannot serve that
+    __table_args__ = (Index("ix_sector_level", "level"),)
 
     # Composite primary key to support multiple levels per id
     id = Column(Integer, primary_key=True)
@@ -37,6 +39,11 @@ class Sector(Base):
 
 class StockSymbol(Base):
     __tablename__ = "stock_symbol"
+    __table_args__ = (
+        Index("ix_stock_symbol_symbol", "symbol"),
+        Index("ix_stock_symbol_sector_level_3", "id_sector_level_3", "symbol"),
+        Index("ix_stock_symbol_sector_level_4", "id_sector_level_4", "symbol"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     symbol = Column(String(20), nullable=False)
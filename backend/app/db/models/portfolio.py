@@ -1,11 +1,16 @@
 from datetime import datetime
 from decimal import Decimal
-from sqlalchemy import Column, Integer, String, DECIMAL, Date, Text, TIMESTAMP, Enum, text
+from sqlalchemy import Column, Integer, String, DECIMAL, Date, Text, TIMESTAMP, Enum, Index, UniqueConstraint, text
 from app.db.base import Base
 
 
 class Position(Base):
     __tablename__ = "positions"
+    __table_args__ = (
+        # Keyset pages of the positions list: ORDER BY ticker, id
+        Index("ix_positions_ticker_id", "ticker", "id"),
+        Index("ix_positions_purchase_date", "purchase_date"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     ticker = Column(String(10), nullable=False)
@@ -18,6 +23,12 @@ class Position(Base):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Keyset pages of the transactions list: ORDER BY transaction_date DESC, id DESC, optionally filtered
+        Index("ix_transactions_date_id", "transaction_date", "id"),
+        Index("ix_transactions_ticker_date_id", "ticker", "transaction_date", "id"),
+        Index("ix_transactions_type_date_id", "transaction_type", "transaction_date", "id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     ticker = Column(String(10), nullable=False)
@@ -39,3 +50,20 @@ class InvestmentAmount(Base):
     date = Column(Date, nullable=False)
     notes = Column(Text)
     created_at = Column(TIMESTAMP, server_default=text("CURRENT_TIMESTAMP"))
+
+
+class PortfolioSnapshot(Base):
+    """Valuation of one ticker at the close of one day, maintained by the valuation service."""
+    __tablename__ = "portfolio_snapshots"
+    __table_args__ = (UniqueConstraint("date", "ticker", name="uq_portfolio_snapshots_date_ticker"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    date = Column(Date, nullable=False)
+    ticker = Column(String(10), nullable=False)
+    quantity = Column(DECIMAL(15, 6), nullable=False)
+    close = Column(DECIMAL(15, 6))
+    value = Column(DECIMAL(20, 6), nullable=False)
+    invested = Column(DECIMAL(20, 6), nullable=False)
+    profit_loss = Column(DECIMAL(20, 6), nullable=False)
+    realized_profit_loss = Column(DECIMAL(20, 6), nullable=False, server_default=text("0"))
+    updated_at = Column(TIMESTAMP, server_default=text("CURRENT_TIMESTAMP"))
@@ -1,18 +1,26 @@
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi_cache import FastAPICache
-from fastapi_cache.backends.inmemory import InMemoryBackend
 from fastapi_cache.decorator import cache
 from loguru import logger
 from functools import wraps
 
 from app.core.settings import settings
+from app.core.metrics import REQUEST_LATENCY, install_numba_listener, route_template
+from app.cache import InstrumentedBackend, BoundedMemoryBackend, SQLiteBackend, version_poller
+from app.api.v1.routes.metrics import router as metrics_router
 from app.api.v1.routes.health import router as health_router
 from app.api.v1.routes.portfolio import router as portfolio_router
 from app.api.v1.routes.sector import router as sector_router
 from app.api.v1.routes.timeseries import router as timeseries_router
 from app.api.v1.routes.report import router as report_router
 from app.api.v1.routes.backtest import router as backtest_router
+from app.api.v1.routes.universe import router as universe_router
+from app.services.optimizers import shutdown_pool
+from app.services.universe_service import UniverseNotFound
 
 
 def get_app() -> FastAPI:
@@ -26,6 +34,27 @@ def get_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    @app.middleware("http")
+    async def record_latency(request: Request, call_next):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            REQUEST_LATENCY.labels(request.method, route_template(request.scope), str(status)).observe(
+                time.perf_counter() - start
+            )
+
+    @app.exception_handler(UniverseNotFound)
+    async def universe_not_found(request: Request, exc: UniverseNotFound):
+        return JSONResponse(status_code=404, content={"detail": str(exc)})
+
+    install_numba_listener()
+
+    app.include_router(metrics_router)
+
     api_prefix = settings.api_v1_prefix
     app.include_router(health_router, prefix=api_prefix)
     app.include_router(portfolio_router, prefix=api_prefix)
@@ -33,6 +62,7 @@ def get_app() -> FastAPI:
     app.include_router(timeseries_router, prefix=api_prefix)
     app.include_router(report_router, prefix=api_prefix)
     app.include_router(backtest_router, prefix=api_prefix)
+    app.include_router(universe_router, prefix=api_prefix)
 
     # Create a custom cache decorator that logs hits and misses
     def cache_with_logging(**cache_kwargs):
@@ -65,14 +95,32 @@ def get_app() -> FastAPI:
 
     @app.on_event("startup")
     async def startup():
-        logger.info("Initializing in-memory cache")
-        backend = InMemoryBackend()
+        if settings.cache_backend == "sqlite":
+            logger.info("Initializing shared SQLite cache at {}", settings.cache_sqlite_path)
+            store = SQLiteBackend(
+                settings.cache_sqlite_path,
+                max_bytes=settings.cache_max_bytes,
+                compress_min_bytes=settings.cache_compress_min_bytes,
+            )
+        else:
+            logger.info("Initializing bounded in-memory cache")
+            store = BoundedMemoryBackend(
+                max_bytes=settings.cache_max_bytes,
+                compress_min_bytes=settings.cache_compress_min_bytes,
+            )
+        backend = InstrumentedBackend(store)
         FastAPICache.init(
             backend,
             prefix="fastapi-cache",
             expire=3600  # Default expiration of 1 hour
         )
-        logger.info("Cache initialized successfully with backend: {}", backend.__class__.__name__)
+        logger.info("Cache initialized successfully with backend: {}", backend.backend.__class__.__name__)
+        await version_poller.start(settings.cache_version_poll_seconds)
+
+    @app.on_event("shutdown")
+    async def shutdown():
+        await version_poller.stop()
+        shutdown_pool()
 
     return app
 
@@ -22,12 +22,17 @@ class BacktestRequest(BaseModel):
     strategy: str = Field(description="Strategy name to use for backtesting")
     start_date: str = Field(description="Start date in YYYY-MM-DD format")
     symbols: Optional[List[str]] = None
+    universe: Optional[str] = Field(
+        default="watchlist",
+        description="Universe id used when no symbols are given, e.g. 'watchlist', 'sector:3:<id>', 'custom:<name>' or 'all'",
+    )
 
 class ExecutionTime(BaseModel):
     total_seconds: float
     data_loading_seconds: float
     strategy_seconds: float
     feature_building_seconds: float
+    feature_prefetch_wait_seconds: Optional[float] = None
     prediction_seconds: float
 
 class BacktestResponse(BaseModel):
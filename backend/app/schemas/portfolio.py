@@ -1,7 +1,7 @@
 from datetime import date, datetime
 from decimal import Decimal
-from typing import List, Optional
-from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
 from enum import Enum
 
 
@@ -12,6 +12,12 @@ class PositionBase(BaseModel):
     purchase_date: date
     notes: Optional[str] = None
 
+    @field_validator("ticker")
+    @classmethod
+    def normalize_ticker(cls, value: str) -> str:
+        # Stored upper case so ticker filters can use the index
+        return value.strip().upper()
+
 
 class PositionCreate(PositionBase):
     pass
@@ -36,6 +42,12 @@ class TransactionBase(BaseModel):
     fees: Optional[Decimal] = Field(default=0, ge=0)
     notes: Optional[str] = None
 
+    @field_validator("ticker")
+    @classmethod
+    def normalize_ticker(cls, value: str) -> str:
+        # Stored upper case so ticker filters can use the index
+        return value.strip().upper()
+
 
 class TransactionCreate(TransactionBase):
     pass
@@ -86,6 +98,31 @@ class OptimizationMethod(str, Enum):
     CLA = "cla"
 
 
+class CovarianceMethod(str, Enum):
+    """Covariance estimators for the mean-variance methods."""
+    SAMPLE = "sample"
+    LEDOIT_WOLF = "ledoit_wolf"
+    ORACLE_APPROXIMATING = "oracle_approximating"
+
+
+class OptimizationConstraints(BaseModel):
+    """Constraints applied by every optimization method."""
+    min_weight: float = Field(default=0.0, ge=-1, le=1)
+    max_weight: float = Field(default=1.0, gt=0, le=1)
+    # Cap on the total weight of any level-3 sector (StockSymbol.id_sector_level_3)
+    sector_max_weight: float | None = Field(default=None, gt=0, le=1)
+    # Per-sector caps by level-3 sector id; override sector_max_weight
+    sector_caps: dict[int, float] = {}
+    # Max sum of absolute weight changes versus the current positions
+    max_turnover: float | None = Field(default=None, ge=0, le=2)
+
+    @model_validator(mode="after")
+    def check_bounds(self):
+        if self.min_weight > self.max_weight:
+            raise ValueError("min_weight must not exceed max_weight")
+        return self
+
+
 class OptimizationRequest(BaseModel):
     """Request body for portfolio optimization."""
     tickers: List[str]
@@ -93,7 +130,8 @@ class OptimizationRequest(BaseModel):
     end_date: date | None = None
     method: OptimizationMethod
     risk_free_rate: float | None = 0.0
-    constraints: dict | None = None  # e.g., {"min_weight": 0.0, "max_weight": 0.2}
+    covariance: CovarianceMethod = CovarianceMethod.SAMPLE
+    constraints: OptimizationConstraints | None = None  # e.g., {"min_weight": 0.0, "max_weight": 0.2}
 
 
 class OptimizationResult(BaseModel):
@@ -102,6 +140,166 @@ class OptimizationResult(BaseModel):
     expected_return: float | None = None
     volatility: float | None = None
     sharpe_ratio: float | None = None
+    # Requested tickers left out of the optimization: no prices at the start of the window
+    missing: List[str] = []
+
+
+class FrontierPoint(BaseModel):
+    expected_return: float
+    volatility: float
+    sharpe_ratio: float
+    weights: dict[str, float]
+
+
+class BatchOptimizationRequest(BaseModel):
+    """Several methods and an optional efficient frontier over one returns/covariance estimate."""
+    tickers: List[str]
+    start_date: date | None = None
+    end_date: date | None = None
+    methods: List[OptimizationMethod] = Field(min_length=1)
+    risk_free_rate: float | None = 0.0
+    covariance: CovarianceMethod = CovarianceMethod.SAMPLE
+    frontier_points: int = Field(default=0, ge=0, le=100, description="Sampled efficient frontier points (0 = none)")
+    constraints: OptimizationConstraints | None = None
+
+
+class BatchOptimizationResult(BaseModel):
+    results: List[OptimizationResult]
+    # Methods that failed (e.g. an infeasible problem), with the error message
+    errors: dict[str, str] = {}
+    frontier: List[FrontierPoint] = []
+    # Seconds per method, plus "risk_model", "frontier" and "total" wall times
+    timing: dict[str, float]
+    # Requested tickers left out of every method and the frontier, as in OptimizationResult
+    missing: List[str] = []
+
+
+class WalkForwardRequest(BaseModel):
+    """Re-optimize on a rolling window at every rebalance and simulate the result."""
+    tickers: List[str]
+    start_date: date = Field(description="First rebalance date; the first window ends here")
+    end_date: date | None = None
+    method: OptimizationMethod
+    # Trading days in each estimation window
+    lookback: int = Field(default=252, ge=20, le=2520)
+    rebalance: Literal["1w", "1M"] = "1M"
+    # Rebalance every n-th period, e.g. 3 with "1M" for quarterly
+    rebalance_every: int = Field(default=1, ge=1, le=12)
+    transaction_cost_bps: float = Field(default=10.0, ge=0)
+    risk_free_rate: float | None = 0.0
+    covariance: CovarianceMethod = CovarianceMethod.SAMPLE
+    # max_turnover applies between consecutive rebalances, which makes them sequential
+    constraints: OptimizationConstraints | None = None
+
+
+class WalkForwardRebalance(BaseModel):
+    date: date
+    weights: dict[str, float]
+    turnover: float
+    cost: float
+    # Set when the optimizer failed and the previous weights were kept
+    error: str | None = None
+
+
+class WalkForwardResult(BaseModel):
+    method: OptimizationMethod
+    dates: List[date]
+    equity: List[float]
+    rebalances: List[WalkForwardRebalance]
+    total_return: float
+    annualized_return: float
+    annualized_volatility: float
+    sharpe_ratio: float
+    max_drawdown: float
+    total_turnover: float
+    total_costs: float
+    timing: dict[str, float]
+
+
+class BulkFormat(str, Enum):
+    """Formats accepted by the bulk import and produced by the export endpoints."""
+    CSV = "csv"
+    JSON = "json"
+    ARROW = "arrow"
+
+
+class BulkRowError(BaseModel):
+    # Position of the row in the upload, from 0
+    row: int
+    errors: List[str]
+
+
+class BulkImportResult(BaseModel):
+    received: int
+    inserted: int
+    errors: List[BulkRowError] = []
+
+
+class LotMethod(str, Enum):
+    """How sells are matched against the open lots."""
+    FIFO = "fifo"
+    AVERAGE = "average"
+
+
+class LedgerLot(BaseModel):
+    quantity: float
+    unit_cost: float
+    opened: date
+
+
+class LedgerPosition(BaseModel):
+    """Holding of one ticker replayed from the transactions."""
+    ticker: str
+    quantity: float
+    cost_basis: float
+    average_cost: float | None = None
+    realized_profit_loss: float
+    # Quantity sold beyond what the transactions had bought
+    unmatched_quantity: float = 0.0
+    lots: List[LedgerLot] = []
+
+
+class RealizedPoint(BaseModel):
+    date: date
+    # Cumulative over all tickers
+    realized_profit_loss: float
+
+
+class LedgerSummary(BaseModel):
+    method: LotMethod
+    positions: List[LedgerPosition]
+    realized_profit_loss: float
+    realized_history: List[RealizedPoint]
+    transactions: int
+    # Transactions replayed by this call; the rest came from checkpoints
+    replayed: int
+
+
+class PortfolioValuation(BaseModel):
+    """Portfolio totals at the close of one day, from the valuation snapshots."""
+    date: date
+    value: Decimal
+    invested: Decimal
+    profit_loss: Decimal
+    realized_profit_loss: Decimal
+
+
+class PortfolioAnalytics(BaseModel):
+    """Daily analytics of the current holdings."""
+    dates: List[date]
+    # Market value and cost basis of the holdings held on each date
+    equity: List[float]
+    invested: List[float]
+    # Time-weighted: purchases are cash flows, not returns
+    cumulative_return: List[float]
+    drawdown: List[float]
+    total_return: float
+    annualized_volatility: float
+    max_drawdown: float
+    beta: float | None = None
+    benchmark: str | None = None
+    # Held tickers without price history in the stocks table
+    missing: List[str] = []
 
 
 class ClosePositionRequest(BaseModel):
@@ -1,7 +1,22 @@
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Literal, Optional, Union
 from datetime import date
 from pydantic import BaseModel, Field
 
+# Default parameters of each indicator computed by get_stock_timeseries
+INDICATOR_DEFAULTS: Dict[str, Dict[str, Union[int, float]]] = {
+    "rsi": {"timeperiod": 14},
+    "macd": {"fastperiod": 12, "slowperiod": 26, "signalperiod": 9},
+    "bbands": {"timeperiod": 20, "nbdevup": 2, "nbdevdn": 2},
+    "sma": {"timeperiod": 20},
+    "ema": {"timeperiod": 20},
+    "atr_trailing": {"timeperiod": 10},
+    "vwap": {"window": 200},
+    "bvc": {"window": 20, "kappa": 0.1},
+    "stoch": {"fastk_period": 14, "slowk_period": 3, "slowd_period": 3},
+    "kalman_zscore": {"window": 20},
+    "yz_volatility": {"window": 30, "periods": 252},
+}
+
 class IndicatorParams(BaseModel):
     name: str
     params: Dict[str, Union[int, float, str]] = Field(default_factory=dict)
@@ -47,8 +62,41 @@ class TimeseriesResponse(BaseModel):
     timeseries: Timeseries
     indicators: Optional[Indicators] = None
 
+Interval = Literal["1d", "1w", "1M"]
+
 class TimeseriesRequest(BaseModel):
-    interval: str = Field(default="1d", description="Data interval (e.g., 1d, 1h)")
+    interval: Interval = Field(default="1d", description="Bar interval: daily, weekly or monthly")
+    max_points: Optional[int] = Field(
+        default=None, ge=2, le=10000,
+        description="Downsample to at most this many points (indicators are computed on daily bars first)",
+    )
+    indicators: List[IndicatorParams] = Field(default_factory=list)
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+
+
+class AlignedTimeseries(BaseModel):
+    open: List[Optional[float]]
+    high: List[Optional[float]]
+    low: List[Optional[float]]
+    close: List[Optional[float]]
+    volume: List[Optional[float]]
+
+class SymbolSeries(BaseModel):
+    timeseries: AlignedTimeseries
+    indicators: Optional[Indicators] = None
+
+class BatchTimeseriesRequest(BaseModel):
+    symbols: List[str] = Field(..., min_length=1, max_length=50)
+    interval: Interval = Field(default="1d", description="Bar interval: daily, weekly or monthly")
+    max_points: Optional[int] = Field(default=None, ge=2, le=10000)
     indicators: List[IndicatorParams] = Field(default_factory=list)
     start_date: Optional[str] = None
     end_date: Optional[str] = None
+
+class BatchTimeseriesResponse(BaseModel):
+    interval: str = Field(default="1d", description="Data interval (e.g., 1d, 1h)")
+    meta: Dict = Field(default_factory=dict)
+    timestamps: List[str] = Field(description="Union of trading dates; every series is aligned to it")
+    series: Dict[str, SymbolSeries]
+    missing: List[str] = Field(default_factory=list, description="Requested symbols with no data")
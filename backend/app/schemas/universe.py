@@ -0,0 +1,21 @@
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+class UniverseSummary(BaseModel):
+    id: str
+    size: int
+
+
+class UniverseList(BaseModel):
+    universes: List[UniverseSummary]
+
+
+class Universe(BaseModel):
+    id: str
+    symbols: List[str]
+
+
+class CustomUniverseUpdate(BaseModel):
+    symbols: List[str] = Field(min_length=1, description="Symbols in the universe")
@@ -1,3 +1,5 @@
+import asyncio
+import functools
 import pandas as pd
 import numpy as np
 import json
@@ -6,8 +8,9 @@ from sklearn.preprocessing import StandardScaler
 from typing import List, Dict, Tuple
 from datetime import datetime
 from loguru import logger
-from app.services.stock_service import _load_delta_stocks, _load_feature_store
+from app.services.stock_service import _load_price_panel, _load_feature_store
 from app.core.settings import settings
+from app.core.metrics import track_inference
 
 # List of features used for ML predictions
 FEATURES_LIST = [
@@ -23,6 +26,22 @@ FEATURES_LIST = [
     'kf_distance', 'zscore_kf_10', 'zscore_kf_20'
 ]
 
+# Feature store columns build_features turns into the derived distance features
+FEATURE_BASE_COLUMNS = [
+    'close', 'kf', 'vwap_lowest', 'vwap_highest', 'volume', 'volume_ma_10', 'volume_ma_20',
+    'ema_10', 'ema_20', 'ema_50', 'ema_200',
+]
+DERIVED_FEATURES = {
+    'kf_distance', 'vwap_distance_lowest', 'vwap_distance_highest',
+    'volume_threshold_ma_10', 'volume_threshold_ma_20',
+    'ema_10_distance', 'ema_20_distance', 'ema_50_distance', 'ema_200_distance',
+}
+# Everything build_features reads from the feature store
+FEATURE_STORE_COLUMNS = ['date', 'symbol', *FEATURE_BASE_COLUMNS] + [
+    f for f in FEATURES_LIST if f not in DERIVED_FEATURES
+]
+BACKTEST_STOCK_COLUMNS = ["date", "symbol", "open", "high", "low", "close", "volume"]
+
 def get_strategy_params(strategy_name: str) -> Tuple[List[tuple], type, List[str]]:
     """Get strategy parameters based on strategy name."""
     if strategy_name == "Squeeze Breakout":
@@ -48,18 +67,24 @@ def get_strategy_params(strategy_name: str) -> Tuple[List[tuple], type, List[str
     else:
         raise ValueError(f"Unknown strategy: {strategy_name}")
 
-def build_features(total_trades: pd.DataFrame) -> pd.DataFrame:
-    """Build features for ML predictions."""
-    # Get unique combinations of date and symbol from trades
-    unique_dates = total_trades['date'].unique()
-    unique_symbols = total_trades['symbol'].unique()
+def build_features(total_trades: pd.DataFrame, feature_store: pd.DataFrame | None = None) -> pd.DataFrame:
+    """Build features for ML predictions.
 
-    # Get feature data from Delta Lake
-    feature_store = _load_feature_store(
-        symbols=list(unique_symbols),
-        start=min(unique_dates),
-        end=max(unique_dates),
-    )
+    ``feature_store`` may be a slice prefetched while the strategies ran; it
+    only has to cover the trades' symbols and dates.
+    """
+    if feature_store is None:
+        # Get unique combinations of date and symbol from trades
+        unique_dates = total_trades['date'].unique()
+        unique_symbols = total_trades['symbol'].unique()
+
+        # Get feature data from Delta Lake
+        feature_store = _load_feature_store(
+            symbols=list(unique_symbols),
+            start=min(unique_dates),
+            end=max(unique_dates),
+            columns=FEATURE_STORE_COLUMNS,
+        )
 
     # Calculate additional features
     feature_store['kf_distance'] = np.log(1 + (feature_store['close'] - feature_store['kf']) / feature_store['kf'])
@@ -93,30 +118,19 @@ def predict_features(feature_df: pd.DataFrame) -> pd.DataFrame:
     X_predict = scaler.fit_transform(X)
 
     # Make predictions
-    feature_df['y_pred_xgb'] = xgb_model.predict_proba(X_predict)[:, 1]
-    feature_df['y_pred_lgbm'] = lgb_model.predict(X_predict)
-    feature_df['y_pred_catboost'] = catboost_model.predict_proba(X_predict)[:, 1]
+    n_rows = len(X_predict)
+    with track_inference("xgboost", n_rows):
+        feature_df['y_pred_xgb'] = xgb_model.predict_proba(X_predict)[:, 1]
+    with track_inference("lightgbm", n_rows):
+        feature_df['y_pred_lgbm'] = lgb_model.predict(X_predict)
+    with track_inference("catboost", n_rows):
+        feature_df['y_pred_catboost'] = catboost_model.predict_proba(X_predict)[:, 1]
 
     return feature_df
 
-async def run_backtest(strategy_name: str, start_date: str, symbols: List[str] | None = None) -> Dict:
-    """Run backtest for given strategy and parameters."""
-    total_start_time = time.time()
-    
-    # Load stock data
-    logger.info(f"Starting backtest for {strategy_name} from {start_date}")
-    data_load_start = time.time()
-    stocks = _load_delta_stocks(
-        symbols=symbols,
-        columns=["date", "symbol", "open", "high", "low", "close", "volume"],
-        start=datetime.strptime(start_date, "%Y-%m-%d"),
-    )
-    stocks = stocks.set_index(["date", "symbol"]).sort_index()
-    stocks = stocks.unstack(level=1).bfill().ffill()
-    logger.info(f"Data loading took {time.time() - data_load_start:.2f} seconds")
-    
+def run_strategy_sweep(stocks: pd.DataFrame, strategy_name: str) -> pd.DataFrame:
+    """Trades of every parameter set of ``strategy_name``, with symbol and entry date, de-duplicated."""
     # Get strategy configuration
-    strategy_start_time = time.time()
     strategy_params, strategy_class, param_names = get_strategy_params(strategy_name)
 
     total_trades = pd.DataFrame()
@@ -158,14 +172,65 @@ async def run_backtest(strategy_name: str, start_date: str, symbols: List[str] |
     all_trades_df['symbol'] = all_trades_df.apply(lambda x: stocks.close.columns[x['col']], axis=1)
     all_trades_df['date'] = all_trades_df.apply(lambda x: stocks.index[x['entry_idx']], axis=1)
     
-    # Build features and make predictions
-    logger.info(f"Strategy execution took {time.time() - strategy_start_time:.2f} seconds")
-    
-    feature_start_time = time.time()
-    feature_df = build_features(all_trades_df)
-    logger.info(f"Feature building took {time.time() - feature_start_time:.2f} seconds")
+    return all_trades_df
+
+async def run_backtest(
+    strategy_name: str,
+    start_date: str,
+    symbols: List[str] | None = None,
+    universe: str | None = None,
+) -> Dict:
+    """Run backtest for given strategy and parameters."""
+    total_start_time = time.time()
     
-    prediction_start_time = time.time()
+    # Load stock data
+    logger.info(f"Starting backtest for {strategy_name} from {start_date}")
+    data_load_start = time.time()
+    # Scattered from Arrow straight into the wide (field, symbol) frame the strategies take
+    stocks = _load_price_panel(
+        symbols=symbols,
+        universe=universe,
+        fields=BACKTEST_STOCK_COLUMNS[2:],
+        start=datetime.strptime(start_date, "%Y-%m-%d"),
+    ).fill().to_frame()
+    logger.info(f"Data loading took {time.time() - data_load_start:.2f} seconds")
+
+    # Trades can only fall on the requested symbols from the start date, so
+    # that feature store slice and the models are fetched in worker threads
+    # while the sweep runs in another
+    loop = asyncio.get_running_loop()
+    feature_store_future = loop.run_in_executor(None, functools.partial(
+        _load_feature_store,
+        symbols=symbols,
+        universe=universe,
+        start=datetime.strptime(start_date, "%Y-%m-%d"),
+        end=stocks.index.max(),
+        columns=FEATURE_STORE_COLUMNS,
+    ))
+    from app.services.ml_models import get_models
+    models_future = loop.run_in_executor(None, get_models)
+
+    strategy_start_time = time.time()
+    try:
+        # CPU-bound; off the event loop like the prefetches
+        all_trades_df = await loop.run_in_executor(None, run_strategy_sweep, stocks, strategy_name)
+        logger.info(f"Strategy execution took {time.time() - strategy_start_time:.2f} seconds")
+
+        # Build features and make predictions
+        feature_start_time = time.time()
+        feature_store = await feature_store_future
+        prefetch_wait = time.time() - feature_start_time
+        logger.info(f"Waited {prefetch_wait:.2f} seconds for the prefetched feature store")
+        feature_df = build_features(all_trades_df, feature_store=feature_store)
+        logger.info(f"Feature building took {time.time() - feature_start_time:.2f} seconds")
+
+        prediction_start_time = time.time()
+        await models_future
+    finally:
+        # After a failure nothing awaits the prefetches: cancel them if not started, collect them otherwise
+        for future in (feature_store_future, models_future):
+            future.cancel()
+        await asyncio.gather(feature_store_future, models_future, return_exceptions=True)
     feature_df = predict_features(feature_df)
     logger.info(f"ML predictions took {time.time() - prediction_start_time:.2f} seconds")
 
@@ -205,6 +270,7 @@ async def run_backtest(strategy_name: str, start_date: str, symbols: List[str] |
             'data_loading_seconds': round(time.time() - data_load_start, 2),
             'strategy_seconds': round(time.time() - strategy_start_time, 2),
             'feature_building_seconds': round(time.time() - feature_start_time, 2),
+            'feature_prefetch_wait_seconds': round(prefetch_wait, 2),
             'prediction_seconds': round(time.time() - prediction_start_time, 2)
         }
     }
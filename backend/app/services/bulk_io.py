@@ -0,0 +1,213 @@
+"""Bulk import and streaming export of positions and transactions.
+
+Uploads (CSV, a JSON array or NDJSON, or an Arrow IPC stream) are read
+into one Arrow table, validated column-wise, and the valid rows are
+inserted with a single executemany in one transaction. Every invalid row
+is reported with its messages. Exports stream the table in batches in the
+same formats, so an export can be imported again as-is.
+"""
+import io
+import json
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from sqlalchemy import Date, DateTime, Integer, Numeric, insert
+from sqlalchemy.orm import Session
+
+from app.db.models.portfolio import Position, Transaction
+from app.schemas.portfolio import BulkFormat, BulkImportResult, BulkRowError
+from .valuation import revalue_from
+
+EXPORT_BATCH_SIZE = 5_000
+MEDIA_TYPES = {
+    BulkFormat.CSV: "text/csv",
+    BulkFormat.JSON: "application/x-ndjson",
+    BulkFormat.ARROW: "application/vnd.apache.arrow.stream",
+}
+
+
+@dataclass(frozen=True)
+class _Spec:
+    model: type
+    # Column -> kind; kinds: ticker, positive, non_negative, date, side, text
+    columns: Dict[str, str]
+    required: tuple
+    date_column: str
+
+
+_SPECS = {
+    "positions": _Spec(
+        Position,
+        {"ticker": "ticker", "quantity": "positive", "purchase_price": "positive", "purchase_date": "date",
+         "notes": "text"},
+        ("ticker", "quantity", "purchase_price", "purchase_date"),
+        "purchase_date",
+    ),
+    "transactions": _Spec(
+        Transaction,
+        {"ticker": "ticker", "transaction_type": "side", "quantity": "positive", "price": "positive",
+         "close_price": "positive", "transaction_date": "date", "fees": "non_negative", "notes": "text"},
+        ("ticker", "transaction_type", "quantity", "price", "transaction_date"),
+        "transaction_date",
+    ),
+}
+
+
+def format_for(content_type: Optional[str]) -> BulkFormat:
+    """Upload format implied by a Content-Type header (CSV when unknown)."""
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("application/json", "application/x-ndjson"):
+        return BulkFormat.JSON
+    if content_type.startswith("application/vnd.apache.arrow"):
+        return BulkFormat.ARROW
+    return BulkFormat.CSV
+
+
+def read_table(body: bytes, fmt: BulkFormat) -> pa.Table:
+    """Arrow table of an upload; raises ValueError when it cannot be parsed."""
+    try:
+        if fmt == BulkFormat.ARROW:
+            return pa.ipc.open_stream(body).read_all()
+        if fmt == BulkFormat.JSON:
+            text = body.decode("utf-8").strip()
+            records = json.loads(text) if text.startswith("[") else [json.loads(line) for line in text.splitlines() if line.strip()]
+            if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+                raise ValueError("expected an array of objects")
+            columns = sorted({k for r in records for k in r})
+            # Strings keep the validation the same for every format
+            return pa.table({c: pa.array([_as_text(r.get(c)) for r in records], pa.string()) for c in columns})
+        # Every column as text; numbers and dates are validated below
+        convert = pa_csv.ConvertOptions(column_types=_all_strings(body), strings_can_be_null=True)
+        return pa_csv.read_csv(io.BytesIO(body), convert_options=convert)
+    except (pa.ArrowInvalid, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Could not read {fmt.value} upload: {e}")
+
+
+def _as_text(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _all_strings(body: bytes) -> Dict[str, pa.DataType]:
+    header = pa_csv.read_csv(io.BytesIO(body.split(b"\n", 1)[0] + b"\n")).column_names
+    return {name: pa.string() for name in header}
+
+
+def validate(table: pa.Table, kind: str) -> tuple[pd.DataFrame, List[BulkRowError]]:
+    """Typed frame of the valid rows and the errors of the others (rows numbered from 0)."""
+    spec = _SPECS[kind]
+    missing = [c for c in spec.required if c not in table.column_names]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    frame = table.select([c for c in spec.columns if c in table.column_names]).to_pandas()
+    n = len(frame)
+    messages = [[] for _ in range(n)]
+
+    def flag(mask: np.ndarray, message: str) -> None:
+        for i in np.flatnonzero(mask):
+            messages[i].append(message)
+
+    out = {}
+    for column, kind_ in spec.columns.items():
+        if column not in frame:
+            continue
+        raw = frame[column].astype("string").str.strip()
+        blank = raw.isna() | (raw == "")
+        if column in spec.required:
+            flag(blank.to_numpy(), f"{column} is required")
+        if kind_ == "ticker":
+            flag((raw.str.len() > 10).fillna(False).to_numpy(), f"{column} is longer than 10 characters")
+            out[column] = raw.str.upper()
+        elif kind_ == "side":
+            values = raw.str.lower()
+            flag((~blank & ~values.isin(["buy", "sell"])).to_numpy(), f"{column} must be 'buy' or 'sell'")
+            out[column] = values
+        elif kind_ == "date":
+            values = pd.to_datetime(raw, errors="coerce", format="ISO8601")
+            flag((~blank & values.isna()).to_numpy(), f"{column} is not a date (YYYY-MM-DD)")
+            out[column] = values.dt.date
+        elif kind_ in ("positive", "non_negative"):
+            values = pd.to_numeric(raw, errors="coerce")
+            flag((~blank & values.isna()).to_numpy(), f"{column} is not a number")
+            bad = values <= 0 if kind_ == "positive" else values < 0
+            flag(bad.fillna(False).to_numpy(), f"{column} must be {'positive' if kind_ == 'positive' else 'non-negative'}")
+            out[column] = values.round(6)
+        else:
+            out[column] = raw.where(~blank, None)
+
+    errors = [BulkRowError(row=i, errors=m) for i, m in enumerate(messages) if m]
+    valid = pd.DataFrame(out)[np.array([not m for m in messages], dtype=bool)]
+    return valid, errors
+
+
+def _records(frame: pd.DataFrame) -> List[dict]:
+    # NaN / NaT -> None so optional columns insert as NULL
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
+
+
+def import_rows(db: Session, kind: str, body: bytes, fmt: BulkFormat, atomic: bool = False) -> BulkImportResult:
+    """Insert the valid rows of an upload in one transaction.
+
+    With ``atomic`` nothing is inserted when any row is invalid.
+    """
+    spec = _SPECS[kind]
+    table = read_table(body, fmt)
+    valid, errors = validate(table, kind)
+    inserted = 0
+    if len(valid) and not (atomic and errors):
+        db.execute(insert(spec.model), _records(valid))
+        db.commit()
+        inserted = len(valid)
+        revalue_from(db, min(valid[spec.date_column]))
+    return BulkImportResult(received=table.num_rows, inserted=inserted, errors=errors)
+
+
+def _arrow_type(column_type) -> pa.DataType:
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Numeric):
+        return pa.decimal128(column_type.precision, column_type.scale)
+    if isinstance(column_type, Date):
+        return pa.date32()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def _export_schema(model: type) -> pa.Schema:
+    return pa.schema([pa.field(c.name, _arrow_type(c.type)) for c in model.__table__.columns])
+
+
+def _batches(db: Session, model: type, schema: pa.Schema) -> Iterator[pa.RecordBatch]:
+    columns = [model.__table__.c[name] for name in schema.names]
+    result = db.execute(model.__table__.select().with_only_columns(*columns).order_by(model.id)).yield_per(EXPORT_BATCH_SIZE)
+    for rows in result.partitions():
+        yield pa.RecordBatch.from_pylist([dict(zip(schema.names, row)) for row in rows], schema=schema)
+
+
+def export_rows(db: Session, kind: str, fmt: BulkFormat) -> Iterator[bytes]:
+    """Chunks of the whole table in ``fmt``, read and encoded ``EXPORT_BATCH_SIZE`` rows at a time."""
+    model = _SPECS[kind].model
+    schema = _export_schema(model)
+    sink = io.BytesIO()
+
+    def drain() -> bytes:
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    if fmt == BulkFormat.JSON:
+        for batch in _batches(db, model, schema):
+            yield "".join(json.dumps(r, default=str) + "\n" for r in batch.to_pylist()).encode()
+        return
+    writer = pa.ipc.new_stream(sink, schema) if fmt == BulkFormat.ARROW else pa_csv.CSVWriter(sink, schema)
+    yield drain()
+    for batch in _batches(db, model, schema):
+        writer.write_batch(batch)
+        yield drain()
+    writer.close()
+    yield drain()
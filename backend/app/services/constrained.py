@@ -0,0 +1,197 @@
+"""Constrained weight problems solved through cached, parametrized cvxpy programs.
+
+pypfopt builds and canonicalizes a fresh cvxpy problem on every call,
+which dominates the solve time on universes of a few hundred assets. The
+problems here are built once per shape (asset count, sector count) with
+every input as a ``cp.Parameter``; later calls only update parameter
+values and re-solve with ``warm_start``, reusing the compiled program and
+the previous solution as the solver's starting point.
+"""
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+import cvxpy as cp
+import numpy as np
+import pandas as pd
+
+# Effectively no limit: two long-only portfolios differ by at most 2 in L1
+_NO_TURNOVER_LIMIT = 1e6
+
+
+@dataclass
+class ConstraintSet:
+    """Per-asset constraints aligned with the optimizer's asset order.
+
+    ``sectors`` is a (sectors x assets) 0/1 membership matrix with one cap
+    per row; ``current`` holds the current weights the turnover limit is
+    measured against.
+    """
+    lower: np.ndarray
+    upper: np.ndarray
+    sectors: np.ndarray
+    sector_caps: np.ndarray
+    current: Optional[np.ndarray] = None
+    max_turnover: Optional[float] = None
+
+    @property
+    def has_turnover(self) -> bool:
+        return self.current is not None and self.max_turnover is not None
+
+    @property
+    def only_bounds(self) -> bool:
+        return not len(self.sector_caps) and not self.has_turnover
+
+    def subset(self, mask: np.ndarray) -> "ConstraintSet":
+        """Constraints of the assets selected by ``mask``."""
+        return ConstraintSet(
+            lower=self.lower[mask],
+            upper=self.upper[mask],
+            sectors=self.sectors[:, mask],
+            sector_caps=self.sector_caps,
+            current=self.current[mask] if self.current is not None else None,
+            max_turnover=self.max_turnover,
+        )
+
+    def check_feasible(self) -> None:
+        if self.lower.sum() > 1 + 1e-9 or self.upper.sum() < 1 - 1e-9:
+            raise ValueError("Weight bounds cannot sum to 1")
+        if len(self.sector_caps):
+            capped = self.sectors.any(axis=0)
+            room = np.minimum(self.sectors @ self.upper, self.sector_caps).sum() + self.upper[~capped].sum()
+            if room < 1 - 1e-9:
+                raise ValueError("Sector caps and weight bounds leave less than 100% to allocate")
+
+
+@dataclass
+class _Program:
+    problem: cp.Problem
+    params: Dict[str, cp.Parameter]
+    variables: Dict[str, cp.Variable]
+    lock: threading.Lock
+
+
+_programs: Dict[Tuple, _Program] = {}
+_programs_lock = threading.Lock()
+
+
+def _program(key: Tuple, build: Callable[[], _Program]) -> _Program:
+    with _programs_lock:
+        program = _programs.get(key)
+        if program is None:
+            program = _programs[key] = build()
+        return program
+
+
+def _common_params(n: int, m: int) -> Dict[str, cp.Parameter]:
+    params = {
+        "lower": cp.Parameter(n),
+        "upper": cp.Parameter(n),
+        "current": cp.Parameter(n),
+        "max_turnover": cp.Parameter(nonneg=True),
+    }
+    if m:
+        params["sectors"] = cp.Parameter((m, n))
+        params["sector_caps"] = cp.Parameter(m, nonneg=True)
+    return params
+
+
+def _set_common(params: Dict[str, cp.Parameter], cs: ConstraintSet) -> None:
+    n = len(cs.lower)
+    params["lower"].value = cs.lower
+    params["upper"].value = cs.upper
+    params["current"].value = cs.current if cs.current is not None else np.zeros(n)
+    params["max_turnover"].value = cs.max_turnover if cs.has_turnover else _NO_TURNOVER_LIMIT
+    if "sectors" in params:
+        params["sectors"].value = cs.sectors
+        params["sector_caps"].value = cs.sector_caps
+
+
+def _solve(program: _Program) -> None:
+    program.problem.solve(solver=cp.OSQP, warm_start=True, eps_abs=1e-9, eps_rel=1e-9, max_iter=20000, polishing=True)
+    if program.problem.status not in (cp.OPTIMAL, cp.OPTIMAL_INACCURATE):
+        # OSQP reports infeasibility quickly; let the interior point solver confirm it
+        program.problem.solve(solver=cp.CLARABEL)
+    if program.problem.status not in (cp.OPTIMAL, cp.OPTIMAL_INACCURATE):
+        raise ValueError(f"Constraints are infeasible ({program.problem.status})")
+
+
+def _build_max_sharpe(n: int, m: int) -> _Program:
+    # Transformed max Sharpe: y = k * w, minimize y' S y with (mu - rf)' y = 1
+    params = _common_params(n, m)
+    params["cov_factor"] = cp.Parameter((n, n))
+    params["excess"] = cp.Parameter(n)
+    y, k = cp.Variable(n), cp.Variable(nonneg=True)
+    constraints = [
+        params["excess"] @ y == 1,
+        cp.sum(y) == k,
+        y >= params["lower"] * k,
+        y <= params["upper"] * k,
+        cp.norm1(y - params["current"] * k) <= params["max_turnover"] * k,
+    ]
+    if m:
+        constraints.append(params["sectors"] @ y <= params["sector_caps"] * k)
+    problem = cp.Problem(cp.Minimize(cp.sum_squares(params["cov_factor"] @ y)), constraints)
+    return _Program(problem, params, {"y": y, "k": k}, threading.Lock())
+
+
+def _build_projection(n: int, m: int) -> _Program:
+    params = _common_params(n, m)
+    params["target"] = cp.Parameter(n)
+    w = cp.Variable(n)
+    constraints = [
+        cp.sum(w) == 1,
+        w >= params["lower"],
+        w <= params["upper"],
+        cp.norm1(w - params["current"]) <= params["max_turnover"],
+    ]
+    if m:
+        constraints.append(params["sectors"] @ w <= params["sector_caps"])
+    problem = cp.Problem(cp.Minimize(cp.sum_squares(w - params["target"])), constraints)
+    return _Program(problem, params, {"w": w}, threading.Lock())
+
+
+def _cov_factor(S: np.ndarray) -> np.ndarray:
+    # Any F with F'F = S works; eigh tolerates the semi-definite matrices sample estimates give
+    values, vectors = np.linalg.eigh(S)
+    return (vectors * np.sqrt(np.clip(values, 0, None))).T
+
+
+def max_sharpe(mu: pd.Series, S: pd.DataFrame, cs: ConstraintSet, risk_free_rate: float = 0.0) -> pd.Series:
+    """Maximum Sharpe ratio weights under ``cs``."""
+    cs.check_feasible()
+    if mu.max() <= risk_free_rate:
+        raise ValueError("at least one of the assets must have an expected return exceeding the risk-free rate")
+    n, m = len(mu), len(cs.sector_caps)
+    program = _program(("max_sharpe", n, m), lambda: _build_max_sharpe(n, m))
+    with program.lock:
+        _set_common(program.params, cs)
+        program.params["cov_factor"].value = _cov_factor(S.to_numpy())
+        program.params["excess"].value = mu.to_numpy() - risk_free_rate
+        _solve(program)
+        weights = program.variables["y"].value / program.variables["k"].value
+    return pd.Series(weights, index=mu.index)
+
+
+def project(target: pd.Series, cs: ConstraintSet) -> pd.Series:
+    """Closest weights to ``target`` (in L2) that satisfy ``cs``."""
+    cs.check_feasible()
+    n, m = len(target), len(cs.sector_caps)
+    program = _program(("project", n, m), lambda: _build_projection(n, m))
+    with program.lock:
+        _set_common(program.params, cs)
+        program.params["target"].value = target.to_numpy(dtype=float)
+        _solve(program)
+        weights = program.variables["w"].value
+    return pd.Series(weights, index=target.index)
+
+
+def clean(weights: pd.Series, cutoff: float = 1e-6, rounding: int = 6) -> Dict[str, float]:
+    """Zero out solver noise and round, like pypfopt's ``clean_weights``.
+
+    The cutoff is tighter than pypfopt's 1e-4 so that dropping small
+    weights doesn't push a binding turnover or sector limit over.
+    """
+    values = weights.to_numpy(dtype=float).copy()
+    values[np.abs(values) < cutoff] = 0
+    return {k: round(float(v), rounding) for k, v in zip(weights.index, values)}
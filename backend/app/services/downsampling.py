@@ -0,0 +1,166 @@
+from dataclasses import replace
+from typing import Dict, Optional
+
+import numpy as np
+from numba import njit
+
+from .timeseries_format import OHLCV_COLUMNS, IndicatorValues, TimeseriesFrame
+
+# Calendar intervals served by aggregating daily bars
+RESAMPLE_INTERVALS = ("1d", "1w", "1M")
+
+
+def _period_keys(dates: np.ndarray, interval: str) -> np.ndarray:
+    if interval == "1w":
+        # Day 0 (1970-01-01) is a Thursday; shift so weeks start on Monday
+        return (dates.astype("datetime64[D]").astype(np.int64) + 3) // 7
+    if interval == "1M":
+        return dates.astype("datetime64[M]").astype(np.int64)
+    raise ValueError(f"Unsupported interval {interval!r}, expected one of {RESAMPLE_INTERVALS}")
+
+
+def bucket_edges(dates: np.ndarray, interval: str = "1d", max_points: Optional[int] = None) -> Optional[np.ndarray]:
+    """Return bucket boundaries over ``dates`` or None when no bucketing is needed.
+
+    Bars are first grouped by calendar period for ``1w``/``1M``; if more than
+    ``max_points`` buckets remain, consecutive buckets are merged into
+    ``max_points`` groups of (nearly) equal size. Edges are row offsets,
+    ``edges[i]:edges[i + 1]`` being the rows of bucket ``i``.
+    """
+    n = len(dates)
+    if n == 0:
+        return None
+    if interval == "1d":
+        edges = np.arange(n + 1)
+    else:
+        keys = _period_keys(dates, interval)
+        edges = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1, [n]))
+    n_buckets = len(edges) - 1
+    if max_points is not None and n_buckets > max_points:
+        edges = edges[np.linspace(0, n_buckets, max_points + 1).round().astype(np.int64)]
+    elif interval == "1d":
+        return None
+    return edges
+
+
+@njit
+def _bucket_ohlcv(open_, high, low, close, volume, edges):
+    m = len(edges) - 1
+    out = np.full((5, m), np.nan)
+    for b in range(m):
+        volume_sum = 0.0
+        has_bar = False
+        for i in range(edges[b], edges[b + 1]):
+            if np.isnan(close[i]):
+                continue
+            if not has_bar:
+                out[0, b] = open_[i]
+                out[1, b] = high[i]
+                out[2, b] = low[i]
+                has_bar = True
+            else:
+                out[1, b] = max(out[1, b], high[i])
+                out[2, b] = min(out[2, b], low[i])
+            out[3, b] = close[i]
+            volume_sum += volume[i]
+        if has_bar:
+            out[4, b] = volume_sum
+    return out
+
+
+def aggregate_ohlcv(ohlcv: Dict[str, np.ndarray], edges: np.ndarray) -> Dict[str, np.ndarray]:
+    """Aggregate OHLCV columns per bucket: first open, max high, min low, last close, summed volume."""
+    bars = _bucket_ohlcv(*(ohlcv[c] for c in OHLCV_COLUMNS), edges)
+    return {c: np.ascontiguousarray(bars[i]) for i, c in enumerate(OHLCV_COLUMNS)}
+
+
+@njit
+def _last_valid(y, edges):
+    m = len(edges) - 1
+    out = np.full(m, np.nan)
+    for b in range(m):
+        for i in range(edges[b + 1] - 1, edges[b] - 1, -1):
+            if not np.isnan(y[i]):
+                out[b] = y[i]
+                break
+    return out
+
+
+@njit
+def _lttb(y, edges):
+    """Largest-Triangle-Three-Buckets: keep one point per bucket.
+
+    Within each bucket the point forming the largest triangle with the
+    previously kept point and the mean of the next bucket is kept, which
+    preserves peaks and troughs that averaging would flatten. The first
+    and last buckets keep their first and last valid points. NaNs are
+    skipped (indicator warm-up periods stay NaN).
+    """
+    m = len(edges) - 1
+    out = np.full(m, np.nan)
+    prev = -1
+    for b in range(m):
+        start, end = edges[b], edges[b + 1]
+        best = -1
+        if b == m - 1 or prev == -1:
+            # Edge buckets and the first bucket after warm-up: first/last valid point
+            order = range(end - 1, start - 1, -1) if b == m - 1 else range(start, end)
+            for i in order:
+                if not np.isnan(y[i]):
+                    best = i
+                    break
+        else:
+            next_start, next_end = edges[b + 1], edges[min(b + 2, m)]
+            avg_x, avg_y, count = 0.0, 0.0, 0
+            for i in range(next_start, next_end):
+                if not np.isnan(y[i]):
+                    avg_x += i
+                    avg_y += y[i]
+                    count += 1
+            best_area = -1.0
+            for i in range(start, end):
+                if np.isnan(y[i]):
+                    continue
+                if count:
+                    area = abs((prev - avg_x / count) * (y[i] - y[prev])
+                               - (prev - i) * (avg_y / count - y[prev]))
+                else:
+                    area = abs(y[i] - y[prev])
+                if area > best_area:
+                    best_area = area
+                    best = i
+        if best != -1:
+            out[b] = y[best]
+            prev = best
+    return out
+
+
+def _bucket_indicator(values: np.ndarray, edges: np.ndarray, calendar: bool) -> np.ndarray:
+    # Calendar bars report each indicator as of the period close, like the close price
+    return _last_valid(values, edges) if calendar else _lttb(values, edges)
+
+
+def downsample(frame: TimeseriesFrame, edges: np.ndarray, interval: str) -> TimeseriesFrame:
+    """Aggregate a full-resolution frame into the buckets given by ``bucket_edges``.
+
+    OHLCV goes through ``aggregate_ohlcv`` and each bucket is stamped with
+    its first date. Indicators,
+    computed beforehand on daily bars, take their period-close value for
+    calendar intervals and are LTTB-downsampled otherwise.
+    """
+    ohlcv = aggregate_ohlcv(frame.ohlcv, edges)
+    calendar = interval != "1d"
+    indicators: Dict[str, IndicatorValues] = {}
+    for name, values in frame.indicators.items():
+        if isinstance(values, dict):
+            indicators[name] = {k: _bucket_indicator(v, edges, calendar) for k, v in values.items()}
+        else:
+            indicators[name] = _bucket_indicator(values, edges, calendar)
+    return replace(
+        frame,
+        interval=interval,
+        dates=frame.dates[edges[:-1]],
+        ohlcv=ohlcv,
+        indicators=indicators,
+        meta={**frame.meta, "source_points": len(frame.dates), "points": len(edges) - 1},
+    )
@@ -0,0 +1,316 @@
+"""Positions, cost basis and realized P/L replayed from the transaction ledger.
+
+Transactions are replayed per ticker in (transaction_date, id) order with
+FIFO or average-cost lots. FIFO is vectorized: sells consume the buys'
+cumulative quantity axis, so the cost of each sell is a difference of the
+cumulative cost curve interpolated at the cumulative sold quantity.
+Average cost is a single linear pass. The replayed state of each ticker is
+kept as a checkpoint; later calls only replay the transactions after it,
+and a ticker is replayed from scratch when an older transaction was added
+or deleted. Deleting a transaction drops its ticker's checkpoint.
+
+Sells record their sale price in ``close_price`` (``close_position``
+stores the lot's purchase price in ``price``) or, without one, in
+``price``. Quantity sold beyond the holdings is reported as unmatched and
+costed at the transaction's ``price`` when it has a ``close_price``, at
+the sale price otherwise.
+"""
+import threading
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from numba import njit
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from app.db.models.portfolio import Transaction
+from app.schemas.portfolio import LedgerLot, LedgerPosition, LedgerSummary, LotMethod, RealizedPoint
+
+# Quantities below this are treated as zero (float sums of decimal quantities)
+EPSILON = 1e-9
+_EMPTY_LOTS = np.empty((0, 3))
+_EMPTY_SELLS = np.empty((0, 2))
+
+
+@dataclass
+class TickerBook:
+    """Replayed state of one ticker up to ``watermark`` (date ordinal, transaction id).
+
+    ``lots`` holds the open lots oldest first as (quantity, unit cost,
+    opened date ordinal) rows; average cost keeps a single lot. ``sells``
+    holds the (date ordinal, realized P/L) of every sell replayed.
+    ``count`` and ``id_sum`` fingerprint the transactions replayed so far.
+    """
+    lots: np.ndarray
+    realized: float
+    unmatched: float
+    sells: np.ndarray
+    watermark: Tuple[int, int]
+    count: int
+    id_sum: int
+
+    @property
+    def quantity(self) -> float:
+        return float(self.lots[:, 0].sum())
+
+    @property
+    def cost_basis(self) -> float:
+        return float(self.lots[:, 0] @ self.lots[:, 1])
+
+
+@dataclass
+class _Batch:
+    """Transactions of one ticker in replay order."""
+    day: np.ndarray
+    ids: np.ndarray
+    buy: np.ndarray
+    quantity: np.ndarray
+    # Buy cost per unit, fees included
+    unit_cost: np.ndarray
+    # Sell proceeds net of fees
+    proceeds: np.ndarray
+    # Unit cost assumed for quantity sold beyond the holdings
+    fallback: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows: List[tuple]) -> "_Batch":
+        _, days, ids, types, quantity, price, close_price, fees = zip(*rows) if rows else ((),) * 8
+        quantity = np.array(quantity, dtype=float)
+        price = np.array(price, dtype=float)
+        # None becomes NaN: no close price recorded, no fees
+        sale = np.array(close_price, dtype=float)
+        sale = np.where(np.isnan(sale), price, sale)
+        fees = np.nan_to_num(np.array(fees, dtype=float))
+        return cls(
+            day=np.array([d.toordinal() for d in days], dtype=np.int64),
+            ids=np.array(ids, dtype=np.int64),
+            buy=np.array(types) == "buy",
+            quantity=quantity,
+            unit_cost=price + fees / quantity,
+            proceeds=quantity * sale - fees,
+            fallback=price,
+        )
+
+
+def _replay_fifo(lots: np.ndarray, batch: _Batch) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """FIFO replay from ``lots``; return the open lots, per-sell realized P/L and per-sell unmatched quantity."""
+    buy, sell = batch.buy, ~batch.buy
+    # Open lots are the oldest buys
+    lot_qty = np.concatenate([lots[:, 0], batch.quantity[buy]])
+    lot_cost = np.concatenate([lots[:, 1], batch.unit_cost[buy]])
+    lot_day = np.concatenate([lots[:, 2], batch.day[buy]])
+
+    # Holdings as a running sum floored at zero: the floor's running total is the quantity oversold
+    held = lots[:, 0].sum() + np.cumsum(np.where(buy, batch.quantity, -batch.quantity))
+    oversold = np.maximum.accumulate(np.maximum(-held, 0.0))
+    oversold[oversold < EPSILON] = 0.0
+    excess = np.diff(oversold, prepend=0.0)[sell]
+    matched = batch.quantity[sell] - excess
+
+    cum_qty = np.concatenate([[0.0], np.cumsum(lot_qty)])
+    cum_cost = np.concatenate([[0.0], np.cumsum(lot_qty * lot_cost)])
+    sold = np.minimum(np.cumsum(matched), cum_qty[-1])
+    cost = np.interp(sold, cum_qty, cum_cost) - np.interp(sold - matched, cum_qty, cum_cost)
+    realized = batch.proceeds[sell] - cost - excess * batch.fallback[sell]
+
+    total_sold = sold[-1] if len(sold) else 0.0
+    remaining = np.minimum(lot_qty, np.maximum(cum_qty[1:] - total_sold, 0.0))
+    keep = remaining > EPSILON
+    return np.column_stack([remaining[keep], lot_cost[keep], lot_day[keep]]), realized, excess
+
+
+@njit
+def _average_cost_nb(buy, quantity, unit_cost, proceeds, fallback, day, held, cost, opened):
+    n = len(buy)
+    realized = np.zeros(n)
+    excess = np.zeros(n)
+    for i in range(n):
+        if buy[i]:
+            if held <= 0:
+                opened = day[i]
+            held += quantity[i]
+            cost += quantity[i] * unit_cost[i]
+        else:
+            matched = min(quantity[i], held)
+            relieved = cost * matched / held if held > 0 else 0.0
+            excess[i] = quantity[i] - matched
+            realized[i] = proceeds[i] - relieved - excess[i] * fallback[i]
+            held -= matched
+            cost -= relieved
+            if held <= 1e-9:
+                held = 0.0
+                cost = 0.0
+    return held, cost, opened, realized, excess
+
+
+def _replay_average(lots: np.ndarray, batch: _Batch) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Average-cost replay from ``lots``; same return values as ``_replay_fifo``."""
+    held, cost = float(lots[:, 0].sum()), float(lots[:, 0] @ lots[:, 1])
+    opened = int(lots[0, 2]) if len(lots) else 0
+    held, cost, opened, realized, excess = _average_cost_nb(
+        batch.buy, batch.quantity, batch.unit_cost, batch.proceeds, batch.fallback, batch.day, held, cost, opened
+    )
+    sell = ~batch.buy
+    lots = np.array([[held, cost / held, opened]]) if held > EPSILON else _EMPTY_LOTS
+    return lots, realized[sell], excess[sell]
+
+
+_REPLAY = {LotMethod.FIFO: _replay_fifo, LotMethod.AVERAGE: _replay_average}
+
+
+def replay_ticker(book: Optional[TickerBook], batch: _Batch, method: LotMethod) -> TickerBook:
+    """Extend ``book`` (or an empty book) with ``batch``."""
+    if book is None:
+        book = TickerBook(_EMPTY_LOTS, 0.0, 0.0, _EMPTY_SELLS, (0, 0), 0, 0)
+    if not len(batch.ids):
+        return book
+    lots, realized, excess = _REPLAY[method](book.lots, batch)
+    sells = np.column_stack([batch.day[~batch.buy], realized])
+    return TickerBook(
+        lots=lots,
+        realized=book.realized + float(realized.sum()),
+        unmatched=book.unmatched + float(excess.sum()),
+        sells=np.concatenate([book.sells, sells]),
+        watermark=(int(batch.day[-1]), int(batch.ids[-1])),
+        count=book.count + len(batch.ids),
+        id_sum=book.id_sum + int(batch.ids.sum()),
+    )
+
+
+def _ticker_column():
+    return func.upper(func.trim(Transaction.ticker))
+
+
+def _after(watermark: Tuple[int, int]):
+    day, tx_id = date.fromordinal(watermark[0]), watermark[1]
+    return or_(
+        Transaction.transaction_date > day,
+        and_(Transaction.transaction_date == day, Transaction.id > tx_id),
+    )
+
+
+def _load_rows(db: Session, tickers: List[str], watermark: Optional[Tuple[int, int]] = None) -> List[tuple]:
+    ticker = _ticker_column()
+    query = db.query(
+        ticker,
+        Transaction.transaction_date,
+        Transaction.id,
+        Transaction.transaction_type,
+        Transaction.quantity,
+        Transaction.price,
+        Transaction.close_price,
+        Transaction.fees,
+    ).filter(ticker.in_(tickers))
+    if watermark is not None:
+        query = query.filter(_after(watermark))
+    return query.order_by(ticker, Transaction.transaction_date, Transaction.id).all()
+
+
+class Ledger:
+    """Checkpointed ticker books per (database, lot method).
+
+    Each call compares per-ticker transaction counts and id sums with the
+    checkpoint. Unchanged tickers are skipped; tickers whose checkpointed
+    prefix is intact replay only the newer transactions; the rest are
+    replayed in full, all in one query.
+    """
+
+    def __init__(self):
+        self._books: Dict[Tuple[str, LotMethod], Dict[str, TickerBook]] = {}
+        self._lock = threading.Lock()
+
+    def _prefix_intact(self, db: Session, ticker: str, book: TickerBook) -> bool:
+        count, id_sum = (
+            db.query(func.count(Transaction.id), func.coalesce(func.sum(Transaction.id), 0))
+            .filter(_ticker_column() == ticker, ~_after(book.watermark))
+            .one()
+        )
+        return (count, id_sum) == (book.count, book.id_sum)
+
+    def replay(self, db: Session, method: LotMethod) -> Tuple[Dict[str, TickerBook], int]:
+        """Books of every ticker and the number of transactions replayed to bring them up to date."""
+        key = (str(db.get_bind().url), method)
+        ticker = _ticker_column()
+        totals = {
+            t: (count, int(id_sum))
+            for t, count, id_sum in db.query(ticker, func.count(Transaction.id), func.sum(Transaction.id)).group_by(ticker)
+        }
+        with self._lock:
+            books = self._books.setdefault(key, {})
+            for gone in set(books) - set(totals):
+                del books[gone]
+
+            full, replayed = [], 0
+            for t, fingerprint in totals.items():
+                book = books.get(t)
+                if book is not None and (book.count, book.id_sum) == fingerprint:
+                    continue
+                if book is None or not self._prefix_intact(db, t, book):
+                    full.append(t)
+                    continue
+                batch = _Batch.from_rows(_load_rows(db, [t], book.watermark))
+                books[t] = replay_ticker(book, batch, method)
+                replayed += len(batch.ids)
+
+            if full:
+                rows = _load_rows(db, full)
+                starts = [i for i in range(len(rows)) if i == 0 or rows[i][0] != rows[i - 1][0]] + [len(rows)]
+                for begin, end in zip(starts[:-1], starts[1:]):
+                    books[rows[begin][0]] = replay_ticker(None, _Batch.from_rows(rows[begin:end]), method)
+                replayed += len(rows)
+            return dict(books), replayed
+
+    def invalidate(self, ticker: Optional[str] = None) -> None:
+        """Drop checkpoints (for one ticker or all) so they are replayed from scratch.
+
+        Needed after a delete: SQLite hands the highest id out again, so a
+        delete followed by an insert can leave the count and id sum as they
+        were.
+        """
+        with self._lock:
+            if ticker is None:
+                self._books.clear()
+                return
+            for books in self._books.values():
+                books.pop(ticker.strip().upper(), None)
+
+
+ledger = Ledger()
+
+
+def get_ledger(db: Session, method: LotMethod = LotMethod.FIFO) -> LedgerSummary:
+    """Positions, cost basis and realized P/L derived from the transactions."""
+    books, replayed = ledger.replay(db, method)
+    positions = []
+    for ticker in sorted(books):
+        book = books[ticker]
+        quantity = book.quantity
+        positions.append(LedgerPosition(
+            ticker=ticker,
+            quantity=quantity,
+            cost_basis=book.cost_basis,
+            average_cost=book.cost_basis / quantity if quantity > EPSILON else None,
+            realized_profit_loss=book.realized,
+            unmatched_quantity=book.unmatched,
+            lots=[
+                LedgerLot(quantity=float(q), unit_cost=float(c), opened=date.fromordinal(int(d)))
+                for q, c, d in book.lots
+            ],
+        ))
+
+    sells = np.concatenate([b.sells for b in books.values()]) if books else _EMPTY_SELLS
+    days, daily = np.unique(sells[:, 0].astype(np.int64), return_inverse=True)
+    realized_by_day = np.cumsum(np.bincount(daily, weights=sells[:, 1], minlength=len(days)))
+    return LedgerSummary(
+        method=method,
+        positions=positions,
+        realized_profit_loss=float(sum(b.realized for b in books.values())),
+        realized_history=[
+            RealizedPoint(date=date.fromordinal(int(d)), realized_profit_loss=float(r))
+            for d, r in zip(days, realized_by_day)
+        ],
+        transactions=sum(b.count for b in books.values()),
+        replayed=replayed,
+    )
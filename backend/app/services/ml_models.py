@@ -1,3 +1,4 @@
+import threading
 import xgboost as xgb
 import lightgbm as lgb
 import catboost as cb
@@ -7,6 +8,7 @@ from app.core.settings import settings
 xgb_model = None
 lgb_model = None
 catboost_model = None
+_load_lock = threading.Lock()
 
 def load_models():
     """Load all ML models into memory."""
@@ -33,7 +35,8 @@ def load_models():
         raise
 
 def get_models():
-    """Get the loaded ML models."""
-    if None in (xgb_model, lgb_model, catboost_model):
-        load_models()
+    """Get the loaded ML models (safe to call from several threads)."""
+    with _load_lock:
+        if None in (xgb_model, lgb_model, catboost_model):
+            load_models()
     return xgb_model, lgb_model, catboost_model
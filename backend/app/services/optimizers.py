@@ -0,0 +1,195 @@
+"""Optimizer runs that can execute in worker processes.
+
+Kept free of the Delta / numba stack so spawned workers start quickly:
+they only import pandas, pypfopt and the portfolio schemas.
+"""
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import cvxpy as cp
+import numpy as np
+import pandas as pd
+import scipy.cluster.hierarchy as sch
+import scipy.spatial.distance as ssd
+from pypfopt import CLA, EfficientCVaR, EfficientFrontier, HRPOpt, objective_functions
+from pypfopt.base_optimizer import portfolio_performance
+
+from app.core.settings import settings
+from app.schemas.portfolio import FrontierPoint, OptimizationMethod, OptimizationResult
+from .constrained import ConstraintSet, clean, max_sharpe, project
+
+
+def _hrp_bisection(cov: np.ndarray, order: List[int]) -> np.ndarray:
+    # pypfopt's recursive bisection, on positional arrays instead of .loc lookups
+    weights = np.ones(len(order))
+    clusters = [np.asarray(order)]
+    while clusters:
+        clusters = [c[j:k] for c in clusters for j, k in ((0, len(c) // 2), (len(c) // 2, len(c))) if len(c) > 1]
+        for first, second in zip(clusters[::2], clusters[1::2]):
+            variances = []
+            for items in (first, second):
+                sub = cov[np.ix_(items, items)]
+                ivp = 1 / np.diag(sub)
+                ivp /= ivp.sum()
+                variances.append(ivp @ sub @ ivp)
+            alpha = 1 - variances[0] / (variances[0] + variances[1])
+            weights[first] *= alpha
+            weights[second] *= 1 - alpha
+    return weights
+
+
+def hrp(returns: pd.DataFrame, risk_free_rate: float = 0.0, frequency: int = 252):
+    """``HRPOpt(returns).optimize()`` and its performance, without pandas in the inner loop.
+
+    Same clustering (single linkage on correlation distance) and bisection
+    as pypfopt, whose per-cluster ``.loc`` slicing dominates its run time.
+    """
+    cov = returns.cov()
+    corr = returns.corr()
+    matrix = np.sqrt(np.clip((1.0 - corr) / 2.0, a_min=0.0, a_max=1.0))
+    clusters = sch.linkage(ssd.squareform(matrix, checks=False), "single")
+    values = _hrp_bisection(cov.to_numpy(), HRPOpt._get_quasi_diag(clusters))
+    weights = OrderedDict(sorted(zip(returns.columns, values)))
+    performance = portfolio_performance(
+        weights, returns.mean() * frequency, cov * frequency, risk_free_rate=risk_free_rate
+    )
+    return weights, performance
+
+
+def run_method(
+    method: OptimizationMethod,
+    mu: pd.Series,
+    S: pd.DataFrame,
+    returns: pd.DataFrame,
+    risk_free_rate: float = 0.0,
+    constraints: Optional[ConstraintSet] = None,
+) -> Tuple[OptimizationResult, float]:
+    """Run one optimization method; return the result and the seconds it took.
+
+    With ``constraints``, max Sharpe and CVaR solve the constrained problem
+    directly; HRP and CLA (which cannot express sector or turnover limits)
+    are projected onto the constraint set afterwards, CLA keeping its
+    native weight bounds.
+    """
+    start = time.perf_counter()
+    cs = constraints
+    bounds = list(zip(cs.lower, cs.upper)) if cs is not None else (0, 1)
+    if method == OptimizationMethod.HRP:
+        weights, (ret, vol, sharpe) = hrp(returns, risk_free_rate)
+        if cs is not None:
+            weights = clean(project(pd.Series(weights), cs))
+            ret, vol, sharpe = portfolio_performance(weights, mu, S, risk_free_rate=risk_free_rate)
+    elif method == OptimizationMethod.CVAR:
+        e_cvar = EfficientCVaR(mu, returns=returns, beta=0.95, weight_bounds=bounds)
+        if cs is not None:
+            if len(cs.sector_caps):
+                e_cvar.add_constraint(lambda w: cs.sectors @ w <= cs.sector_caps)
+            if cs.has_turnover:
+                e_cvar.add_constraint(lambda w: cp.norm1(w - cs.current) <= cs.max_turnover)
+        e_cvar.add_objective(objective_functions.L2_reg, gamma=0.1)
+        e_cvar.min_cvar()
+        weights = e_cvar.clean_weights()
+        ret, vol = e_cvar.portfolio_performance(verbose=False)
+        sharpe = 0
+    elif method == OptimizationMethod.CLA:
+        # Critical Line Algorithm for the entire efficient frontier
+        cla = CLA(mu, S, weight_bounds=bounds)
+        # Get optimal weights for maximum Sharpe Ratio point
+        weights = cla.max_sharpe()
+        if cs is not None and not cs.only_bounds:
+            weights = clean(project(pd.Series(weights), cs))
+            ret, vol, sharpe = portfolio_performance(weights, mu, S, risk_free_rate=risk_free_rate)
+        else:
+            ret, vol, sharpe = cla.portfolio_performance(risk_free_rate=risk_free_rate)
+    elif cs is not None:
+        weights = clean(max_sharpe(mu, S, cs, risk_free_rate))
+        ret, vol, sharpe = portfolio_performance(weights, mu, S, risk_free_rate=risk_free_rate)
+    else:  # Efficient Frontier max Sharpe
+        ef = EfficientFrontier(mu, S)
+        ef.max_sharpe(risk_free_rate=risk_free_rate)
+        weights = ef.clean_weights()
+        ret, vol, sharpe = ef.portfolio_performance(risk_free_rate=risk_free_rate)
+
+    result = OptimizationResult(
+        method=method,
+        weights={k: float(v) for k, v in weights.items() if v > 0},
+        expected_return=float(ret),
+        volatility=float(vol),
+        sharpe_ratio=float(sharpe),
+    )
+    return result, time.perf_counter() - start
+
+
+def _frontier(mu: pd.Series, S: pd.DataFrame, cs: Optional[ConstraintSet]) -> EfficientFrontier:
+    if cs is None:
+        return EfficientFrontier(mu, S)
+    ef = EfficientFrontier(mu, S, weight_bounds=list(zip(cs.lower, cs.upper)))
+    if len(cs.sector_caps):
+        ef.add_constraint(lambda w: cs.sectors @ w <= cs.sector_caps)
+    if cs.has_turnover:
+        ef.add_constraint(lambda w: cp.norm1(w - cs.current) <= cs.max_turnover)
+    return ef
+
+
+def frontier_targets(
+    mu: pd.Series, S: pd.DataFrame, points: int, constraints: Optional[ConstraintSet] = None
+) -> List[float]:
+    """``points`` target returns from the minimum-volatility portfolio up to the best reachable one."""
+    ef = _frontier(mu, S, constraints)
+    ef.min_volatility()
+    low = float(ef.portfolio_performance()[0])
+    best_return = float(_frontier(mu, S, constraints)._max_return())
+    # efficient_return rejects a target at (or numerically above) the largest reachable return
+    high = low + (best_return - low) * (1 - 1e-4)
+    return [float(t) for t in np.linspace(low, max(low, high), points)]
+
+
+def frontier_point(
+    mu: pd.Series,
+    S: pd.DataFrame,
+    target_return: float,
+    risk_free_rate: float = 0.0,
+    constraints: Optional[ConstraintSet] = None,
+) -> Optional[FrontierPoint]:
+    """Minimum-volatility portfolio for ``target_return`` (None if infeasible)."""
+    ef = _frontier(mu, S, constraints)
+    try:
+        ef.efficient_return(target_return)
+    except Exception:
+        return None
+    ret, vol, sharpe = ef.portfolio_performance(risk_free_rate=risk_free_rate)
+    return FrontierPoint(
+        expected_return=float(ret),
+        volatility=float(vol),
+        sharpe_ratio=float(sharpe),
+        weights={k: float(v) for k, v in ef.clean_weights().items() if v > 0},
+    )
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Shared worker pool; spawned rather than forked since the API process runs threads."""
+    global _pool
+    with _pool_lock:
+        # A worker that died (e.g. OOM-killed) leaves the executor unusable; start a new one
+        if _pool is None or getattr(_pool, "_broken", False):
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.optimization_workers or None,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
@@ -0,0 +1,93 @@
+"""Keyset cursors, field projection and JSON encoding for the portfolio list endpoints.
+
+A cursor is the sort key of the last row returned, so the next page is a
+range scan on the composite index from that key instead of an OFFSET that
+re-reads every skipped row.
+"""
+import base64
+import binascii
+from datetime import date
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence, Type
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(list(values))).decode().rstrip("=")
+
+
+def _cursor_value(value: Any, kind: type) -> Any:
+    # JSON has no dates: they travel as ISO strings
+    if kind is date:
+        if isinstance(value, str):
+            try:
+                return date.fromisoformat(value)
+            except ValueError:
+                pass
+    elif isinstance(value, kind) and not isinstance(value, bool):
+        return value
+    raise ValueError("Invalid cursor")
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> list:
+    """Sort key of a cursor as ``types``; raises ValueError for anything ``encode_cursor`` did not produce."""
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, orjson.JSONDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Invalid cursor")
+    return [_cursor_value(value, kind) for value, kind in zip(values, types)]
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> List[str]:
+    """Requested fields from a comma-separated list, in ``allowed`` order (all when empty)."""
+    if not fields:
+        return list(allowed)
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}; choose from {', '.join(allowed)}")
+    return [f for f in allowed if f in requested]
+
+
+def _default(value: Any) -> Any:
+    # Same as pydantic's JSON output for Decimal fields
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError
+
+
+def page_response(rows: List[dict], next_cursor: Optional[str]) -> Response:
+    """JSON array of ``rows`` with the next page's cursor in a header (absent on the last page)."""
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return Response(content=orjson.dumps(rows, default=_default), media_type="application/json", headers=headers)
+
+
+def page_responses(model: Type[BaseModel]) -> dict:
+    """OpenAPI ``responses`` of a list endpoint answered by ``page_response``.
+
+    Rows carry only the requested ``fields``, so none of ``model``'s fields
+    is required, and the next page's cursor is documented as a header.
+    """
+    row = model.model_json_schema(mode="serialization")
+    row.pop("required", None)
+    row["title"] = f"{model.__name__}Fields"
+    return {
+        200: {
+            "description": f"{model.__name__} rows with the requested `fields` only (all of them by default)",
+            "content": {"application/json": {"schema": {"type": "array", "items": row}}},
+            "headers": {
+                NEXT_CURSOR_HEADER: {
+                    "description": "Cursor of the next page; absent on the last page or without `limit`",
+                    "schema": {"type": "string"},
+                },
+            },
+        },
+    }
@@ -0,0 +1,134 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from fastapi_cache.coder import PickleCoder
+from sqlalchemy.orm import Session
+
+from app.cache import cache, portfolio_analytics_key_builder
+from app.db.models.portfolio import Position
+from app.schemas.portfolio import PortfolioAnalytics
+from .price_history import load_closes, load_sector_index
+from .risk_model import TRADING_DAYS
+
+
+@dataclass(frozen=True, order=True)
+class Holding:
+    ticker: str
+    quantity: float
+    purchase_date: date
+    purchase_price: float
+
+
+def holdings_snapshot(db: Session) -> List[Holding]:
+    """Current positions in a stable order; equal snapshots share cached analytics."""
+    rows = db.query(Position.ticker, Position.quantity, Position.purchase_date, Position.purchase_price).all()
+    return sorted(
+        Holding(ticker.strip().upper(), float(quantity), purchase_date, float(purchase_price))
+        for ticker, quantity, purchase_date, purchase_price in rows
+    )
+
+
+def compute_analytics(
+    holdings: Sequence[Holding],
+    closes: pd.DataFrame,
+    benchmark: Optional[pd.Series] = None,
+    benchmark_name: Optional[str] = None,
+    window_start: Optional[date] = None,
+) -> PortfolioAnalytics:
+    """Equity curve, time-weighted return, drawdown, volatility and beta of the holdings.
+
+    Each holding counts from the first trading day on or after its purchase
+    date. Buying is a cash flow, so daily returns are time-weighted:
+    ``(value_t - bought_t) / value_{t-1} - 1``. A holding bought before
+    ``window_start`` enters at its first close in the window, so gains made
+    before the window are not counted. A holding without a close yet is
+    valued at its purchase price.
+    """
+    dates = closes.index.to_numpy().astype("datetime64[D]")
+    n = len(dates)
+    value, invested, bought = np.zeros(n), np.zeros(n), np.zeros(n)
+    for h in holdings:
+        first = int(np.searchsorted(dates, np.datetime64(h.purchase_date, "D")))
+        if first >= n:
+            continue
+        price = closes[h.ticker].to_numpy()[first:]
+        price = np.where(np.isnan(price), h.purchase_price, price)
+        value[first:] += h.quantity * price
+        invested[first:] += h.quantity * h.purchase_price
+        before_window = window_start is not None and h.purchase_date < window_start
+        bought[first] += h.quantity * (price[0] if before_window else h.purchase_price)
+
+    held = np.flatnonzero(invested > 0)
+    start = int(held[0]) if len(held) else n
+    value, invested, bought, dates = value[start:], invested[start:], bought[start:], dates[start:]
+
+    returns = np.zeros(len(value))
+    if len(value):
+        returns[0] = value[0] / bought[0] - 1
+        previous = value[:-1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns[1:] = np.where(previous > 0, (value[1:] - bought[1:]) / previous - 1, 0.0)
+    growth = np.cumprod(1 + returns)
+    drawdown = growth / np.maximum.accumulate(growth) - 1 if len(growth) else growth
+
+    beta = None
+    if benchmark is not None and len(dates) > 2:
+        bench = benchmark.reindex(pd.DatetimeIndex(dates)).ffill().to_numpy()
+        bench_returns = bench[1:] / bench[:-1] - 1
+        ok = ~np.isnan(bench_returns)
+        if ok.sum() > 1 and np.var(bench_returns[ok], ddof=1) > 0:
+            beta = float(np.cov(returns[1:][ok], bench_returns[ok])[0, 1] / np.var(bench_returns[ok], ddof=1))
+
+    return PortfolioAnalytics(
+        dates=[pd.Timestamp(d).date() for d in dates],
+        equity=value.tolist(),
+        invested=invested.tolist(),
+        cumulative_return=(growth - 1).tolist(),
+        drawdown=drawdown.tolist(),
+        total_return=float(growth[-1] - 1) if len(growth) else 0.0,
+        annualized_volatility=float(returns[1:].std(ddof=1) * np.sqrt(TRADING_DAYS)) if len(returns) > 2 else 0.0,
+        max_drawdown=float(-drawdown.min()) if len(drawdown) else 0.0,
+        beta=beta,
+        benchmark=benchmark_name,
+        missing=sorted({h.ticker for h in holdings} - set(closes.columns[closes.notna().any()])),
+    )
+
+
+@cache(
+    namespace="portfolio_analytics",
+    expire=300,
+    coder=PickleCoder,
+    key_builder=portfolio_analytics_key_builder,
+    depends_on=("stocks", "sector"),
+)
+async def _cached_analytics(
+    holdings: List[Holding],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    benchmark_level: int,
+    benchmark_id: Optional[int],
+) -> PortfolioAnalytics:
+    start = start_date or min(h.purchase_date for h in holdings)
+    closes = load_closes([h.ticker for h in holdings], start, end_date)
+    benchmark, name = None, None
+    if benchmark_id is not None:
+        benchmark = load_sector_index(benchmark_level, benchmark_id, start, end_date)
+        name = f"sector:{benchmark_level}:{benchmark_id}"
+    return compute_analytics(holdings, closes, benchmark, name, window_start=start_date)
+
+
+async def get_portfolio_analytics(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    benchmark_level: int = 3,
+    benchmark_id: Optional[int] = None,
+) -> PortfolioAnalytics:
+    """Analytics for the current holdings, cached per holdings snapshot and data version."""
+    holdings = holdings_snapshot(db)
+    if not holdings:
+        raise ValueError("No positions to analyze")
+    return await _cached_analytics(holdings, start_date, end_date, benchmark_level, benchmark_id)
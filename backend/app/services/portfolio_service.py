@@ -1,48 +1,124 @@
+import asyncio
+import time
 from datetime import date
 from decimal import Decimal
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import select, text, tuple_
 
+from app.db.models.market import StockSymbol
 from app.db.models.portfolio import Position, Transaction, InvestmentAmount
 from app.schemas.portfolio import (
+    Position as PositionSchema,
     PositionCreate,
+    Transaction as TransactionSchema,
     TransactionCreate,
     InvestmentAmountCreate,
     PortfolioSummary,
+    OptimizationConstraints,
     OptimizationRequest,
     OptimizationResult,
-    OptimizationMethod,
+    BatchOptimizationRequest,
+    BatchOptimizationResult,
     ClosePositionRequest,
     ClosePositionResponse,
 )
-from app.services.stock_service import get_current_price
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-from pypfopt import EfficientFrontier, HRPOpt, risk_models, expected_returns, objective_functions, CLA, EfficientCVaR
+from loguru import logger
+
+from app.services.constrained import ConstraintSet
+from app.services.ledger import ledger
+from app.services.optimizers import frontier_point, frontier_targets, get_pool, run_method
+from app.services.pagination import decode_cursor, encode_cursor, parse_fields
+from app.services.price_history import load_closes
+from app.services.risk_model import risk_model_cache
+from app.services.valuation import latest_snapshot, revalue_from
+
+POSITION_FIELDS = list(PositionSchema.model_fields)
+TRANSACTION_FIELDS = list(TransactionSchema.model_fields)
 
-from app.services.stock_service import _load_delta_stocks
 
 def create_position(db: Session, position: PositionCreate) -> Position:
     db_position = Position(**position.model_dump())
     db.add(db_position)
     db.commit()
     db.refresh(db_position)
+    revalue_from(db, db_position.purchase_date)
     return db_position
 
 
-async def get_positions(db: Session) -> List[Position]:
-    positions = db.query(Position).order_by(Position.ticker).all()
-    
-    # Get current prices for all positions
+def _with_current_prices(positions: List[Position], snapshot: dict) -> List[Position]:
+    # Latest valued close per ticker; positions not valued yet show their purchase price
     for position in positions:
-        current_price = await get_current_price(position.ticker)
-        position.current_price = current_price if current_price is not None else position.purchase_price
-    
+        row = snapshot.get(position.ticker.strip().upper())
+        close = row.close if row is not None else None
+        position.current_price = close if close is not None else position.purchase_price
     return positions
 
 
+def _page(
+    db: Session,
+    table,
+    key: tuple,
+    descending: bool,
+    filters: list,
+    columns: List[str],
+    limit: Optional[int],
+    cursor: Optional[str],
+) -> Tuple[List[dict], Optional[str]]:
+    """One keyset page of ``table`` ordered by ``key`` (a unique column tuple ending in id)."""
+    if cursor is not None:
+        after = decode_cursor(cursor, [c.type.python_type for c in key])
+        filters = filters + [tuple_(*key) < tuple(after) if descending else tuple_(*key) > tuple(after)]
+    needed = list(dict.fromkeys([*(c.name for c in key), *(c for c in columns if c in table.c)]))
+    query = (
+        select(*(table.c[name] for name in needed))
+        .where(*filters)
+        .order_by(*(c.desc() if descending else c for c in key))
+    )
+    if limit is not None:
+        query = query.limit(limit + 1)
+    rows = [row._asdict() for row in db.execute(query)]
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][c.name] for c in key])
+    return rows, next_cursor
+
+
+def list_positions(
+    db: Session,
+    ticker: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    fields: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """Positions by (ticker, id), filtered by ticker and purchase date, with the requested fields."""
+    columns = parse_fields(fields, POSITION_FIELDS)
+    table = Position.__table__
+    filters = []
+    if ticker:
+        filters.append(table.c.ticker == ticker.strip().upper())
+    if start_date is not None:
+        filters.append(table.c.purchase_date >= start_date)
+    if end_date is not None:
+        filters.append(table.c.purchase_date <= end_date)
+    # current_price falls back to the purchase price
+    needed = columns + ["purchase_price"] if "current_price" in columns else columns
+    rows, next_cursor = _page(db, table, (table.c.ticker, table.c.id), False, filters, needed, limit, cursor)
+    if "current_price" in columns:
+        # Latest valued close per ticker; positions not valued yet show their purchase price
+        snapshot = latest_snapshot(db)
+        for row in rows:
+            valued = snapshot.get(row["ticker"].strip().upper())
+            close = valued.close if valued is not None else None
+            row["current_price"] = close if close is not None else row["purchase_price"]
+    return [{c: row[c] for c in columns} for row in rows], next_cursor
+
+
 def get_position(db: Session, position_id: int) -> Optional[Position]:
     return db.query(Position).filter(Position.id == position_id).first()
 
@@ -54,11 +130,13 @@ def update_position(
     if not db_position:
         return None
 
+    since = min(db_position.purchase_date, position.purchase_date)
     for key, value in position.model_dump().items():
         setattr(db_position, key, value)
 
     db.commit()
     db.refresh(db_position)
+    revalue_from(db, since)
     return db_position
 
 
@@ -69,6 +147,8 @@ def delete_position(db: Session, position_id: int) -> bool:
 
     db.delete(db_position)
     db.commit()
+    # Gone from today on; the days it was held keep their valuation
+    revalue_from(db, date.today())
     return True
 
 
@@ -116,12 +196,13 @@ def close_position(db: Session, request: ClosePositionRequest) -> ClosePositionR
         notes=request.notes or f"Position closure - Realized P/L: {realized_pl}"
     )
     
-    db_transaction = create_transaction(db, transaction_data)
+    db_transaction = _add_transaction(db, transaction_data)
     
     # Update or delete position
     remaining_quantity = db_position.quantity - request.quantity_to_close
     position_updated = True
     
+    ticker = db_position.ticker
     if remaining_quantity == 0:
         # Delete position completely
         db.delete(db_position)
@@ -132,10 +213,12 @@ def close_position(db: Session, request: ClosePositionRequest) -> ClosePositionR
         db_position.quantity = remaining_quantity
     
     db.commit()
+    # The remaining quantity applies from the closing date on; earlier days keep the full position
+    revalue_from(db, request.closing_date)
     
     return ClosePositionResponse(
         success=True,
-        message=f"Successfully closed {request.quantity_to_close} shares of {db_position.ticker}",
+        message=f"Successfully closed {request.quantity_to_close} shares of {ticker}",
         position_updated=position_updated,
         remaining_quantity=remaining_quantity,
         transaction_id=db_transaction.id,
@@ -144,7 +227,7 @@ def close_position(db: Session, request: ClosePositionRequest) -> ClosePositionR
     )
 
 
-def create_transaction(db: Session, transaction: TransactionCreate) -> Transaction:
+def _add_transaction(db: Session, transaction: TransactionCreate) -> Transaction:
     db_transaction = Transaction(**transaction.model_dump())
     db.add(db_transaction)
     db.commit()
@@ -152,12 +235,38 @@ def create_transaction(db: Session, transaction: TransactionCreate) -> Transacti
     return db_transaction
 
 
-def get_transactions(db: Session) -> List[Transaction]:
-    return (
-        db.query(Transaction)
-        .order_by(Transaction.transaction_date.desc())
-        .all()
+def create_transaction(db: Session, transaction: TransactionCreate) -> Transaction:
+    db_transaction = _add_transaction(db, transaction)
+    revalue_from(db, db_transaction.transaction_date)
+    return db_transaction
+
+
+def list_transactions(
+    db: Session,
+    ticker: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    transaction_type: Optional[str] = None,
+    fields: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """Transactions newest first by (transaction_date, id), filtered, with the requested fields."""
+    columns = parse_fields(fields, TRANSACTION_FIELDS)
+    table = Transaction.__table__
+    filters = []
+    if ticker:
+        filters.append(table.c.ticker == ticker.strip().upper())
+    if start_date is not None:
+        filters.append(table.c.transaction_date >= start_date)
+    if end_date is not None:
+        filters.append(table.c.transaction_date <= end_date)
+    if transaction_type is not None:
+        filters.append(table.c.transaction_type == transaction_type)
+    rows, next_cursor = _page(
+        db, table, (table.c.transaction_date, table.c.id), True, filters, columns, limit, cursor
     )
+    return [{c: row[c] for c in columns} for row in rows], next_cursor
 
 
 def get_transaction(db: Session, transaction_id: int) -> Optional[Transaction]:
@@ -169,8 +278,11 @@ def delete_transaction(db: Session, transaction_id: int) -> bool:
     if not db_transaction:
         return False
 
+    ticker, since = db_transaction.ticker, db_transaction.transaction_date
     db.delete(db_transaction)
     db.commit()
+    ledger.invalidate(ticker)
+    revalue_from(db, since)
     return True
 
 
@@ -205,17 +317,12 @@ def get_investment_amount(db: Session) -> Optional[InvestmentAmount]:
 
 
 async def get_portfolio_summary(db: Session) -> PortfolioSummary:
-    positions = await get_positions(db)
-    
-    total_value = Decimal(0)
-    total_invested = Decimal(0)
-    
-    for pos in positions:
-        pos_value = Decimal(str(pos.current_price)) * pos.quantity
-        invested = pos.purchase_price * pos.quantity
-        
-        total_value += pos_value
-        total_invested += invested
+    """Totals of the latest valuation snapshot; nothing is priced on the request path."""
+    snapshot = latest_snapshot(db)
+    positions = _with_current_prices(db.query(Position).order_by(Position.ticker).all(), snapshot)
+
+    total_value = sum((row.value for row in snapshot.values()), Decimal(0))
+    total_invested = sum((row.invested for row in snapshot.values()), Decimal(0))
     
     total_profit_loss = total_value - total_invested
     total_profit_loss_pct = (
@@ -234,80 +341,118 @@ async def get_portfolio_summary(db: Session) -> PortfolioSummary:
 
 
 def _load_price_history(db: Session, tickers: list[str], start: date, end: date) -> pd.DataFrame:
-    """Load historical prices for given tickers from transactions table fallback.
+    """Aligned date x ticker closes for ``tickers`` from the stocks Delta table."""
+    return load_closes(tickers, start, end)
 
-    This is a basic implementation placeholder. In a real setup, you'd source
-    OHLCV from your Delta Lake or an external provider. Here we compute daily
-    price using latest known close_price or purchase price as proxy.
+
+def _constraint_set(
+    db: Optional[Session], constraints: Optional[OptimizationConstraints], last_prices: pd.Series
+) -> Optional[ConstraintSet]:
+    """Resolve request constraints against the optimizer's asset order.
+
+    Sector caps use ``StockSymbol.id_sector_level_3``. The turnover limit is
+    measured against current positions valued at the last close, normalized
+    over the optimized tickers; it is skipped when none of them are held.
     """
-    # Fallback: use latest prices from positions if available
-    from app.db.models.portfolio import Position
-    rows = (
-        db.query(Position)
-        .filter(Position.ticker.in_(tickers))
-        .all()
+    if constraints is None:
+        return None
+    symbols = list(last_prices.index)
+    n = len(symbols)
+    sectors, caps = np.zeros((0, n)), np.zeros(0)
+    if constraints.sector_max_weight is not None or constraints.sector_caps:
+        if db is None:
+            raise ValueError("Sector caps need a database session")
+        rows = db.query(StockSymbol.symbol, StockSymbol.id_sector_level_3).filter(StockSymbol.symbol.in_(symbols)).all()
+        sector_of = {symbol: sector for symbol, sector in rows if sector is not None}
+        rows_by_sector = {}
+        for sector_id in sorted(set(sector_of.values())):
+            cap = constraints.sector_caps.get(sector_id, constraints.sector_max_weight)
+            if cap is not None:
+                rows_by_sector[sector_id] = ([float(sector_of.get(s) == sector_id) for s in symbols], cap)
+        if rows_by_sector:
+            sectors = np.array([row for row, _ in rows_by_sector.values()])
+            caps = np.array([cap for _, cap in rows_by_sector.values()])
+
+    current = None
+    if constraints.max_turnover is not None:
+        if db is None:
+            raise ValueError("A turnover limit needs a database session")
+        held = pd.Series(0.0, index=symbols)
+        for ticker, quantity in db.query(Position.ticker, Position.quantity).filter(Position.ticker.in_(symbols)):
+            held[ticker] += float(quantity)
+        value = held * last_prices
+        if value.sum() > 0:
+            current = (value / value.sum()).to_numpy()
+        else:
+            logger.info("No current positions among the optimized tickers, turnover limit not applied")
+
+    return ConstraintSet(
+        lower=np.full(n, constraints.min_weight),
+        upper=np.full(n, constraints.max_weight),
+        sectors=sectors,
+        sector_caps=caps,
+        current=current,
+        max_turnover=constraints.max_turnover if current is not None else None,
     )
-    # Build a dummy price matrix with constant prices over date range
-    dates = pd.date_range(start=start, end=end, freq="B")
-    data = {}
-    for row in rows:
-        price = float(row.current_price or row.purchase_price)
-        data[row.ticker] = np.full(len(dates), price)
-    df = pd.DataFrame(data, index=dates)
-    df.index.name = "date"
-    return df
 
 
 def optimize_portfolio(db: Session, req: OptimizationRequest) -> OptimizationResult:
-    ## default start date is 5 year ago
-    if req.start_date is None:
-        req.start_date = datetime.now() - timedelta(days=365 * 5)
-
-    df = _load_delta_stocks(symbols=req.tickers, start=req.start_date, end=req.end_date)
-    ## Pick date, close, symbol column
-    df = df[['date', 'close', 'symbol']]
-    ## Transform to a matrix of price
-    prices = df.pivot(index='date', columns='symbol', values='close')
-    ## Backfill missing values
-    prices = prices.bfill().ffill()
-    
-    ## Calculate the expected returns
-    mu = expected_returns.mean_historical_return(prices, frequency=252)
-    ## Calculate the covariance matrix
-    S = risk_models.sample_cov(prices)
-    
+    # Returns, mu and covariance are shared by every method and risk-free rate;
+    # without a start date the window is the last five years
+    model = risk_model_cache.get(req.tickers, start=req.start_date, end=req.end_date)
+    constraints = _constraint_set(db, req.constraints, model.prices.iloc[-1])
+    result, _ = run_method(
+        req.method, model.mu, model.cov(req.covariance.value), model.returns, req.risk_free_rate or 0.0, constraints
+    )
+    return result.model_copy(update={"missing": model.dropped})
 
-    if req.method == OptimizationMethod.HRP:
-        returns = prices.pct_change().dropna()
-        hrp = HRPOpt(returns)
-        weights = hrp.optimize()
-        perf = hrp.portfolio_performance(risk_free_rate=req.risk_free_rate or 0.0)
-        ret, vol, sharpe = perf
-    elif req.method == OptimizationMethod.CVAR:
-        returns = prices.pct_change().dropna()
-        e_cvar = EfficientCVaR(mu, returns=returns, beta=0.95, weight_bounds=(0, 1))
-        e_cvar.add_objective(objective_functions.L2_reg, gamma=0.1)
-
-        w_min_cvar = e_cvar.min_cvar()
-        weights = e_cvar.clean_weights()
-        ret, vol = e_cvar.portfolio_performance(verbose=False)
-        sharpe = 0
-    elif req.method == OptimizationMethod.CLA:
-        # Critical Line Algorithm for the entire efficient frontier
-        cla = CLA(mu, S)
-        # Get optimal weights for maximum Sharpe Ratio point
-        weights = cla.max_sharpe()
-        ret, vol, sharpe = cla.portfolio_performance(risk_free_rate=req.risk_free_rate or 0.0)
-    else:  # Efficient Frontier max Sharpe
-        ef = EfficientFrontier(mu, S)
-        ef.max_sharpe(risk_free_rate=req.risk_free_rate or 0.0)
-        weights = ef.clean_weights()
-        ret, vol, sharpe = ef.portfolio_performance(risk_free_rate=req.risk_free_rate or 0.0)
-
-    return OptimizationResult(
-        method=req.method,
-        weights={k: float(v) for k, v in weights.items() if v > 0},
-        expected_return=float(ret),
-        volatility=float(vol),
-        sharpe_ratio=float(sharpe),
+
+async def optimize_portfolio_batch(db: Optional[Session], req: BatchOptimizationRequest) -> BatchOptimizationResult:
+    """Run several methods and a sampled efficient frontier in worker processes.
+
+    The risk model is computed (or taken from the cache) once and shipped to
+    every task; a method that fails is reported in ``errors`` without
+    failing the others. Tickers the risk model left out are listed in
+    ``missing``.
+    """
+    total_start = time.perf_counter()
+    timing = {}
+    model = await asyncio.to_thread(risk_model_cache.get, req.tickers, req.start_date, req.end_date)
+    mu, S, returns = model.mu, model.cov(req.covariance.value), model.returns
+    risk_free_rate = req.risk_free_rate or 0.0
+    constraints = _constraint_set(db, req.constraints, model.prices.iloc[-1])
+    timing["risk_model"] = time.perf_counter() - total_start
+
+    loop = asyncio.get_running_loop()
+    pool = get_pool()
+    methods = list(dict.fromkeys(req.methods))
+    method_futures = [
+        loop.run_in_executor(pool, run_method, method, mu, S, returns, risk_free_rate, constraints)
+        for method in methods
+    ]
+
+    frontier = []
+    if req.frontier_points:
+        frontier_start = time.perf_counter()
+        targets = await loop.run_in_executor(pool, frontier_targets, mu, S, req.frontier_points, constraints)
+        points = await asyncio.gather(*(
+            loop.run_in_executor(pool, frontier_point, mu, S, target, risk_free_rate, constraints)
+            for target in targets
+        ))
+        frontier = [p for p in points if p is not None]
+        timing["frontier"] = time.perf_counter() - frontier_start
+
+    results, errors = [], {}
+    for method, outcome in zip(methods, await asyncio.gather(*method_futures, return_exceptions=True)):
+        if isinstance(outcome, Exception):
+            logger.warning(f"Optimization method {method.value} failed: {outcome}")
+            errors[method.value] = str(outcome)
+            continue
+        result, seconds = outcome
+        results.append(result.model_copy(update={"missing": model.dropped}))
+        timing[method.value] = seconds
+
+    timing["total"] = time.perf_counter() - total_start
+    return BatchOptimizationResult(
+        results=results, errors=errors, frontier=frontier, timing=timing, missing=model.dropped
     )
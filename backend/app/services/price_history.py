@@ -0,0 +1,47 @@
+from datetime import date, datetime
+from typing import List, Optional
+
+import pandas as pd
+from deltalake import DeltaTable
+
+from app.core.metrics import track_delta_scan
+from app.core.settings import settings
+from .stock_service import _load_price_panel
+
+SECTOR_INDEX_COLUMNS = ["date", "close"]
+
+
+def _as_datetime(value: Optional[date]) -> Optional[datetime]:
+    return pd.Timestamp(value).to_pydatetime() if value is not None else None
+
+
+def load_closes(tickers: List[str], start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
+    """Daily closes for ``tickers`` from the stocks Delta table, one column per ticker.
+
+    Dates are the union of the tickers' trading days. Gaps are forward-filled;
+    days before a ticker's first bar (and tickers without data) stay NaN.
+    """
+    symbols = sorted({t.strip().upper() for t in tickers})
+    panel = _load_price_panel(symbols=symbols, start=_as_datetime(start), end=_as_datetime(end), fields=["close"])
+    closes = pd.DataFrame(
+        panel.fields["close"], index=pd.DatetimeIndex(panel.dates, name="date"), columns=panel.symbols
+    ).ffill()
+    return closes.reindex(columns=symbols)
+
+
+def load_sector_index(
+    sector_level: int, sector_id: int, start: Optional[date] = None, end: Optional[date] = None
+) -> pd.Series:
+    """Close series of one sector index from the sector Delta table."""
+    filters = [("sector_type", "==", int(sector_level)), ("sector_id", "==", int(sector_id))]
+    if start is not None:
+        filters.append(("date", ">=", _as_datetime(start)))
+    if end is not None:
+        filters.append(("date", "<=", _as_datetime(end)))
+    with track_delta_scan(settings.sector_delta_table) as scan:
+        dt = DeltaTable(settings.sector_delta_table, storage_options=settings.delta_storage_options)
+        table = dt.to_pyarrow_table(columns=SECTOR_INDEX_COLUMNS, filters=filters)
+        scan.record(table)
+    df = table.to_pandas()
+    series = pd.Series(df["close"].to_numpy(dtype=float), index=pd.DatetimeIndex(pd.to_datetime(df["date"]), name="date"))
+    return series.sort_index()
@@ -2,10 +2,13 @@ from typing import List
 from app.schemas.report import Report
 from app.stores.raw_wichart_report import WichartReportStore
 
+# Report fields returned by the API
+REPORT_COLUMNS = ['id', 'mack', 'tenbaocao', 'url', 'nguon', 'ngaykn', 'rsnganh']
+
 async def get_reports(symbol: str | None = None) -> List[Report]:
     """Get reports from the store, optionally filtered by symbol."""
     store = WichartReportStore()
-    df = store.get_data(mack=symbol)
+    df = store.get_data(mack=symbol, columns=REPORT_COLUMNS)
     if df is None or df.empty:
         return []
     
@@ -0,0 +1,243 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from pypfopt import risk_models
+
+from app.cache.versioning import version_poller
+from app.core.settings import settings
+from .stock_service import _load_delta_stocks
+
+# Only closes are needed to build the price matrix
+PRICE_COLUMNS = ["date", "symbol", "close"]
+TRADING_DAYS = 252
+DEFAULT_LOOKBACK_DAYS = 365 * 5
+SHRINKAGE_METHODS = ("ledoit_wolf", "oracle_approximating")
+# Running sums drift after many add/subtract rounds; recompute them exactly now and then
+REBUILD_EVERY = 50
+
+
+@dataclass
+class RiskModel:
+    """Close prices, daily returns and running moment sums for one symbol set and window.
+
+    ``mu`` and ``cov()`` equal pypfopt's ``mean_historical_return`` and
+    ``sample_cov`` on ``prices`` but are derived from sums over the returns
+    (of ``log1p(r)``, ``r`` and ``r rᵀ``), so appending new bars or dropping
+    old ones only touches those rows. Shrinkage estimates are computed on
+    first use and kept with the model.
+
+    Returns before a symbol's first price are NaN in ``returns`` and count
+    as zero in the sums, so ``subset`` to the symbols priced over the whole
+    window gives their exact estimates.
+    """
+    prices: pd.DataFrame
+    returns: pd.DataFrame
+    frequency: int
+    sum_log: np.ndarray
+    sum_r: np.ndarray
+    sum_rr: np.ndarray
+    version: Optional[int] = None
+    built_at: float = field(default_factory=time.monotonic)
+    updates: int = 0
+    # Requested symbols left out of the model: no prices at the start of the window
+    dropped: List[str] = field(default_factory=list)
+    _shrunk: Dict[str, pd.DataFrame] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_prices(cls, prices: pd.DataFrame, frequency: int = TRADING_DAYS, version: Optional[int] = None) -> "RiskModel":
+        returns = prices.pct_change().iloc[1:]
+        values = np.nan_to_num(returns.to_numpy())
+        return cls(
+            prices=prices,
+            returns=returns,
+            frequency=frequency,
+            sum_log=np.log1p(values).sum(axis=0),
+            sum_r=values.sum(axis=0),
+            sum_rr=values.T @ values,
+            version=version,
+        )
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self.prices.columns)
+
+    @property
+    def complete(self) -> np.ndarray:
+        """Mask of the symbols priced on every day of the window."""
+        return self.prices.notna().all().to_numpy()
+
+    def subset(self, mask: np.ndarray) -> "RiskModel":
+        """Model of the symbols selected by ``mask``, sharing the running sums."""
+        return RiskModel(
+            prices=self.prices.loc[:, mask],
+            returns=self.returns.loc[:, mask],
+            frequency=self.frequency,
+            sum_log=self.sum_log[mask],
+            sum_r=self.sum_r[mask],
+            sum_rr=self.sum_rr[np.ix_(mask, mask)],
+            version=self.version,
+            built_at=self.built_at,
+            updates=self.updates,
+            dropped=self.dropped,
+        )
+
+    @property
+    def mu(self) -> pd.Series:
+        """Annualized compounded mean return per symbol."""
+        return pd.Series(np.expm1(self.sum_log * self.frequency / len(self.returns)), index=self.prices.columns)
+
+    def cov(self, method: str = "sample") -> pd.DataFrame:
+        """Annualized covariance: ``sample`` or one of ``SHRINKAGE_METHODS``."""
+        if method == "sample":
+            n = len(self.returns)
+            values = (self.sum_rr - np.outer(self.sum_r, self.sum_r) / n) / (n - 1) * self.frequency
+            return pd.DataFrame(values, index=self.prices.columns, columns=self.prices.columns)
+        if method not in SHRINKAGE_METHODS:
+            raise ValueError(f"Unknown covariance method {method!r}")
+        if method not in self._shrunk:
+            shrinkage = risk_models.CovarianceShrinkage(self.prices, frequency=self.frequency)
+            self._shrunk[method] = getattr(shrinkage, method)()
+        return self._shrunk[method]
+
+    def extended(self, new_prices: pd.DataFrame, start: Optional[pd.Timestamp] = None,
+                 version: Optional[int] = None) -> "RiskModel":
+        """Append bars dated after the last one and drop bars before ``start``."""
+        new_prices = new_prices.reindex(columns=self.prices.columns)
+        new_prices = new_prices[new_prices.index > self.prices.index[-1]]
+        prices = pd.concat([self.prices, new_prices]).ffill() if len(new_prices) else self.prices
+        added = prices.iloc[len(self.prices) - 1:].pct_change().iloc[1:]
+        returns = pd.concat([self.returns, added]) if len(added) else self.returns
+        values = np.nan_to_num(added.to_numpy())
+        sum_log = self.sum_log + np.log1p(values).sum(axis=0)
+        sum_r = self.sum_r + values.sum(axis=0)
+        sum_rr = self.sum_rr + values.T @ values
+
+        drop = int(np.searchsorted(prices.index, start)) if start is not None else 0
+        if drop:
+            # returns[i] is dated prices.index[i + 1], so the first ``drop`` returns go too
+            removed = np.nan_to_num(returns.iloc[:drop].to_numpy())
+            prices, returns = prices.iloc[drop:], returns.iloc[drop:]
+            sum_log = sum_log - np.log1p(removed).sum(axis=0)
+            sum_r = sum_r - removed.sum(axis=0)
+            sum_rr = sum_rr - removed.T @ removed
+
+        updates = self.updates + 1
+        if updates >= REBUILD_EVERY:
+            model = RiskModel.from_prices(prices, self.frequency, version)
+            model.dropped = self.dropped
+            return model
+        return RiskModel(
+            prices=prices, returns=returns, frequency=self.frequency,
+            sum_log=sum_log, sum_r=sum_r, sum_rr=sum_rr, version=version, updates=updates,
+            dropped=self.dropped,
+        )
+
+
+def load_prices(symbols: List[str], start, end) -> pd.DataFrame:
+    """Date x symbol closes, carried forward over gaps; NaN before a symbol's first bar."""
+    df = _load_delta_stocks(symbols=symbols, start=start, end=end, columns=PRICE_COLUMNS)
+    return df.pivot(index="date", columns="symbol", values="close").ffill()
+
+
+def _window_start(start: Optional[date], lookback_days: int) -> pd.Timestamp:
+    if start is not None:
+        return pd.Timestamp(start)
+    return pd.Timestamp(datetime.now() - timedelta(days=lookback_days)).normalize()
+
+
+def _complete_model(model: RiskModel, symbols: List[str]) -> RiskModel:
+    """``model`` restricted to the symbols priced over the whole window.
+
+    The requested ``symbols`` it leaves out, including those without any
+    price, are listed in ``dropped``.
+    """
+    # Back-filling a symbol listed inside the window would invent a flat, riskless history
+    complete = model.complete
+    if not complete.any():
+        raise ValueError(f"No symbol has prices over the whole window ({', '.join(model.symbols)} start later)")
+    if not complete.all():
+        model = model.subset(complete)
+    model.dropped = [s for s in symbols if s not in set(model.symbols)]
+    if model.dropped:
+        logger.warning(f"Excluding {', '.join(model.dropped)} from the risk model: no prices at the start of the window")
+    return model
+
+
+class RiskModelCache:
+    """Risk models per (symbols, window, frequency), refreshed with the stocks table version.
+
+    A window without ``start`` is a rolling ``lookback_days`` window ending
+    today; a window without ``end`` is open. Open windows are brought up to
+    date by reading only the bars after the last cached date, appending their
+    returns to the running sums and dropping the bars that fell out of a
+    rolling window. Symbols without a price at the start of the window are
+    left out of the model and listed in its ``dropped``. Windows with a fixed ``end`` are rebuilt when the table
+    version moves. When the version is unknown (the poller is not running)
+    entries are refreshed after ``max_age`` seconds. Corrections to bars
+    already cached need ``invalidate``.
+    """
+
+    def __init__(self, max_age: float = 300.0, max_entries: int = 64):
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, RiskModel]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, model: RiskModel, version: Optional[int]) -> bool:
+        if version is not None:
+            return model.version == version
+        return time.monotonic() - model.built_at < self.max_age
+
+    def _key(self, symbols: List[str], start, end, lookback_days: int, frequency: int) -> Tuple:
+        window = str(pd.Timestamp(start).date()) if start is not None else f"{lookback_days}d"
+        end = str(pd.Timestamp(end).date()) if end is not None else None
+        return settings.stocks_delta_table, tuple(symbols), window, end, frequency
+
+    def get(
+        self,
+        symbols: List[str],
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        lookback_days: int = DEFAULT_LOOKBACK_DAYS,
+        frequency: int = TRADING_DAYS,
+    ) -> RiskModel:
+        symbols = sorted({s.strip().upper() for s in symbols})
+        key = self._key(symbols, start, end, lookback_days, frequency)
+        window_start = _window_start(start, lookback_days)
+        version = version_poller.get("stocks")
+        with self._lock:
+            model = self._entries.get(key)
+            if model is not None and self._is_fresh(model, version):
+                self._entries.move_to_end(key)
+                return model
+
+            if model is None or end is not None:
+                prices = load_prices(symbols, window_start, end)
+                if prices.empty:
+                    raise ValueError(f"No price data for {', '.join(symbols)}")
+                model = _complete_model(RiskModel.from_prices(prices, frequency, version), symbols)
+            else:
+                last = model.prices.index[-1]
+                new_prices = load_prices(symbols, last, None)
+                model = model.extended(new_prices, window_start if start is None else None, version)
+                logger.debug(f"Extended risk model for {len(symbols)} symbols from {last} ({len(new_prices)} bars read)")
+
+            self._entries[key] = model
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return model
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+risk_model_cache = RiskModelCache()
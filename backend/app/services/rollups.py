@@ -0,0 +1,193 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from app.cache.memory import ByteBudgetLRU
+from app.cache.versioning import version_poller
+from app.core.settings import settings
+from app.stores.delta_scan import scan_delta
+from .downsampling import aggregate_ohlcv, bucket_edges
+from .timeseries_format import OHLCV_COLUMNS, TimeseriesFrame, as_dates, as_series
+
+ROLLUP_INTERVALS = ("1w", "1M")
+
+
+@dataclass
+class RollupBars:
+    """Aggregated bars for one symbol and interval.
+
+    ``dates`` holds the first trading day of each period; the last period
+    may still be open (partial week or month).
+    """
+    dates: np.ndarray
+    ohlcv: Dict[str, np.ndarray]
+
+
+@dataclass
+class _SymbolRollups:
+    bars: Dict[str, RollupBars]
+    # Daily bars the rollups were built from, to cut partial periods at a range edge
+    daily: RollupBars
+    version: Optional[int]
+    built_at: float
+
+    @property
+    def nbytes(self) -> int:
+        bars = [self.daily, *self.bars.values()]
+        return sum(b.dates.nbytes + sum(v.nbytes for v in b.ohlcv.values()) for b in bars)
+
+
+def _aggregate(dates: np.ndarray, ohlcv: Dict[str, np.ndarray], interval: str) -> RollupBars:
+    edges = bucket_edges(dates, interval)
+    if edges is None:
+        return RollupBars(dates=dates[:0], ohlcv={c: ohlcv[c][:0] for c in OHLCV_COLUMNS})
+    return RollupBars(dates=dates[edges[:-1]], ohlcv=aggregate_ohlcv(ohlcv, edges))
+
+
+def _merge(existing: RollupBars, tail: RollupBars) -> RollupBars:
+    # ``tail`` was rebuilt from the start of the last (possibly open) period
+    keep = np.searchsorted(existing.dates, tail.dates[0]) if len(tail.dates) else len(existing.dates)
+    return RollupBars(
+        dates=np.concatenate((existing.dates[:keep], tail.dates)),
+        ohlcv={c: np.concatenate((existing.ohlcv[c][:keep], tail.ohlcv[c])) for c in OHLCV_COLUMNS},
+    )
+
+
+def _slice(daily: RollupBars, lo: int, hi: int) -> RollupBars:
+    return RollupBars(dates=daily.dates[lo:hi], ohlcv={c: v[lo:hi] for c, v in daily.ohlcv.items()})
+
+
+def _concat(parts) -> RollupBars:
+    return RollupBars(
+        dates=np.concatenate([p.dates for p in parts]),
+        ohlcv={c: np.concatenate([p.ohlcv[c] for p in parts]) for c in OHLCV_COLUMNS},
+    )
+
+
+class RollupStore:
+    """Weekly and monthly bars per symbol, materialized from the stocks Delta table.
+
+    Rollups are built on first use and kept in memory with the daily bars
+    they came from. When the stocks table moves to a new version only the
+    daily bars from the start of the oldest open period onward are read back
+    and re-aggregated; closed periods are never recomputed. When the table
+    version is unknown (the poller is not running) entries are refreshed
+    after ``max_age`` seconds instead. Corrections to already closed periods
+    need ``invalidate``. Each symbol has its own lock, so reads of one symbol
+    never wait for another's Delta scan. Entries are kept in an LRU within
+    ``max_bytes`` of arrays; an evicted symbol is rebuilt on its next read.
+    """
+
+    def __init__(self, max_age: float = 300.0, max_bytes: int = 64 * 1024 * 1024):
+        self.max_age = max_age
+        self._entries: ByteBudgetLRU[Tuple[str, str], _SymbolRollups] = ByteBudgetLRU(max_bytes)
+        self._symbol_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _symbol_lock(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._lock:
+            return self._symbol_locks.setdefault(key, threading.Lock())
+
+    def _load_daily(self, table_uri: str, symbol: str, since: Optional[np.datetime64]):
+        table, _ = scan_delta(
+            table_uri,
+            symbols=[symbol],
+            start=None if since is None else since.astype("datetime64[s]").astype(object),
+            columns=["date", *OHLCV_COLUMNS],
+        )
+        df = table.sort_by("date").to_pandas()
+        return RollupBars(dates=as_dates(df["date"]), ohlcv={c: as_series(df[c].to_numpy()) for c in OHLCV_COLUMNS})
+
+    def _is_fresh(self, entry: _SymbolRollups, version: Optional[int]) -> bool:
+        if version is not None:
+            return entry.version == version
+        return time.monotonic() - entry.built_at < self.max_age
+
+    def _refresh(self, table_uri: str, symbol: str) -> _SymbolRollups:
+        # Caller holds the symbol's lock
+        version = version_poller.get("stocks")
+        with self._lock:
+            entry = self._entries.get((table_uri, symbol))
+        if entry is not None and self._is_fresh(entry, version):
+            return entry
+
+        if entry is None:
+            daily = self._load_daily(table_uri, symbol, None)
+            bars = {interval: _aggregate(daily.dates, daily.ohlcv, interval) for interval in ROLLUP_INTERVALS}
+        else:
+            open_periods = [b.dates[-1] for b in entry.bars.values() if len(b.dates)]
+            since = min(open_periods) if open_periods else None
+            new = self._load_daily(table_uri, symbol, since)
+            keep = np.searchsorted(entry.daily.dates, since) if since is not None else 0
+            daily = _concat([_slice(entry.daily, 0, keep), new])
+            bars = {}
+            for interval, existing in entry.bars.items():
+                if since is None or not len(existing.dates):
+                    bars[interval] = _aggregate(daily.dates, daily.ohlcv, interval)
+                    continue
+                # Re-aggregate this interval from the start of its own open period
+                start = np.searchsorted(daily.dates, existing.dates[-1])
+                tail = _slice(daily, start, len(daily.dates))
+                bars[interval] = _merge(existing, _aggregate(tail.dates, tail.ohlcv, interval))
+            logger.debug(f"Refreshed rollups for {symbol} from {since} ({len(new.dates)} daily bars)")
+
+        entry = _SymbolRollups(bars=bars, daily=daily, version=version, built_at=time.monotonic())
+        with self._lock:
+            self._entries.put((table_uri, symbol), entry, entry.nbytes)
+        return entry
+
+    def get(
+        self,
+        symbol: str,
+        interval: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> TimeseriesFrame:
+        """Return ``interval`` bars of the daily bars from ``start_date`` to ``end_date`` (both inclusive).
+
+        Same bars as aggregating the daily range: a period cut by either end
+        is re-aggregated from its daily bars inside the range and dated by
+        the first of them.
+        """
+        if interval not in ROLLUP_INTERVALS:
+            raise ValueError(f"No rollup for interval {interval!r}, expected one of {ROLLUP_INTERVALS}")
+        table_uri = settings.stocks_delta_table
+        with self._symbol_lock((table_uri, symbol)):
+            entry = self._refresh(table_uri, symbol)
+        daily, bars = entry.daily, entry.bars[interval]
+        lo = np.searchsorted(daily.dates, np.datetime64(start_date, "D")) if start_date else 0
+        hi = np.searchsorted(daily.dates, np.datetime64(end_date, "D"), side="right") if end_date else len(daily.dates)
+        if lo >= hi:
+            raise ValueError(f"No data found for symbol {symbol}")
+
+        # Daily row offsets where each period starts and ends
+        starts = np.searchsorted(daily.dates, bars.dates)
+        ends = np.append(starts[1:], len(daily.dates))
+        first = np.searchsorted(starts, lo, side="right") - 1
+        last = np.searchsorted(starts, hi - 1, side="right") - 1
+
+        def period(p: int) -> RollupBars:
+            cut = _slice(daily, max(lo, starts[p]), min(hi, ends[p]))
+            if len(cut.dates) == ends[p] - starts[p]:
+                return _slice(bars, p, p + 1)
+            return _aggregate(cut.dates, cut.ohlcv, interval)
+
+        parts = [period(first)]
+        if last > first:
+            parts += [_slice(bars, first + 1, last), period(last)]
+        result = _concat(parts)
+        return TimeseriesFrame(symbol=symbol, interval=interval, dates=result.dates, ohlcv=result.ohlcv)
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        """Drop rollups (for one symbol or all) so they are rebuilt from scratch."""
+        with self._lock:
+            for key in self._entries.keys():
+                if symbol is None or key[1] == symbol:
+                    self._entries.pop(key)
+
+
+rollup_store = RollupStore(max_bytes=settings.rollup_max_bytes)
@@ -1,109 +1,99 @@
 from datetime import datetime
 from typing import List, Optional, Tuple
 import os
-from deltalake import DeltaTable
 import deltalake
 import pandas as pd
-import pyarrow as pa
 import numpy as np
 import talib
 from loguru import logger
-from .indicators import trailing_sl, avwap, hawkes_BVC, kalman_zscore, calculate_yz_volatility
+from .indicators import trailing_sl, atr_trailing_nb, avwap, avwap_func_nb, hawkes_BVC, kalman_zscore, calculate_yz_volatility
 from .utils import convert_nans
-from app.schemas.timeseries import TimeseriesResponse, Indicators, IndicatorParams
+from app.schemas.timeseries import TimeseriesRequest, BatchTimeseriesRequest, IndicatorParams, INDICATOR_DEFAULTS
+from .downsampling import bucket_edges, downsample
+from .rollups import ROLLUP_INTERVALS, rollup_store
+from .timeseries_format import TimeseriesFrame, BatchTimeseriesFrame, OHLCV_COLUMNS, as_dates, as_series
 from app.schemas.sector import SectorTimeseries, SectorTimeseriesData
-import pyarrow.dataset as ds
 
 from datetime import datetime, date, timedelta
-from fastapi_cache.decorator import cache
+from fastapi_cache.coder import PickleCoder
+from app.cache import cache, timeseries_key_builder, batch_timeseries_key_builder
+from app.cache.keys import canonical_batch_timeseries_request, canonical_timeseries_request
 from app.core.settings import settings
+from app.stores.delta_scan import scan_delta
+from app.stores.panel import PricePanel, build_panel
+from .universe_service import resolve_symbols
 
 
-def _delta_storage_options() -> dict:
-    return {
-        "AWS_ACCESS_KEY_ID": settings.minio_access_key,
-        "AWS_SECRET_ACCESS_KEY": settings.minio_secret_key,
-        "AWS_ENDPOINT_URL": f"http://{settings.minio_endpoint}",
-        "AWS_ALLOW_HTTP": "true",
-        "AWS_EC2_METADATA_DISABLED": "true",
-        "AWS_REGION": "us-east-1",
-        "aws_conditional_put": "etag",
-    }
-
-
-def _build_filter(symbols: list | None, start: datetime | None, end: datetime | None):
-    expr = None
-    try:
-        if start is not None:
-            e = ds.field("date") >= pa.scalar(pd.Timestamp(start).to_pydatetime())
-            expr = e if expr is None else (expr & e)
-        if end is not None:
-            e = ds.field("date") <= pa.scalar(pd.Timestamp(end).to_pydatetime())
-            expr = e if expr is None else (expr & e)
-        if symbols:
-            e = ds.field("symbol").isin(list(symbols))
-            expr = e if expr is None else (expr & e)
-    except Exception:
-        return None
-    return expr
+# Columns each Delta consumer in this module reads; scans project to exactly these
+SECTOR_TIMESERIES_COLUMNS = ["date", "sector_id", "sector_name", "close"]
 
 
 def _load_delta_stocks(
     *,
     symbols: list | None = None,
+    universe: str | None = None,
     start: datetime | None = None,
     end: datetime | None = None,
     columns: list | None = None,
 ) -> pd.DataFrame:
-    """Load OHLCV from Delta table using predicate pushdown via PyArrow filters."""
-    # Load watchlist if no symbols provided
-    if not symbols:
-        watchlist_path = os.path.join("models", "watchlist.csv")
-        if os.path.exists(watchlist_path):
-            with open(watchlist_path, 'r') as f:
-                symbols = [line.strip() for line in f if line.strip()]
-            logger.info(f"Loaded {len(symbols)} symbols from watchlist")
-        else:
-            logger.warning(f"Watchlist not found at {watchlist_path}, using all available symbols")
-            symbols = None
-
-    dt = DeltaTable(settings.stocks_delta_table, storage_options=_delta_storage_options())
-    dataset = dt.to_pyarrow_dataset()
-    filt = _build_filter(symbols, start, end)
-    try:
-        table = dataset.to_table(filter=filt, columns=columns)
-    except Exception:
-        table = dataset.to_table(columns=columns)
-    pdf = table.to_pandas()
-    if pdf.empty:
-        return pdf
-    if "date" in pdf.columns:
-        pdf["date"] = pd.to_datetime(pdf["date"])
-    if "symbol" in pdf.columns and "date" in pdf.columns:
-        pdf = pdf.sort_values(["symbol", "date"]).reset_index(drop=True)
-    elif "symbol" in pdf.columns:
-        pdf = pdf.sort_values(["symbol"]).reset_index(drop=True)
-    return pdf
+    """Load OHLCV from Delta table using predicate pushdown via PyArrow filters.
+
+    Either ``symbols`` or a ``universe`` id is required.
+    """
+    table, _ = scan_delta(
+        settings.stocks_delta_table,
+        symbols=resolve_symbols(symbols, universe),
+        start=start,
+        end=end,
+        columns=columns,
+    )
+    # Sort in Arrow so pandas gets an already ordered, freshly indexed frame
+    sort_keys = [(c, "ascending") for c in ("symbol", "date") if c in table.column_names]
+    if sort_keys:
+        table = table.sort_by(sort_keys)
+    return table.to_pandas()
+
+
+def _load_price_panel(
+    *,
+    symbols: list | None = None,
+    universe: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    fields: list = OHLCV_COLUMNS,
+) -> PricePanel:
+    """Load stocks straight into date x symbol matrices (no long pandas frame)."""
+    table, _ = scan_delta(
+        settings.stocks_delta_table,
+        symbols=resolve_symbols(symbols, universe),
+        start=start,
+        end=end,
+        columns=["date", "symbol", *fields],
+    )
+    return build_panel(table, fields)
 
 
 def _load_feature_store(
     symbols: list | None = None,
     start: datetime | None = None,
     end: datetime | None = None,
+    columns: list | None = None,
+    universe: str | None = None,
 ) -> pd.DataFrame:
-    dt = DeltaTable(settings.stocks_feature_store, storage_options=_delta_storage_options())
-    dataset = dt.to_pyarrow_dataset()
-    filt = _build_filter(symbols, start, end)
-    try:
-        table = dataset.to_table(filter=filt)
-    except Exception:
-        table = dataset.to_table()
+    table, _ = scan_delta(
+        settings.stocks_feature_store,
+        symbols=resolve_symbols(symbols, universe),
+        start=start,
+        end=end,
+        columns=columns,
+    )
     pdf = table.to_pandas()
     return pdf
 
-@cache(expire=300)  # Cache for 5 minutes
+# The look-back window moves with the clock, so entries expire even while the version holds
+@cache(namespace="current_price", expire=300, depends_on=("stocks",), versioned_expire=True)
 async def get_current_price(ticker: str) -> Optional[float]:
-    """Get the most recent price for a ticker."""
+    """Get the most recent price for a ticker (None when unavailable; not cached)."""
     try:
         now = datetime.now()
         
@@ -111,17 +101,15 @@ async def get_current_price(ticker: str) -> Optional[float]:
         current_date = date(now.year, now.month, now.day)
         start_date = current_date - timedelta(days=3)
         
-        # Use DeltaTable's predicate pushdown for filtering
-        dt = DeltaTable(settings.stocks_delta_table, storage_options=_delta_storage_options())
-        stocks = dt.to_pandas(
+        table, _ = scan_delta(
+            settings.stocks_delta_table,
+            symbols=[ticker],
+            start=start_date,
+            end=current_date,
             columns=["date", "close"],
-            filters=[
-                ("symbol", "==", ticker),
-                ("date", ">=", start_date),
-                ("date", "<=", current_date),
-            ]
         )
-        
+        stocks = table.to_pandas()
+
         if stocks.empty:
             return None
 
@@ -129,178 +117,312 @@ async def get_current_price(ticker: str) -> Optional[float]:
         latest_price = float(stocks.sort_values("date", ascending=False)["close"].iloc[0])
         return latest_price
     except Exception as e:
-        print(f"Error getting current price for {ticker}: {e}")
+        logger.error(f"Error getting current price for {ticker}: {e}")
         return None
 
+def _compute_indicators(
+    open_prices: np.ndarray,
+    high_prices: np.ndarray,
+    low_prices: np.ndarray,
+    close_prices: np.ndarray,
+    volume_prices: np.ndarray,
+    indicators: List[IndicatorParams],
+) -> dict:
+    """Compute the requested indicators as float64 arrays (NaN where undefined)."""
+    indicator_data = {}
+    for ind in indicators:
+        params = {**INDICATOR_DEFAULTS.get(ind.name, {}), **ind.params}
+        try:
+            if ind.name == "rsi":
+                indicator_data["rsi"] = talib.RSI(close_prices, timeperiod=params["timeperiod"])
+                indicator_data["rsi_5"] = talib.RSI(close_prices, timeperiod=5)
+
+            elif ind.name == "macd":
+                macd_line, signal_line, histogram = talib.MACD(
+                    close_prices,
+                    fastperiod=params["fastperiod"],
+                    slowperiod=params["slowperiod"],
+                    signalperiod=params["signalperiod"]
+                )
+                indicator_data["macd"] = {
+                    "macd": macd_line,
+                    "signal": signal_line,
+                    "histogram": histogram
+                }
+
+            elif ind.name == "bbands":
+                upper, middle, lower = talib.BBANDS(
+                    close_prices,
+                    timeperiod=params["timeperiod"],
+                    nbdevup=params["nbdevup"],
+                    nbdevdn=params["nbdevdn"]
+                )
+                indicator_data["bbands"] = {
+                    "upper": upper,
+                    "middle": middle,
+                    "lower": lower
+                }
+
+            elif ind.name == "sma":
+                indicator_data["sma"] = talib.SMA(close_prices, timeperiod=params["timeperiod"])
+
+            elif ind.name == "ema":
+                indicator_data["ema"] = talib.EMA(close_prices, timeperiod=params["timeperiod"])
+
+            elif ind.name == "atr_trailing":
+                atr = talib.ATR(high_prices, low_prices, close_prices, timeperiod=params["timeperiod"])
+                indicator_data["atr_trailing"] = trailing_sl(close_prices, atr)
+
+            elif ind.name == "vwap":
+                window = params["window"]
+                indicator_data["vwap_highest"] = avwap(
+                    close_prices, high_prices, low_prices, volume_prices, is_highest=True, window=window
+                )
+                indicator_data["vwap_lowest"] = avwap(
+                    close_prices, high_prices, low_prices, volume_prices, is_highest=False, window=window
+                )
+
+            elif ind.name == "bvc":
+                indicator_data["bvc"] = hawkes_BVC(
+                    close_prices,
+                    volume_prices,
+                    window=params["window"],
+                    kappa=params["kappa"]
+                )
+
+            elif ind.name == "stoch":
+                slowk, slowd = talib.STOCH(
+                    high_prices,
+                    low_prices,
+                    close_prices,
+                    fastk_period=params["fastk_period"],
+                    slowk_period=params["slowk_period"],
+                    slowd_period=params["slowd_period"]
+                )
+                indicator_data["stoch"] = {
+                    "slowk": slowk,
+                    "slowd": slowd
+                }
+
+            elif ind.name == "kalman_zscore":
+                indicator_data["kalman_zscore"] = kalman_zscore.calculate_kalman_zscore(
+                    close_prices, window=params["window"]
+                )
+
+            elif ind.name == "yz_volatility":
+                indicator_data["yz_volatility"] = calculate_yz_volatility(
+                    open_prices,
+                    high_prices,
+                    low_prices,
+                    close_prices,
+                    window=params["window"],
+                    periods=params["periods"]
+                )
+        except Exception as e:
+            logger.warning(f"Error calculating {ind.name}: {e}")
+
+    return {
+        name: {k: as_series(v) for k, v in values.items()} if isinstance(values, dict) else as_series(values)
+        for name, values in indicator_data.items()
+    }
+
+
 async def get_stock_timeseries(
     symbol: str,
     interval: str = "1d",
     indicators: List[IndicatorParams] = [],
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-) -> TimeseriesResponse:
-    """Get stock timeseries data with optional indicators."""
+    max_points: Optional[int] = None,
+) -> TimeseriesFrame:
+    """Get stock timeseries data with optional indicators.
+
+    Indicators are always computed on daily bars; the result is then
+    resampled to ``interval`` and/or downsampled to ``max_points``. Weekly
+    and monthly bars without indicators come straight from the rollups.
+    """
     try:
+        if interval in ROLLUP_INTERVALS and not indicators:
+            frame = rollup_store.get(symbol, interval, start_date, end_date)
+            edges = bucket_edges(frame.dates, "1d", max_points)
+            return frame if edges is None else downsample(frame, edges, interval)
+
         # Load data from Delta Lake
-        query_filters = [("symbol", "==", symbol)]
-        if start_date:
-            query_filters.append(("date", ">=", datetime.strptime(start_date, "%Y-%m-%d")))
-        if end_date:
-            query_filters.append(("date", "<=", datetime.strptime(end_date, "%Y-%m-%d")))
-
-        dt = DeltaTable(settings.stocks_delta_table, storage_options=_delta_storage_options())
-        df = dt.to_pandas(
-            columns=["date", "open", "high", "low", "close", "volume"],
-            filters=query_filters
+        table, _ = scan_delta(
+            settings.stocks_delta_table,
+            symbols=[symbol],
+            start=datetime.strptime(start_date, "%Y-%m-%d") if start_date else None,
+            end=datetime.strptime(end_date, "%Y-%m-%d") if end_date else None,
+            columns=["date", *OHLCV_COLUMNS],
         )
-        
+        df = table.sort_by("date").to_pandas()
+
         if df.empty:
             raise ValueError(f"No data found for symbol {symbol}")
 
-        # Sort by date
-        df = df.sort_values("date")
-        
-        # Calculate indicators if requested
-        indicator_data = {}
-        close_prices = df["close"].values
-        high_prices = df["high"].values
-        low_prices = df["low"].values
-        volume_prices = df["volume"].values
-        
-        for ind in indicators:
-            try:
-                if ind.name == "rsi":
-                    timeperiod = ind.params.get("timeperiod", 14)
-                    indicator_data["rsi"] = convert_nans(talib.RSI(close_prices, timeperiod=timeperiod))
-                    indicator_data["rsi_5"] = convert_nans(talib.RSI(close_prices, timeperiod=5))
-                
-                elif ind.name == "macd":
-                    fastperiod = ind.params.get("fastperiod", 12)
-                    slowperiod = ind.params.get("slowperiod", 26)
-                    signalperiod = ind.params.get("signalperiod", 9)
-                    macd_line, signal_line, histogram = talib.MACD(
-                        close_prices,
-                        fastperiod=fastperiod,
-                        slowperiod=slowperiod,
-                        signalperiod=signalperiod
-                    )
-                    indicator_data["macd"] = {
-                        "macd": convert_nans(macd_line),
-                        "signal": convert_nans(signal_line),
-                        "histogram": convert_nans(histogram)
-                    }
-                
-                elif ind.name == "bbands":
-                    timeperiod = ind.params.get("timeperiod", 20)
-                    nbdevup = ind.params.get("nbdevup", 2)
-                    nbdevdn = ind.params.get("nbdevdn", 2)
-                    upper, middle, lower = talib.BBANDS(
-                        close_prices,
-                        timeperiod=timeperiod,
-                        nbdevup=nbdevup,
-                        nbdevdn=nbdevdn
-                    )
-                    indicator_data["bbands"] = {
-                        "upper": convert_nans(upper),
-                        "middle": convert_nans(middle),
-                        "lower": convert_nans(lower)
-                    }
-                
-                elif ind.name == "sma":
-                    timeperiod = ind.params.get("timeperiod", 20)
-                    indicator_data["sma"] = convert_nans(talib.SMA(close_prices, timeperiod=timeperiod))
-                
-                elif ind.name == "ema":
-                    timeperiod = ind.params.get("timeperiod", 20)
-                    indicator_data["ema"] = convert_nans(talib.EMA(close_prices, timeperiod=timeperiod))
-                
-                elif ind.name == "atr_trailing":
-                    timeperiod = ind.params.get("timeperiod", 10)
-                    atr = talib.ATR(high_prices, low_prices, close_prices, timeperiod=timeperiod)
-                    indicator_data["atr_trailing"] = convert_nans(trailing_sl(close_prices, atr))
-                
-                elif ind.name == "vwap":
-                    window = ind.params.get("window", 200)
-                    indicator_data["vwap_highest"] = convert_nans(avwap(
-                        close_prices,
-                        high_prices,
-                        low_prices,
-                        df["volume"].values,
-                        is_highest=True,
-                        window=window
-                    ))
-                    indicator_data["vwap_lowest"] = convert_nans(avwap(
-                        close_prices,
-                        high_prices,
-                        low_prices,
-                        df["volume"].values,
-                        is_highest=False,
-                        window=window
-                    ))
-                
-                elif ind.name == "bvc":
-                    window = ind.params.get("window", 20)
-                    kappa = ind.params.get("kappa", 0.1)
-                    bvc_values = hawkes_BVC(
-                        close_prices,
-                        volume_prices,
-                        window=window,
-                        kappa=kappa
-                    )
-                    indicator_data["bvc"] = convert_nans(bvc_values)
-                
-                elif ind.name == "stoch":
-                    fastk_period = ind.params.get("fastk_period", 14)
-                    slowk_period = ind.params.get("slowk_period", 3)
-                    slowd_period = ind.params.get("slowd_period", 3)
-                    slowk, slowd = talib.STOCH(
-                        high_prices,
-                        low_prices,
-                        close_prices,
-                        fastk_period=fastk_period,
-                        slowk_period=slowk_period,
-                        slowd_period=slowd_period
-                    )
-                    indicator_data["stoch"] = {
-                        "slowk": convert_nans(slowk),
-                        "slowd": convert_nans(slowd)
-                    }
-                
-                elif ind.name == "kalman_zscore":
-                    window = ind.params.get("window", 20)
-                    indicator_data["kalman_zscore"] = kalman_zscore.calculate_kalman_zscore(close_prices, window=window)
-                
-                elif ind.name == "yz_volatility":
-                    window = ind.params.get("window", 30)
-                    periods = ind.params.get("periods", 252)
-                    indicator_data["yz_volatility"] = calculate_yz_volatility(
-                            df["open"].values,
-                            df["high"].values,
-                            df["low"].values,
-                            df["close"].values,
-                            window=window,
-                            periods=periods
-                        )
-            except Exception as e:
-                print(f"Error calculating {ind.name}: {e}")
-
-        return TimeseriesResponse(
+        ohlcv = {column: as_series(df[column].to_numpy()) for column in OHLCV_COLUMNS}
+        frame = TimeseriesFrame(
             symbol=symbol,
-            interval=interval,
-            timestamps=df["date"].dt.strftime("%Y-%m-%d").tolist(),
-            timeseries={
-                "open": df["open"].tolist(),
-                "high": df["high"].tolist(),
-                "low": df["low"].tolist(),
-                "close": df["close"].tolist(),
-                "volume": df["volume"].tolist(),
-            },
-            indicators=Indicators(**indicator_data) if indicator_data else None
+            interval="1d",
+            dates=as_dates(df["date"]),
+            ohlcv=ohlcv,
+            indicators=_compute_indicators(
+                ohlcv["open"], ohlcv["high"], ohlcv["low"], ohlcv["close"], ohlcv["volume"], indicators
+            ),
         )
+        edges = bucket_edges(frame.dates, interval, max_points)
+        return frame if edges is None else downsample(frame, edges, interval)
     except Exception as e:
-        print(f"Error getting timeseries data for {symbol}: {e}")
+        logger.error(f"Error getting timeseries data for {symbol}: {e}")
         raise
 
+
+@cache(
+    namespace="timeseries",
+    expire=300,
+    coder=PickleCoder,
+    key_builder=timeseries_key_builder,
+    depends_on=("stocks",),
+)
+async def get_cached_stock_timeseries(symbol: str, request: TimeseriesRequest) -> TimeseriesFrame:
+    """Cached ``get_stock_timeseries`` of a (symbol, request) pair.
+
+    Takes the request as sent: the key builder canonicalizes it, and the
+    frame is computed from the same canonical form so every spelling that
+    shares an entry gets the same result. The frame is cached rather than an
+    encoded body, so JSON and Arrow clients share entries.
+    """
+    symbol, request = canonical_timeseries_request(symbol, request)
+    return await get_stock_timeseries(
+        symbol=symbol,
+        interval=request.interval,
+        indicators=request.indicators,
+        start_date=request.start_date,
+        end_date=request.end_date,
+        max_points=request.max_points,
+    )
+
+def _scatter(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Place ``values`` at the True positions of ``mask``, NaN elsewhere."""
+    out = np.full(mask.shape, np.nan)
+    out[mask] = values
+    return out
+
+
+# Indicators with a 2-D kernel that covers every symbol of a dense panel in one call
+PANEL_INDICATORS = ("vwap", "atr_trailing")
+
+
+def _compute_panel_indicators(panel: dict, indicators: List[IndicatorParams]) -> List[dict]:
+    """Compute indicators for every column of aligned date x symbol OHLCV matrices.
+
+    VWAP and the ATR trailing stop run once over the whole panel with their
+    parallel 2-D numba kernels when every symbol has a bar on every date.
+    Everything else (and both of those for ragged panels) is computed per
+    symbol on that symbol's own bars, so results match the single-symbol
+    endpoint.
+    """
+    n_symbols = panel["close"].shape[1]
+    dense = not np.isnan(panel["close"]).any()
+    panel_wide = [ind for ind in indicators if dense and ind.name in PANEL_INDICATORS]
+    per_symbol = [ind for ind in indicators if not (dense and ind.name in PANEL_INDICATORS)]
+
+    results = [{} for _ in range(n_symbols)]
+    if per_symbol:
+        for j in range(n_symbols):
+            valid = ~np.isnan(panel["close"][:, j])
+            computed = _compute_indicators(
+                *(np.ascontiguousarray(panel[c][valid, j]) for c in OHLCV_COLUMNS), per_symbol
+            )
+            for name, values in computed.items():
+                if isinstance(values, dict):
+                    results[j][name] = {k: _scatter(v, valid) for k, v in values.items()}
+                else:
+                    results[j][name] = _scatter(values, valid)
+
+    for ind in panel_wide:
+        params = {**INDICATOR_DEFAULTS[ind.name], **ind.params}
+        if ind.name == "vwap":
+            for key, is_highest in (("vwap_highest", True), ("vwap_lowest", False)):
+                values = avwap_func_nb(
+                    panel["close"], panel["high"], panel["low"], panel["volume"], is_highest, params["window"]
+                )
+                for j in range(n_symbols):
+                    results[j][key] = as_series(values[:, j])
+        elif ind.name == "atr_trailing":
+            # talib is 1-D, so only the ATR itself is taken column by column
+            atr = np.column_stack([
+                talib.ATR(panel["high"][:, j], panel["low"][:, j], panel["close"][:, j], timeperiod=params["timeperiod"])
+                for j in range(n_symbols)
+            ])
+            values = atr_trailing_nb(panel["close"], atr, 1.8)
+            for j in range(n_symbols):
+                results[j]["atr_trailing"] = as_series(values[:, j])
+    return results
+
+
+async def get_batch_timeseries(
+    symbols: List[str],
+    interval: str = "1d",
+    indicators: List[IndicatorParams] = [],
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    max_points: Optional[int] = None,
+) -> BatchTimeseriesFrame:
+    """Load several symbols in one pushdown scan and align them on one date axis."""
+    loaded = _load_price_panel(
+        symbols=symbols,
+        start=datetime.strptime(start_date, "%Y-%m-%d") if start_date else None,
+        end=datetime.strptime(end_date, "%Y-%m-%d") if end_date else None,
+    )
+    present = [s for s in symbols if s in loaded.symbols]
+    missing = [s for s in symbols if s not in present]
+    if not present:
+        return BatchTimeseriesFrame(interval=interval, dates=np.array([], dtype="datetime64[D]"), frames={}, missing=missing)
+
+    dates = as_dates(loaded.dates)
+    columns = [loaded.symbols.index(s) for s in present]
+    panel = {c: np.ascontiguousarray(loaded.fields[c][:, columns]) for c in OHLCV_COLUMNS}
+    panel_indicators = _compute_panel_indicators(panel, indicators)
+
+    frames = {
+        symbol: TimeseriesFrame(
+            symbol=symbol,
+            interval="1d",
+            dates=dates,
+            ohlcv={c: np.ascontiguousarray(panel[c][:, j]) for c in OHLCV_COLUMNS},
+            indicators=panel_indicators[j],
+        )
+        for j, symbol in enumerate(present)
+    }
+    # Every symbol shares the date axis, so one set of buckets keeps them aligned
+    edges = bucket_edges(dates, interval, max_points)
+    if edges is not None:
+        frames = {symbol: downsample(frame, edges, interval) for symbol, frame in frames.items()}
+        dates = dates[edges[:-1]]
+    return BatchTimeseriesFrame(interval=interval, dates=dates, frames=frames, missing=missing)
+
+
+@cache(
+    namespace="timeseries_batch",
+    expire=300,
+    coder=PickleCoder,
+    key_builder=batch_timeseries_key_builder,
+    depends_on=("stocks",),
+)
+async def get_cached_batch_timeseries(request: BatchTimeseriesRequest) -> BatchTimeseriesFrame:
+    """Cached ``get_batch_timeseries`` of a request, computed from its canonical form."""
+    request = canonical_batch_timeseries_request(request)
+    return await get_batch_timeseries(
+        symbols=request.symbols,
+        interval=request.interval,
+        indicators=request.indicators,
+        start_date=request.start_date,
+        end_date=request.end_date,
+        max_points=request.max_points,
+    )
+
+
 def calculate_rsi(prices: np.ndarray, period: int = 14) -> List[float]:
     """Calculate RSI indicator using TA-Lib."""
     rsi = talib.RSI(prices, timeperiod=period)
@@ -325,12 +447,14 @@ def calculate_macd(
 async def get_sector_timeseries(
     sector_level: str
 ) -> SectorTimeseries:
-    
-    print(sector_level)
-    
     """Get sector timeseries data with optional indicators."""
-    dt = DeltaTable(settings.sector_delta_table, storage_options=_delta_storage_options())
-    pdf = dt.to_pyarrow_table(filters=[("sector_type", "==", int(sector_level))]).to_pandas()
+    logger.debug(f"Loading sector timeseries for level {sector_level}")
+    table, _ = scan_delta(
+        settings.sector_delta_table,
+        columns=SECTOR_TIMESERIES_COLUMNS,
+        equals={"sector_type": int(sector_level)},
+    )
+    pdf = table.to_pandas()
 
     if not pdf.empty:
         pdf["date"] = pd.to_datetime(pdf["date"])
@@ -0,0 +1,182 @@
+import json
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Union
+
+import numpy as np
+import orjson
+import pandas as pd
+import pyarrow as pa
+from fastapi import Response
+
+from app.schemas.timeseries import Indicators
+
+JSON_MEDIA_TYPE = "application/json"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+IndicatorValues = Union[np.ndarray, Dict[str, np.ndarray]]
+
+
+@dataclass
+class TimeseriesFrame:
+    """Columnar timeseries result, kept as numpy arrays until it is encoded.
+
+    ``dates`` is ``datetime64[D]``; every other array is contiguous float64
+    aligned with it, with NaN where a value is undefined.
+    """
+    symbol: str
+    interval: str
+    dates: np.ndarray
+    ohlcv: Dict[str, np.ndarray]
+    indicators: Dict[str, IndicatorValues] = field(default_factory=dict)
+    meta: Dict = field(default_factory=dict)
+
+
+@dataclass
+class BatchTimeseriesFrame:
+    """Several symbols aligned on one date axis; each frame shares ``dates``."""
+    interval: str
+    dates: np.ndarray
+    frames: Dict[str, TimeseriesFrame]
+    missing: list = field(default_factory=list)
+    meta: Dict = field(default_factory=dict)
+
+
+def as_series(values) -> np.ndarray:
+    """Coerce an indicator output (array or list) to contiguous float64."""
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def as_dates(dates) -> np.ndarray:
+    """Coerce a date column (naive or tz-aware) to ``datetime64[D]``."""
+    index = pd.DatetimeIndex(dates)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.values.astype("datetime64[D]")
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """Pick JSON or Arrow IPC from an Accept header (JSON unless Arrow is preferred)."""
+    if not accept:
+        return JSON_MEDIA_TYPE
+    best, best_q = JSON_MEDIA_TYPE, -1.0
+    for part in accept.split(","):
+        media_type, _, params = part.strip().partition(";")
+        media_type = media_type.strip().lower()
+        if media_type not in (JSON_MEDIA_TYPE, ARROW_STREAM_MEDIA_TYPE):
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best, best_q = media_type, q
+    return best
+
+
+def _indicators_json(frame: TimeseriesFrame) -> Optional[dict]:
+    # Mirror the pydantic dump of Indicators: every field present, unset ones null
+    if not frame.indicators:
+        return None
+    indicators = dict.fromkeys(Indicators.model_fields)
+    indicators.update(frame.indicators)
+    return indicators
+
+
+def encode_json(frame: TimeseriesFrame) -> bytes:
+    """Serialize to the ``TimeseriesResponse`` JSON shape straight from numpy buffers."""
+    return orjson.dumps(
+        {
+            "symbol": frame.symbol,
+            "interval": frame.interval,
+            "meta": frame.meta,
+            "timestamps": np.datetime_as_string(frame.dates, unit="D").tolist(),
+            "timeseries": frame.ohlcv,
+            "indicators": _indicators_json(frame),
+        },
+        option=orjson.OPT_SERIALIZE_NUMPY,
+    )
+
+
+def encode_batch_json(batch: BatchTimeseriesFrame) -> bytes:
+    """Serialize to the ``BatchTimeseriesResponse`` JSON shape."""
+    return orjson.dumps(
+        {
+            "interval": batch.interval,
+            "meta": batch.meta,
+            "timestamps": np.datetime_as_string(batch.dates, unit="D").tolist(),
+            "series": {
+                symbol: {"timeseries": frame.ohlcv, "indicators": _indicators_json(frame)}
+                for symbol, frame in batch.frames.items()
+            },
+            "missing": batch.missing,
+        },
+        option=orjson.OPT_SERIALIZE_NUMPY,
+    )
+
+
+def _frame_columns(frame: TimeseriesFrame, prefix: str = "") -> Dict[str, pa.Array]:
+    columns = {}
+    for name in OHLCV_COLUMNS:
+        columns[prefix + name] = pa.array(frame.ohlcv[name], from_pandas=True)
+    for name, values in frame.indicators.items():
+        if isinstance(values, dict):
+            for key, series in values.items():
+                columns[f"{prefix}{name}.{key}"] = pa.array(series, from_pandas=True)
+        else:
+            columns[prefix + name] = pa.array(values, from_pandas=True)
+    return columns
+
+
+def _write_ipc(columns: Dict[str, pa.Array], metadata: Dict[str, str]) -> bytes:
+    table = pa.table(columns).replace_schema_metadata(metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _date_column(dates: np.ndarray) -> pa.Array:
+    return pa.array(dates.astype("datetime64[D]"), type=pa.date32())
+
+
+def encode_arrow(frame: TimeseriesFrame) -> bytes:
+    """Serialize to an Arrow IPC stream with one column per series.
+
+    Nested indicators are flattened to ``name.field`` columns (``macd.signal``).
+    NaNs become nulls so clients get a validity bitmap instead of sentinel values.
+    """
+    columns = {"date": _date_column(frame.dates), **_frame_columns(frame)}
+    return _write_ipc(columns, {
+        "symbol": frame.symbol,
+        "interval": frame.interval,
+        "meta": json.dumps(frame.meta),
+    })
+
+
+def encode_batch_arrow(batch: BatchTimeseriesFrame) -> bytes:
+    """Serialize a batch to one Arrow IPC stream with ``SYMBOL.series`` columns."""
+    columns = {"date": _date_column(batch.dates)}
+    for symbol, frame in batch.frames.items():
+        columns.update(_frame_columns(frame, prefix=f"{symbol}."))
+    return _write_ipc(columns, {
+        "symbols": json.dumps(list(batch.frames)),
+        "missing": json.dumps(batch.missing),
+        "interval": batch.interval,
+        "meta": json.dumps(batch.meta),
+    })
+
+
+def timeseries_response(frame: Union[TimeseriesFrame, BatchTimeseriesFrame], accept: Optional[str]) -> Response:
+    """Encode a single or batch frame in the format negotiated from the Accept header."""
+    media_type = negotiate_format(accept)
+    batch = isinstance(frame, BatchTimeseriesFrame)
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        content = encode_batch_arrow(frame) if batch else encode_arrow(frame)
+    else:
+        content = encode_batch_json(frame) if batch else encode_json(frame)
+    return Response(content=content, media_type=media_type)
@@ -0,0 +1,173 @@
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from app.core.settings import settings
+from app.db.base import SessionLocal
+from app.db.models.market import StockSymbol
+
+WATCHLIST = "watchlist"
+# Explicit opt-in to reading every symbol in a table
+ALL = "all"
+SECTOR_LEVELS = (3, 4)
+
+
+class UniverseNotFound(LookupError):
+    """The universe id is unknown or its source is unavailable."""
+
+
+@dataclass
+class _FileEntry:
+    mtime: float
+    value: object
+
+
+def _clean(symbols) -> List[str]:
+    return sorted({s.strip().upper() for s in symbols if s and s.strip()})
+
+
+class UniverseService:
+    """Named symbol universes, cached in memory.
+
+    Universe ids:
+
+    - ``watchlist``: symbols in the watchlist CSV (one per line)
+    - ``sector:<level>:<id>``: members of a level 3 or 4 sector in ``stock_symbol``
+    - ``custom:<name>``: lists saved through the API in a JSON file
+    - ``all``: every symbol; never resolved to a list, loaders read unfiltered
+
+    Files are re-read only when their mtime changes; sector memberships are
+    kept for ``sector_ttl`` seconds.
+    """
+
+    def __init__(
+        self,
+        watchlist_path: Callable[[], str] = lambda: settings.watchlist_path,
+        custom_path: Callable[[], str] = lambda: settings.universe_path,
+        session_factory: Callable[[], Session] = SessionLocal,
+        sector_ttl: float = 300.0,
+    ):
+        self.watchlist_path = watchlist_path
+        self.custom_path = custom_path
+        self.session_factory = session_factory
+        self.sector_ttl = sector_ttl
+        self._files: Dict[str, _FileEntry] = {}
+        self._sectors: Dict[Tuple[int, int], Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+
+    def _read_file(self, path: str, parse: Callable[[str], object]) -> Optional[object]:
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            self._files.pop(path, None)
+            return None
+        entry = self._files.get(path)
+        if entry is None or entry.mtime != mtime:
+            with open(path, "r") as f:
+                entry = _FileEntry(mtime, parse(f.read()))
+            self._files[path] = entry
+            logger.info(f"Loaded universe file {path}")
+        return entry.value
+
+    def _watchlist(self) -> List[str]:
+        path = self.watchlist_path()
+        symbols = self._read_file(path, lambda text: _clean(text.splitlines()))
+        if symbols is None:
+            raise UniverseNotFound(f"Watchlist not found at {path}")
+        return symbols
+
+    def _custom(self) -> Dict[str, List[str]]:
+        return self._read_file(self.custom_path(), json.loads) or {}
+
+    def _sector(self, level: int, sector_id: int) -> List[str]:
+        cached = self._sectors.get((level, sector_id))
+        if cached is not None and time.monotonic() - cached[0] < self.sector_ttl:
+            return cached[1]
+        column = StockSymbol.id_sector_level_3 if level == 3 else StockSymbol.id_sector_level_4
+        db = self.session_factory()
+        try:
+            symbols = _clean(row[0] for row in db.query(StockSymbol.symbol).filter(column == sector_id))
+        finally:
+            db.close()
+        if not symbols:
+            raise UniverseNotFound(f"Sector {sector_id} at level {level} has no symbols")
+        self._sectors[(level, sector_id)] = (time.monotonic(), symbols)
+        return symbols
+
+    def resolve(self, universe_id: str) -> Optional[List[str]]:
+        """Return the sorted symbols of a universe (None for ``all``)."""
+        kind, _, rest = universe_id.partition(":")
+        with self._lock:
+            if universe_id == ALL:
+                return None
+            if universe_id == WATCHLIST:
+                return self._watchlist()
+            if kind == "custom" and rest:
+                symbols = self._custom().get(rest)
+                if symbols is None:
+                    raise UniverseNotFound(f"Custom universe {rest!r} not found")
+                return symbols
+            if kind == "sector":
+                level, _, sector_id = rest.partition(":")
+                if level.isdigit() and int(level) in SECTOR_LEVELS and sector_id.isdigit():
+                    return self._sector(int(level), int(sector_id))
+        raise UniverseNotFound(f"Unknown universe {universe_id!r}")
+
+    def list(self) -> Dict[str, int]:
+        """Watchlist and custom universes with their sizes (sectors are addressed by id)."""
+        universes = {}
+        with self._lock:
+            try:
+                universes[WATCHLIST] = len(self._watchlist())
+            except UniverseNotFound:
+                pass
+            for name, symbols in sorted(self._custom().items()):
+                universes[f"custom:{name}"] = len(symbols)
+        return universes
+
+    def _write_custom(self, lists: Dict[str, List[str]]) -> None:
+        path = self.custom_path()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(lists, f, indent=2, sort_keys=True)
+        os.replace(tmp, path)
+        self._files.pop(path, None)
+
+    def save_custom(self, name: str, symbols: List[str]) -> List[str]:
+        symbols = _clean(symbols)
+        with self._lock:
+            lists = dict(self._custom())
+            lists[name] = symbols
+            self._write_custom(lists)
+        return symbols
+
+    def delete_custom(self, name: str) -> bool:
+        with self._lock:
+            lists = dict(self._custom())
+            if lists.pop(name, None) is None:
+                return False
+            self._write_custom(lists)
+        return True
+
+
+universes = UniverseService()
+
+
+def resolve_symbols(symbols: Optional[List[str]], universe: Optional[str]) -> Optional[List[str]]:
+    """Symbols for a loader call: explicit symbols win, else the universe's members.
+
+    Raises ``ValueError`` when neither is given, so a forgotten filter can't
+    turn into a full-table read; pass ``universe="all"`` to read everything.
+    """
+    if symbols:
+        return symbols
+    if universe:
+        return universes.resolve(universe)
+    raise ValueError("Pass symbols or a universe id (use universe='all' to read every symbol)")
@@ -0,0 +1,259 @@
+"""Daily portfolio valuation snapshots, maintained incrementally.
+
+``portfolio_snapshots`` holds one row per (date, ticker) with the held
+quantity, close, market value, cost basis and P/L. Rows are only
+recomputed from the first affected date: a position or transaction change
+rewrites the rows from its date on, and a new stocks table version appends
+the days since the latest row. Summaries and performance charts read the
+rows instead of pricing every position on each request.
+
+Holdings on a date are the current positions purchased on or before it
+plus the lots closed after it: a sell that records a close price (as
+``close_position`` writes) held its quantity at its ``price`` from the
+ticker's first valued day (or earliest purchase) until the sale. Realized P/L accumulates from
+those sells. Rows before a change's effective date are never rewritten,
+and a ticker with neither a position nor a sell left (a deleted position)
+keeps every row it has, so a backdated change cannot erase the days a
+closed or deleted position was held.
+
+Changes only mark the snapshots dirty from a date; a single background
+worker does the Delta read and rewrite, off the request path. A failed
+revaluation is logged and stays dirty until the next change or new bars
+retry it.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sqlalchemy import delete, func, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.cache import version_poller
+from app.db.base import engine as default_engine
+from app.db.models.portfolio import PortfolioSnapshot, Position, Transaction
+from app.schemas.portfolio import PortfolioValuation
+from .price_history import load_closes
+
+# Calendar days of bars loaded before the first recomputed date, to carry the last close forward
+PRICE_LOOKBACK_DAYS = 14
+
+
+def _ticker(row) -> str:
+    return row.ticker.strip().upper()
+
+
+def compute_snapshots(
+    positions: List[Position],
+    sells: List[Transaction],
+    closes: pd.DataFrame,
+    since: date,
+    opened: Optional[Dict[str, date]] = None,
+) -> List[dict]:
+    """Snapshot rows from ``since`` for the given holdings and date x ticker closes.
+
+    Dates are the trading days in ``closes`` plus ``since`` and any later
+    purchase or sale date, so a change made before its day's bar lands is
+    valued right away. A ticker without a close yet is valued at its
+    average cost. ``opened`` maps tickers to the first day they were
+    valued; the lots their recorded sales closed count as held from then
+    until the sale.
+    """
+    opened = opened or {}
+    events = {since} | {p.purchase_date for p in positions} | {t.transaction_date for t in sells}
+    index = closes.index.union(pd.DatetimeIndex(sorted(pd.Timestamp(d) for d in events)))
+    closes = closes.reindex(index).ffill()
+    closes = closes.loc[closes.index >= pd.Timestamp(since)]
+    if closes.empty:
+        return []
+    dates = closes.index.to_numpy().astype("datetime64[D]")
+    tickers = list(closes.columns)
+    column = {t: j for j, t in enumerate(tickers)}
+
+    shape = (len(dates), len(tickers))
+    quantity, invested, realized = np.zeros(shape), np.zeros(shape), np.zeros(shape)
+
+    def first_row(day: date) -> int:
+        return int(np.searchsorted(dates, np.datetime64(day, "D")))
+
+    for p in positions:
+        j, k = column[_ticker(p)], first_row(p.purchase_date)
+        quantity[k:, j] += float(p.quantity)
+        invested[k:, j] += float(p.quantity) * float(p.purchase_price)
+    for t in sells:
+        if t.close_price is None:
+            continue
+        j, k = column[_ticker(t)], first_row(t.transaction_date)
+        if _ticker(t) in opened:
+            start = first_row(opened[_ticker(t)])
+            quantity[start:k, j] += float(t.quantity)
+            invested[start:k, j] += float(t.quantity) * float(t.price)
+        realized[k:, j] += (float(t.close_price) - float(t.price)) * float(t.quantity) - float(t.fees or 0)
+
+    price = closes.to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cost = np.where(quantity > 0, invested / quantity, 0.0)
+    value = quantity * np.where(np.isnan(price), cost, price)
+
+    rows = []
+    for i, j in zip(*np.nonzero((quantity > 0) | (realized != 0))):
+        rows.append({
+            "date": pd.Timestamp(dates[i]).date(),
+            "ticker": tickers[j],
+            "quantity": float(quantity[i, j]),
+            "close": None if np.isnan(price[i, j]) else float(price[i, j]),
+            "value": float(value[i, j]),
+            "invested": float(invested[i, j]),
+            "profit_loss": float(value[i, j] - invested[i, j]),
+            "realized_profit_loss": float(realized[i, j]),
+        })
+    return rows
+
+
+def refresh_snapshots(db: Session, since: Optional[date] = None) -> int:
+    """Recompute snapshot rows from ``since`` and return how many were written.
+
+    Without ``since`` the latest stored day is recomputed (its bar may have
+    been missing or revised) along with every day after it.
+    """
+    positions = db.query(Position).all()
+    sells = db.query(Transaction).filter(Transaction.transaction_type == "sell").all()
+    if since is None:
+        since = db.query(func.max(PortfolioSnapshot.date)).scalar()
+    if since is None:
+        dates = [p.purchase_date for p in positions] + [t.transaction_date for t in sells]
+        if not dates:
+            return 0
+        since = min(dates)
+
+    tickers = sorted({_ticker(row) for row in positions + sells})
+    valued = dict(
+        db.query(PortfolioSnapshot.ticker, func.min(PortfolioSnapshot.date)).group_by(PortfolioSnapshot.ticker).all()
+    )
+    # Before a ticker is first valued, its lots are taken as opened with its earliest remaining purchase
+    opened = dict(valued)
+    for p in positions:
+        opened[_ticker(p)] = min(opened.get(_ticker(p), p.purchase_date), p.purchase_date)
+    rows = []
+    if tickers:
+        closes = load_closes(tickers, since - timedelta(days=PRICE_LOOKBACK_DAYS))
+        rows = compute_snapshots(positions, sells, closes, since, opened)
+
+    # Nothing is left to rebuild a deleted position's days from, so they stay as valued
+    gone = set(valued) - set(tickers)
+    db.execute(
+        delete(PortfolioSnapshot).where(PortfolioSnapshot.date >= since, PortfolioSnapshot.ticker.not_in(gone))
+    )
+    if rows:
+        db.execute(insert(PortfolioSnapshot), rows)
+    db.commit()
+    return len(rows)
+
+
+# Earliest date to revalue per database; None means from the latest stored day
+_dirty: Dict[Engine, Optional[date]] = {}
+_dirty_lock = threading.Lock()
+_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="revalue")
+
+
+def _mark_dirty(bind: Engine, since: Optional[date]) -> None:
+    with _dirty_lock:
+        if bind not in _dirty:
+            _dirty[bind] = since
+        elif since is not None:
+            current = _dirty[bind]
+            _dirty[bind] = since if current is None else min(current, since)
+
+
+def _revalue(bind: Engine) -> None:
+    with _dirty_lock:
+        if bind not in _dirty:
+            return
+        since = _dirty.pop(bind)
+    db = Session(bind=bind, autoflush=False)
+    try:
+        written = refresh_snapshots(db, since)
+        logger.debug(f"Revalued portfolio from {since}: {written} snapshot rows")
+    except Exception as e:
+        db.rollback()
+        _mark_dirty(bind, since)
+        logger.warning(f"Could not revalue portfolio snapshots from {since}, left dirty for a retry: {e}")
+    finally:
+        db.close()
+
+
+def revalue_from(db: Session, since: Optional[date]) -> None:
+    """Mark the snapshots from ``since`` dirty and revalue them in the background."""
+    bind = db.get_bind()
+    _mark_dirty(bind, since)
+    _worker.submit(_revalue, bind)
+
+
+def wait_for_revaluation() -> None:
+    """Block until every revaluation scheduled so far has run."""
+    _worker.submit(lambda: None).result()
+
+
+def latest_snapshot(db: Session) -> Dict[str, PortfolioSnapshot]:
+    """Snapshot rows of the latest valued day by ticker.
+
+    The first read of an unbuilt table schedules the build in the background
+    and returns no rows rather than waiting for it on the request path.
+    """
+    latest = db.query(func.max(PortfolioSnapshot.date)).scalar()
+    if latest is None:
+        if db.query(Position.id).first() is not None:
+            revalue_from(db, None)
+        return {}
+    rows = db.query(PortfolioSnapshot).filter(PortfolioSnapshot.date == latest).all()
+    return {row.ticker: row for row in rows}
+
+
+def get_valuation_history(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    ticker: Optional[str] = None,
+) -> List[PortfolioValuation]:
+    """Daily totals of the snapshot rows, optionally for a single ticker."""
+    query = db.query(
+        PortfolioSnapshot.date,
+        func.sum(PortfolioSnapshot.value),
+        func.sum(PortfolioSnapshot.invested),
+        func.sum(PortfolioSnapshot.profit_loss),
+        func.sum(PortfolioSnapshot.realized_profit_loss),
+    )
+    if start_date is not None:
+        query = query.filter(PortfolioSnapshot.date >= start_date)
+    if end_date is not None:
+        query = query.filter(PortfolioSnapshot.date <= end_date)
+    if ticker is not None:
+        query = query.filter(PortfolioSnapshot.ticker == ticker.strip().upper())
+    rows = query.group_by(PortfolioSnapshot.date).order_by(PortfolioSnapshot.date).all()
+    return [
+        PortfolioValuation(
+            date=day, value=value, invested=invested, profit_loss=profit_loss, realized_profit_loss=realized
+        )
+        for day, value, invested, profit_loss, realized in rows
+    ]
+
+
+def _refresh_latest() -> None:
+    # On the revaluation worker, so it never overlaps a change's rewrite;
+    # also retries any revaluation left dirty by a failure
+    _mark_dirty(default_engine, None)
+    _worker.submit(_revalue, default_engine).result()
+
+
+async def refresh_on_new_bars(table: str, old_version: Optional[int], new_version: int) -> None:
+    """Value the new days when the stocks table moves (and catch up on startup)."""
+    if table == "stocks":
+        await asyncio.to_thread(_refresh_latest)
+
+
+version_poller.subscribe(refresh_on_new_bars)
@@ -0,0 +1,225 @@
+import asyncio
+import time
+from dataclasses import replace
+from datetime import timedelta
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from app.schemas.portfolio import (
+    OptimizationMethod,
+    WalkForwardRebalance,
+    WalkForwardRequest,
+    WalkForwardResult,
+)
+from .constrained import ConstraintSet
+from .downsampling import bucket_edges
+from .optimizers import get_pool, run_method
+from .portfolio_service import _constraint_set
+from .risk_model import TRADING_DAYS, RiskModel, load_prices
+
+# Methods that read the window's returns matrix rather than only mu and the covariance
+_RETURNS_METHODS = (OptimizationMethod.HRP, OptimizationMethod.CVAR)
+
+
+def rebalance_indices(dates: np.ndarray, first: int, interval: str, every: int = 1) -> np.ndarray:
+    """Row offsets of the rebalance days: ``first``, then every ``every``-th period start after it."""
+    starts = bucket_edges(dates, interval)[:-1]
+    return np.concatenate(([first], starts[starts > first]))[::every]
+
+
+def window_models(
+    prices: pd.DataFrame, indices: np.ndarray, lookback: int, frequency: int = TRADING_DAYS
+) -> List[RiskModel]:
+    """Risk model of the ``lookback`` returns before each rebalance.
+
+    The first window is built from scratch; each later one extends the
+    previous model with the bars since the last rebalance and drops the
+    bars that left the window, so the running sums are never recomputed.
+    """
+    models = []
+    model, previous = None, None
+    for t in indices:
+        if model is None:
+            model = RiskModel.from_prices(prices.iloc[t - lookback - 1:t], frequency)
+        else:
+            model = model.extended(prices.iloc[previous:t], start=prices.index[t - lookback - 1])
+        models.append(model)
+        previous = t
+    return models
+
+
+class _Simulator:
+    """Portfolio value through successive rebalances, with proportional costs.
+
+    Weights are set at the close of the day before a rebalance index and
+    drift with asset returns until the next one.
+    """
+
+    def __init__(self, returns: np.ndarray, start: int, cost_rate: float):
+        self.returns = returns
+        self.cost_rate = cost_rate
+        self.value = 1.0
+        self.weights = np.zeros(returns.shape[1])
+        self.equity = [1.0]
+        self.position = start
+
+    def rebalance(self, target: np.ndarray) -> Tuple[float, float]:
+        turnover = float(np.abs(target - self.weights).sum())
+        cost = self.value * turnover * self.cost_rate
+        self.value -= cost
+        self.weights = target
+        return turnover, cost
+
+    def advance(self, end: int) -> None:
+        growth = np.cumprod(1 + self.returns[self.position:end], axis=0)
+        if not len(growth):
+            return
+        path = self.value * (growth @ self.weights)
+        self.equity.extend(path.tolist())
+        self.value = float(path[-1])
+        drifted = self.weights * growth[-1]
+        self.weights = drifted / drifted.sum()
+        self.position = end
+
+
+def _solve_window(
+    method: OptimizationMethod, model: RiskModel, covariance: str, risk_free_rate: float,
+    constraints: Optional[ConstraintSet],
+):
+    # Symbols listed inside the window are left out of it rather than given a made-up history
+    complete = model.complete
+    if not complete.all():
+        model = model.subset(complete)
+        constraints = constraints.subset(complete) if constraints is not None else None
+    returns = model.returns if method in _RETURNS_METHODS else None
+    return method, model.mu, model.cov(covariance), returns, risk_free_rate, constraints
+
+
+def _weights(result, symbols: List[str]) -> np.ndarray:
+    return np.array([result.weights.get(s, 0.0) for s in symbols])
+
+
+def _stats(equity: np.ndarray, risk_free_rate: float) -> dict:
+    daily = np.diff(equity) / equity[:-1]
+    years = len(daily) / TRADING_DAYS
+    annual_return = equity[-1] ** (1 / years) - 1 if years > 0 else 0.0
+    volatility = float(daily.std(ddof=1) * np.sqrt(TRADING_DAYS)) if len(daily) > 1 else 0.0
+    return {
+        "total_return": float(equity[-1] - 1),
+        "annualized_return": float(annual_return),
+        "annualized_volatility": volatility,
+        "sharpe_ratio": float((annual_return - risk_free_rate) / volatility) if volatility else 0.0,
+        "max_drawdown": float((1 - equity / np.maximum.accumulate(equity)).max()),
+    }
+
+
+async def run_walk_forward(db: Optional[Session], req: WalkForwardRequest) -> WalkForwardResult:
+    """Walk-forward optimization of ``req.method`` with monthly/weekly rebalances.
+
+    Window risk models come from rolling updates of one model; each window
+    only optimizes the symbols priced over its whole lookback. Without a
+    turnover limit the windows are independent and solved in the worker
+    pool; with one, each window depends on the drifted weights of the
+    previous and they are solved in order (on a thread, reusing the warm
+    constrained programs).
+    """
+    total_start = time.perf_counter()
+    timing = {}
+    risk_free_rate = req.risk_free_rate or 0.0
+    data_start = req.start_date - timedelta(days=int(req.lookback * 7 / 5) + 30)
+    tickers = sorted({t.strip().upper() for t in req.tickers})
+    prices = await asyncio.to_thread(load_prices, tickers, data_start, req.end_date)
+    if prices.empty:
+        raise ValueError(f"No price data for {', '.join(tickers)}")
+    dates = prices.index.to_numpy().astype("datetime64[D]")
+    first = int(np.searchsorted(dates, np.datetime64(req.start_date, "D")))
+    if first < req.lookback + 1:
+        raise ValueError(f"Not enough history before {req.start_date} for a {req.lookback}-day lookback")
+    if first >= len(dates):
+        raise ValueError(f"No prices on or after {req.start_date}")
+    symbols = list(prices.columns)
+
+    constraints = req.constraints
+    max_turnover = constraints.max_turnover if constraints is not None else None
+    if constraints is not None:
+        constraints = constraints.model_copy(update={"max_turnover": None})
+    cs = _constraint_set(db, constraints, prices.iloc[-1])
+    timing["data"] = time.perf_counter() - total_start
+
+    step_start = time.perf_counter()
+    indices = rebalance_indices(dates, first, req.rebalance, req.rebalance_every)
+    models = await asyncio.to_thread(window_models, prices, indices, req.lookback)
+    timing["risk_models"] = time.perf_counter() - step_start
+
+    # Not yet listed: no return, and never held
+    returns = np.nan_to_num(prices.pct_change().to_numpy())
+    simulator = _Simulator(returns, first, req.transaction_cost_bps / 10_000)
+    rebalances: List[WalkForwardRebalance] = []
+    bounds = list(indices[1:]) + [len(dates)]
+
+    def apply(i: int, target: Optional[np.ndarray], error: Optional[str]) -> None:
+        if target is None:
+            # Keep the current (drifted) weights, or start equal-weighted
+            target = simulator.weights if simulator.weights.any() else np.full(len(symbols), 1 / len(symbols))
+        turnover, cost = simulator.rebalance(target)
+        rebalances.append(WalkForwardRebalance(
+            date=pd.Timestamp(dates[indices[i]]).date(),
+            weights={s: float(w) for s, w in zip(symbols, target) if w != 0},
+            turnover=turnover,
+            cost=cost,
+            error=error,
+        ))
+        simulator.advance(bounds[i])
+
+    step_start = time.perf_counter()
+    if max_turnover is None:
+        loop = asyncio.get_running_loop()
+        pool = get_pool()
+        outcomes = await asyncio.gather(*(
+            loop.run_in_executor(pool, run_method, *_solve_window(req.method, m, req.covariance.value, risk_free_rate, cs))
+            for m in models
+        ), return_exceptions=True)
+        timing["optimization"] = time.perf_counter() - step_start
+        step_start = time.perf_counter()
+        for i, outcome in enumerate(outcomes):
+            if isinstance(outcome, Exception):
+                apply(i, None, str(outcome))
+            else:
+                apply(i, _weights(outcome[0], symbols), None)
+    else:
+        def sequential():
+            for i, m in enumerate(models):
+                window_cs = cs
+                if simulator.weights.any():
+                    window_cs = replace(cs, current=simulator.weights, max_turnover=max_turnover)
+                try:
+                    result, _ = run_method(*_solve_window(req.method, m, req.covariance.value, risk_free_rate, window_cs))
+                except Exception as e:
+                    apply(i, None, str(e))
+                    continue
+                apply(i, _weights(result, symbols), None)
+
+        await asyncio.to_thread(sequential)
+        timing["optimization"] = time.perf_counter() - step_start
+        step_start = time.perf_counter()
+
+    failed = sum(1 for r in rebalances if r.error)
+    if failed:
+        logger.warning(f"Walk-forward {req.method.value}: {failed}/{len(rebalances)} rebalances kept previous weights")
+    equity = np.array(simulator.equity)
+    timing["simulation"] = time.perf_counter() - step_start
+    timing["total"] = time.perf_counter() - total_start
+    return WalkForwardResult(
+        method=req.method,
+        dates=[pd.Timestamp(d).date() for d in dates[first - 1:]],
+        equity=equity.tolist(),
+        rebalances=rebalances,
+        total_turnover=float(sum(r.turnover for r in rebalances)),
+        total_costs=float(sum(r.cost for r in rebalances)),
+        timing=timing,
+        **_stats(equity, risk_free_rate),
+    )
@@ -0,0 +1,107 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from deltalake import DeltaTable
+from loguru import logger
+
+from app.core.metrics import DeltaScan, track_delta_scan
+from app.core.settings import settings
+
+
+class PushdownError(RuntimeError):
+    """A filter could not be pushed into a Delta scan and strict mode is on."""
+
+
+def build_filter(
+    symbols: Optional[list] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    equals: Optional[Dict[str, Any]] = None,
+) -> Optional[ds.Expression]:
+    """Build the ``symbol``/``date`` filter shared by the Delta loaders.
+
+    ``equals`` adds ``column == value`` terms for tables keyed on other
+    columns. Returns None when nothing is filtered; invalid bounds raise
+    instead of being dropped, so a bad filter never turns into a full-table
+    read.
+    """
+    expr = None
+    for column, value in (equals or {}).items():
+        e = ds.field(column) == value
+        expr = e if expr is None else (expr & e)
+    if start is not None:
+        e = ds.field("date") >= pa.scalar(pd.Timestamp(start).to_pydatetime())
+        expr = e if expr is None else (expr & e)
+    if end is not None:
+        e = ds.field("date") <= pa.scalar(pd.Timestamp(end).to_pydatetime())
+        expr = e if expr is None else (expr & e)
+    if symbols:
+        e = ds.field("symbol").isin(list(symbols))
+        expr = e if expr is None else (expr & e)
+    return expr
+
+
+def _pruned_table(
+    dataset: ds.FileSystemDataset,
+    filt: ds.Expression,
+    columns: Optional[List[str]],
+    scan: DeltaScan,
+) -> pa.Table:
+    # File-level pruning uses the Delta log's min/max stats, then each
+    # remaining file is split into the row groups its footer stats can't rule out
+    scan.files_total = sum(1 for _ in dataset.get_fragments())
+    row_groups = []
+    for fragment in dataset.get_fragments(filter=filt):
+        scan.files_scanned += 1
+        scan.row_groups_total += fragment.num_row_groups
+        row_groups.extend(fragment.split_by_row_group(filt))
+    scan.row_groups_scanned = len(row_groups)
+    pruned = ds.FileSystemDataset(row_groups, dataset.schema, dataset.format, dataset.filesystem)
+    return pruned.to_table(filter=filt, columns=columns)
+
+
+def scan_delta(
+    table_uri: str,
+    *,
+    symbols: Optional[list] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    columns: Optional[List[str]] = None,
+    equals: Optional[Dict[str, Any]] = None,
+    strict: Optional[bool] = None,
+) -> Tuple[pa.Table, DeltaScan]:
+    """Read a Delta table with ``symbol``/``date`` predicates pushed down.
+
+    Returns the table together with the scan statistics (files and row
+    groups pruned, rows and bytes read, whether pushdown applied). When the
+    filter cannot be built or applied the scan falls back to an unfiltered
+    read and logs a warning, or raises ``PushdownError`` in strict mode
+    (``settings.delta_scan_strict`` unless overridden).
+    """
+    strict = settings.delta_scan_strict if strict is None else strict
+    with track_delta_scan(table_uri) as scan:
+        dt = DeltaTable(table_uri, storage_options=settings.delta_storage_options)
+        dataset = dt.to_pyarrow_dataset()
+        try:
+            filt = build_filter(symbols, start, end, equals)
+            if filt is None:
+                table = dataset.to_table(columns=columns)
+            else:
+                table = _pruned_table(dataset, filt, columns, scan)
+                scan.pushdown = True
+        except Exception as e:
+            if strict:
+                raise PushdownError(f"Filter could not be pushed down on {table_uri}: {e}") from e
+            logger.warning(f"Filter pushdown failed on {table_uri}, reading unfiltered: {e}")
+            scan.pushdown = False
+            scan.files_total = scan.files_scanned = scan.row_groups_total = scan.row_groups_scanned = 0
+            table = dataset.to_table(columns=columns)
+        scan.record(table)
+    logger.debug(
+        f"Delta scan {table_uri}: pushdown={scan.pushdown} files {scan.files_scanned}/{scan.files_total} "
+        f"row groups {scan.row_groups_scanned}/{scan.row_groups_total} rows={scan.rows} bytes={scan.bytes}"
+    )
+    return table, scan
@@ -0,0 +1,211 @@
+"""Layout inspection and optimization for the Delta tables the API reads.
+
+Every read path filters on a key column (``symbol``, ``sector_type``,
+``mack``) and usually on ``date``, so scan cost depends on how well per-file
+min/max statistics let the reader skip files. This module reports file
+counts, the small-file ratio and how many files a single key spans, runs
+compaction / Z-ordering through ``deltalake`` and measures the bytes that
+our standard queries have to read before and after.
+
+    python -m app.stores.maintenance inspect
+    python -m app.stores.maintenance optimize --table stocks --table feature_store
+"""
+import argparse
+import posixpath
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+from deltalake import DeltaTable
+
+from app.core.settings import settings
+
+MB = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class MaintenanceTarget:
+    name: str
+    uri: Callable[[], str]
+    z_order: Tuple[str, ...]
+
+    @property
+    def key(self) -> str:
+        return self.z_order[0]
+
+
+TARGETS: Dict[str, MaintenanceTarget] = {
+    t.name: t for t in (
+        MaintenanceTarget("stocks", lambda: settings.stocks_delta_table, ("symbol", "date")),
+        MaintenanceTarget("feature_store", lambda: settings.stocks_feature_store, ("symbol", "date")),
+        MaintenanceTarget("sector", lambda: settings.sector_delta_table, ("sector_type", "date")),
+        MaintenanceTarget("wichart_report", lambda: settings.wichart_report_delta_table, ("mack",)),
+    )
+}
+
+
+@dataclass
+class ScanEstimate:
+    files: int
+    bytes: int
+
+
+@dataclass
+class TableLayout:
+    name: str
+    version: int
+    files: int
+    total_bytes: int
+    small_files: int
+    partition_columns: List[str]
+    # Average number of files whose min/max range covers one key value
+    files_per_key: float
+    queries: Dict[str, ScanEstimate] = field(default_factory=dict)
+
+    @property
+    def small_file_ratio(self) -> float:
+        return self.small_files / self.files if self.files else 0.0
+
+
+def _add_actions(dt: DeltaTable) -> pa.Table:
+    return pa.table(dt.get_add_actions(flatten=True))
+
+
+def _sample_keys(actions: pa.Table, key: str, limit: int = 20) -> list:
+    column = f"min.{key}"
+    if column not in actions.column_names:
+        return []
+    values = sorted({v for v in actions.column(column).to_pylist() if v is not None})
+    step = max(len(values) // limit, 1)
+    return values[::step][:limit]
+
+
+def _files_per_key(actions: pa.Table, key: str, samples: list) -> float:
+    if not samples or f"min.{key}" not in actions.column_names:
+        return float(actions.num_rows)
+    lows = actions.column(f"min.{key}").to_pylist()
+    highs = actions.column(f"max.{key}").to_pylist()
+    spans = [
+        sum(1 for lo, hi in zip(lows, highs) if lo is None or hi is None or lo <= value <= hi)
+        for value in samples
+    ]
+    return sum(spans) / len(spans)
+
+
+def standard_queries(target: MaintenanceTarget, actions: pa.Table) -> Dict[str, ds.Expression]:
+    """The filters our read paths issue, instantiated with values from the table's own stats."""
+    queries: Dict[str, ds.Expression] = {}
+    samples = _sample_keys(actions, target.key)
+    if samples:
+        one_key = ds.field(target.key) == samples[len(samples) // 2]
+        queries[f"one_{target.key}"] = one_key
+    if "max.date" in actions.column_names:
+        last = max(v for v in actions.column("max.date").to_pylist() if v is not None)
+        queries["last_30d"] = ds.field("date") >= pa.scalar(last - timedelta(days=30))
+        if samples:
+            queries[f"one_{target.key}_1y"] = one_key & (ds.field("date") >= pa.scalar(last - timedelta(days=365)))
+    return queries
+
+
+def estimate_scan(dt: DeltaTable, expr: ds.Expression, actions: Optional[pa.Table] = None) -> ScanEstimate:
+    """Files and bytes left to read once file statistics have pruned ``expr``."""
+    actions = actions if actions is not None else _add_actions(dt)
+    # Data file names are unique, so match fragments to add actions by basename
+    sizes = {
+        posixpath.basename(path): size
+        for path, size in zip(actions.column("path").to_pylist(), actions.column("size_bytes").to_pylist())
+    }
+    files, total = 0, 0
+    for fragment in dt.to_pyarrow_dataset().get_fragments(filter=expr):
+        files += 1
+        total += sizes.get(posixpath.basename(fragment.path), 0)
+    return ScanEstimate(files=files, bytes=total)
+
+
+def inspect_table(target: MaintenanceTarget, small_file_bytes: int = 32 * MB) -> TableLayout:
+    dt = DeltaTable(target.uri(), storage_options=settings.delta_storage_options)
+    actions = _add_actions(dt)
+    sizes = actions.column("size_bytes").to_pylist()
+    queries = standard_queries(target, actions)
+    return TableLayout(
+        name=target.name,
+        version=dt.version(),
+        files=len(sizes),
+        total_bytes=sum(sizes),
+        small_files=sum(1 for size in sizes if size < small_file_bytes),
+        partition_columns=list(dt.metadata().partition_columns),
+        files_per_key=_files_per_key(actions, target.key, _sample_keys(actions, target.key)),
+        queries={name: estimate_scan(dt, expr, actions) for name, expr in queries.items()},
+    )
+
+
+def advise(target: MaintenanceTarget, layout: TableLayout) -> List[str]:
+    """Plain-language recommendations for a table layout."""
+    advice = []
+    if layout.files > 1 and layout.small_file_ratio > 0.3:
+        advice.append(f"compact: {layout.small_files}/{layout.files} files are small")
+    if layout.files_per_key > 1.5:
+        advice.append(
+            f"z-order by ({', '.join(target.z_order)}): one {target.key} spans "
+            f"{layout.files_per_key:.1f} files on average"
+        )
+    if not layout.partition_columns and "date" in target.z_order and layout.total_bytes > 50 * 1024 * MB:
+        advice.append("consider partitioning by year of date (requires a rewrite)")
+    return advice
+
+
+def optimize_table(target: MaintenanceTarget, target_size: Optional[int] = None) -> dict:
+    """Z-order the table by its key columns (plain compaction for a single key)."""
+    dt = DeltaTable(target.uri(), storage_options=settings.delta_storage_options)
+    if len(target.z_order) > 1:
+        return dt.optimize.z_order(list(target.z_order), target_size=target_size)
+    return dt.optimize.compact(target_size=target_size)
+
+
+def _format_bytes(n: int) -> str:
+    return f"{n / MB:.1f} MB"
+
+
+def report(layout: TableLayout, advice: List[str], before: Optional[TableLayout] = None) -> str:
+    lines = [
+        f"[{layout.name}] version {layout.version}: {layout.files} files, {_format_bytes(layout.total_bytes)}, "
+        f"small-file ratio {layout.small_file_ratio:.0%}, files per key {layout.files_per_key:.1f}",
+    ]
+    for name, scan in layout.queries.items():
+        line = f"  {name}: {scan.files} files, {_format_bytes(scan.bytes)}"
+        previous = before.queries.get(name) if before else None
+        if previous and previous.bytes:
+            line += f" (was {_format_bytes(previous.bytes)}, {1 - scan.bytes / previous.bytes:+.0%} reduction)"
+        lines.append(line)
+    lines.extend(f"  advice: {a}" for a in advice)
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["inspect", "optimize"])
+    parser.add_argument("--table", action="append", choices=sorted(TARGETS), help="default: all tables")
+    parser.add_argument("--small-file-mb", type=int, default=32)
+    parser.add_argument("--target-size-mb", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    for name in args.table or sorted(TARGETS):
+        target = TARGETS[name]
+        try:
+            before = inspect_table(target, args.small_file_mb * MB)
+        except Exception as e:
+            print(f"[{name}] could not open {target.uri()}: {e}")
+            continue
+        if args.command == "inspect":
+            print(report(before, advise(target, before)))
+            continue
+        metrics = optimize_table(target, args.target_size_mb * MB if args.target_size_mb else None)
+        print(f"[{name}] optimize: {metrics.get('numFilesRemoved')} files removed, {metrics.get('numFilesAdded')} added")
+        after = inspect_table(target, args.small_file_mb * MB)
+        print(report(after, advise(target, after), before))
+
+
+if __name__ == "__main__":
+    main()
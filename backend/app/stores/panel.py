@@ -0,0 +1,92 @@
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from numba import njit
+
+
+@dataclass
+class PricePanel:
+    """Date x symbol matrices built straight from a long Arrow table.
+
+    ``dates`` is sorted and unique, ``symbols`` sorted. All fields live in
+    one ``(len(dates), len(field_names) * len(symbols))`` block, field-major,
+    with NaN where a symbol has no row for a date; ``fields`` hands out views.
+    """
+    dates: np.ndarray
+    symbols: List[str]
+    field_names: List[str]
+    block: np.ndarray
+
+    @property
+    def fields(self) -> Dict[str, np.ndarray]:
+        n = len(self.symbols)
+        return {name: self.block[:, i * n:(i + 1) * n] for i, name in enumerate(self.field_names)}
+
+    def fill(self) -> "PricePanel":
+        """Back- then forward-fill every column in place, like ``bfill().ffill()``."""
+        _bfill_ffill(self.block)
+        return self
+
+    def to_frame(self) -> pd.DataFrame:
+        """Wide frame with ``(field, symbol)`` columns, as ``unstack`` on a long frame gives.
+
+        The frame wraps ``block`` without copying it.
+        """
+        columns = pd.MultiIndex.from_product([self.field_names, self.symbols], names=[None, "symbol"])
+        return pd.DataFrame(self.block, index=pd.DatetimeIndex(self.dates, name="date"), columns=columns, copy=False)
+
+
+@njit
+def _bfill_ffill(values):
+    n_rows, n_cols = values.shape
+    last = np.full(n_cols, np.nan)
+    for i in range(n_rows - 1, -1, -1):
+        for j in range(n_cols):
+            if np.isnan(values[i, j]):
+                values[i, j] = last[j]
+            else:
+                last[j] = values[i, j]
+    last[:] = np.nan
+    for i in range(n_rows):
+        for j in range(n_cols):
+            if np.isnan(values[i, j]):
+                values[i, j] = last[j]
+            else:
+                last[j] = values[i, j]
+
+
+def _codes(column: pa.ChunkedArray):
+    """Dictionary-encode ``column``; return (row codes, unique values) ranked in sort order."""
+    encoded = pc.dictionary_encode(column.combine_chunks())
+    order = pc.sort_indices(encoded.dictionary).to_numpy()
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return rank[encoded.indices.to_numpy(zero_copy_only=False)], encoded.dictionary.take(pa.array(order))
+
+
+def build_panel(table: pa.Table, fields: Sequence[str], date_column: str = "date", symbol_column: str = "symbol") -> PricePanel:
+    """Scatter a long ``(date, symbol, *fields)`` table into date x symbol matrices.
+
+    Dates and symbols are dictionary-encoded and ranked with Arrow compute,
+    so the long table is never sorted or converted to pandas; each field is
+    read once with ``to_numpy`` and written once into the panel block.
+    """
+    date_codes, dates = _codes(table.column(date_column))
+    symbol_codes, symbols = _codes(table.column(symbol_column))
+    n_symbols = len(symbols)
+    block = np.full((len(dates), len(fields) * n_symbols), np.nan)
+    for i, name in enumerate(fields):
+        values = table.column(name)
+        if not pa.types.is_floating(values.type):
+            values = pc.cast(values, pa.float64())
+        block[date_codes, symbol_codes + i * n_symbols] = values.to_numpy()
+    return PricePanel(
+        dates=dates.to_numpy(zero_copy_only=False),
+        symbols=symbols.to_pylist(),
+        field_names=list(fields),
+        block=block,
+    )
@@ -1,12 +1,15 @@
 import pandas as pd
 from deltalake import DeltaTable
 from app.core.settings import settings
+from app.core.metrics import track_delta_scan
 
 class WichartReportStore:
-    def get_data(self, mack: str | None = None) -> pd.DataFrame:
-        dt = DeltaTable(settings.wichart_report_delta_table, storage_options=settings.delta_storage_options)
-        if mack:
-            df = dt.to_pandas(filters=[("mack", "==", mack.upper())])
-        else:
-            df = dt.to_pandas()
+    def get_data(self, mack: str | None = None, columns: list | None = None) -> pd.DataFrame:
+        with track_delta_scan(settings.wichart_report_delta_table) as scan:
+            dt = DeltaTable(settings.wichart_report_delta_table, storage_options=settings.delta_storage_options)
+            if mack:
+                df = dt.to_pandas(columns=columns, filters=[("mack", "==", mack.upper())])
+            else:
+                df = dt.to_pandas(columns=columns)
+            scan.record(df)
         return df
@@ -0,0 +1,139 @@
+"""Latency of the sector and portfolio queries with and without the schema indexes.
+
+Builds one SQLite file with synthetic sectors, symbols, positions and
+transactions, then times each query on the baseline setup (no secondary
+indexes, default pragmas, one shared StaticPool connection) and on the
+tuned one (indexes from the models, ``make_engine`` with its pragmas).
+
+    python -m benchmarks.db_queries --symbols 2000 --transactions 300000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Only the temporary database is used; keep the app's default engine off portfolio.db
+os.environ["DATABASE_URL"] = os.environ["APP_DATABASE_URL"] = "sqlite://"
+
+import numpy as np
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.pool import StaticPool
+
+import app.db.base  # noqa: F401  registers models in the order the app imports them
+from app.db.base import Base, make_engine
+from app.db.models.market import Sector, StockSymbol
+from app.db.models.portfolio import Position, Transaction
+
+QUERIES = {
+    "sectors of a level": "SELECT id, name FROM sector WHERE level = 3",
+    "symbol lookup": "SELECT id, id_sector_level_3 FROM stock_symbol WHERE symbol = :symbol",
+    "symbols of a level-3 sector": "SELECT symbol FROM stock_symbol WHERE id_sector_level_3 = :sector",
+    "symbols of a level-4 sector": "SELECT symbol FROM stock_symbol WHERE id_sector_level_4 = :sector",
+    "positions of a ticker": "SELECT id, quantity FROM positions WHERE ticker = :symbol",
+    "transactions page": (
+        "SELECT id, ticker, quantity, price FROM transactions "
+        "ORDER BY transaction_date DESC, id DESC LIMIT 100"
+    ),
+    "transactions of a ticker, page": (
+        "SELECT id, quantity, price FROM transactions WHERE ticker = :symbol "
+        "AND (transaction_date, id) < (:day, :id) ORDER BY transaction_date DESC, id DESC LIMIT 100"
+    ),
+    "transactions in a date range": (
+        "SELECT count(*) FROM transactions WHERE transaction_date BETWEEN :day AND :end"
+    ),
+}
+
+
+def populate(url: str, n_symbols: int, n_transactions: int, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    symbols = [f"S{i:04d}" for i in range(n_symbols)]
+    start = date(2015, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(Sector), [{"id": i, "level": level, "name": f"Sector {level}.{i}"}
+                                      for level in (3, 4) for i in range(200)])
+        conn.execute(insert(StockSymbol), [
+            {"symbol": s, "id_sector_level_3": int(rng.integers(0, 200)), "id_sector_level_4": int(rng.integers(0, 200))}
+            for s in symbols
+        ])
+        conn.execute(insert(Position), [
+            {"ticker": symbols[int(rng.integers(0, n_symbols))], "quantity": 10, "purchase_price": 10,
+             "purchase_date": start + timedelta(days=int(rng.integers(0, 3000)))}
+            for _ in range(n_symbols)
+        ])
+        conn.execute(insert(Transaction), [
+            {"ticker": symbols[int(rng.integers(0, n_symbols))], "transaction_type": "buy", "quantity": 1,
+             "price": float(rng.uniform(5, 50)), "transaction_date": start + timedelta(days=int(rng.integers(0, 3000))),
+             "fees": 0}
+            for _ in range(n_transactions)
+        ])
+    engine.dispose()
+
+
+def drop_indexes(url: str) -> None:
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+        conn.execute(text("PRAGMA journal_mode=DELETE"))
+    engine.dispose()
+
+
+def create_indexes(url: str) -> None:
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+        conn.execute(text("ANALYZE"))
+    engine.dispose()
+
+
+def time_queries(engine, repeat: int) -> dict:
+    params = {"symbol": "S0042", "sector": 7, "day": "2020-06-01", "end": "2020-07-01", "id": 10**9}
+    timings = {}
+    with engine.connect() as conn:
+        for name, sql in QUERIES.items():
+            statement = text(sql)
+            conn.execute(statement, params).all()  # warm the page cache
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                conn.execute(statement, params).all()
+                samples.append(time.perf_counter() - start)
+            timings[name] = statistics.median(samples)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=2000)
+    parser.add_argument("--transactions", type=int, default=300_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        populate(url, args.symbols, args.transactions)
+
+        drop_indexes(url)
+        baseline = create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        before = time_queries(baseline, args.repeat)
+        baseline.dispose()
+
+        create_indexes(url)
+        tuned = make_engine(url)
+        after = time_queries(tuned, args.repeat)
+        tuned.dispose()
+
+    print(f"{'query':34s} {'before':>10s} {'after':>10s} {'speedup':>8s}")
+    for name in QUERIES:
+        print(f"{name:34s} {before[name] * 1e3:8.3f}ms {after[name] * 1e3:8.3f}ms {before[name] / after[name]:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Peak memory and time of building the backtest price panel.
+
+Compares the long-pandas path (to_pandas, to_datetime, sort, set_index,
+unstack, bfill, ffill) with the Arrow-native ``build_panel`` on the same
+in-memory Arrow table, so only the transformation is measured.
+
+    python -m benchmarks.panel_memory --symbols 1500 --days 2500
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from app.stores.panel import build_panel
+
+FIELDS = ["open", "high", "low", "close", "volume"]
+
+
+def make_table(n_symbols: int, n_days: int, seed: int = 0) -> pa.Table:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2015-01-01", periods=n_days).values.astype("datetime64[us]")
+    n = n_symbols * n_days
+    table = pa.table({
+        "date": np.tile(dates, n_symbols),
+        "symbol": np.repeat([f"S{i:04d}" for i in range(n_symbols)], n_days),
+        **{field: rng.uniform(1, 100, n) for field in FIELDS},
+    })
+    # Delta scans return rows in file order, not sorted
+    return table.take(pa.array(rng.permutation(n)))
+
+
+def pandas_path(table: pa.Table) -> pd.DataFrame:
+    pdf = table.to_pandas()
+    pdf["date"] = pd.to_datetime(pdf["date"])
+    pdf = pdf.sort_values(["symbol", "date"]).reset_index(drop=True)
+    pdf = pdf.set_index(["date", "symbol"]).sort_index()
+    return pdf.unstack(level=1).bfill().ffill()
+
+
+def arrow_path(table: pa.Table) -> pd.DataFrame:
+    return build_panel(table, FIELDS).fill().to_frame()
+
+
+def measure(fn, table: pa.Table):
+    arrow_before = pa.total_allocated_bytes()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(table)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    arrow_peak = pa.total_allocated_bytes() - arrow_before
+    return result, elapsed, peak, arrow_peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--days", type=int, default=2500)
+    args = parser.parse_args()
+
+    arrow_path(make_table(2, 10))  # compile the numba fill kernel outside the measurement
+    table = make_table(args.symbols, args.days)
+    print(f"input: {table.num_rows:,} rows, {table.nbytes / 2**20:.0f} MB Arrow")
+    results = {}
+    for name, fn in (("pandas", pandas_path), ("arrow", arrow_path)):
+        results[name], elapsed, peak, arrow_peak = measure(fn, table)
+        print(f"{name:>7}: {elapsed:6.2f}s  peak numpy/python {peak / 2**20:7.0f} MB  "
+              f"arrow retained {arrow_peak / 2**20:5.0f} MB")
+    np.testing.assert_array_equal(results["pandas"].to_numpy(), results["arrow"].to_numpy())
+
+
+if __name__ == "__main__":
+    main()
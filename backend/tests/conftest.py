@@ -0,0 +1,82 @@
+import os
+
+# TestClient runs endpoints on a portal thread; numba's TBB layer can hang at
+# interpreter exit when a parallel kernel is first launched off the main thread
+os.environ.setdefault("NUMBA_THREADING_LAYER", "workqueue")
+# Never open the tracked portfolio.db: anything not given its own engine gets an empty in-memory one
+os.environ["DATABASE_URL"] = os.environ["APP_DATABASE_URL"] = "sqlite://"
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+from deltalake import write_deltalake
+from fastapi_cache import FastAPICache
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.db.base  # noqa: F401  registers models in the order the app imports them
+from app.cache import BoundedMemoryBackend
+from app.core.settings import settings
+from app.db.base import Base
+
+
+@pytest.fixture
+def cache_backend():
+    FastAPICache.reset()
+    backend = BoundedMemoryBackend()
+    FastAPICache.init(backend, prefix="test")
+    yield backend
+    FastAPICache.reset()
+
+
+@pytest.fixture
+def session_factory():
+    """Sessions on an empty in-memory database with every table; threads share its one connection."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+def _ohlcv(symbols=("AAA", "BBB", "CCC"), days=300, seed=0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2023-01-02", periods=days)
+    frames = []
+    for i, symbol in enumerate(symbols):
+        close = 100 * (i + 1) * np.exp(np.cumsum(rng.normal(0, 0.01, days)))
+        frames.append(pd.DataFrame({
+            "date": dates,
+            "symbol": symbol,
+            "open": close * (1 + rng.normal(0, 0.002, days)),
+            "high": close * 1.01,
+            "low": close * 0.99,
+            "close": close,
+            "volume": rng.integers(1_000, 100_000, days).astype(float),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.fixture
+def make_ohlcv():
+    """Synthetic daily bars: ``make_ohlcv(symbols, days, seed)``, business days from 2023-01-02."""
+    return _ohlcv
+
+
+@pytest.fixture
+def stocks_table(tmp_path, monkeypatch):
+    """Local Delta stocks table, one file per symbol, wired into settings."""
+    path = str(tmp_path / "stocks")
+    df = _ohlcv()
+    for _, part in df.groupby("symbol"):
+        write_deltalake(path, pa.Table.from_pandas(part, preserve_index=False), mode="append")
+    monkeypatch.setattr(settings, "stocks_delta_table", path)
+    return path
@@ -0,0 +1,93 @@
+import io
+import json
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1.routes import portfolio as portfolio_routes
+from app.db.base import get_db
+from app.db.models.portfolio import Position, Transaction
+from app.main import app
+from app.services import bulk_io
+
+
+@pytest.fixture
+def client(monkeypatch, session_factory):
+    def override():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override
+    monkeypatch.setattr(portfolio_routes, "SessionLocal", session_factory)
+    # Valuation needs the stocks table; a failed revaluation must not affect the import
+    monkeypatch.setattr(bulk_io, "revalue_from", lambda db, since: None)
+    yield TestClient(app), session_factory
+    app.dependency_overrides.clear()
+
+
+CSV = b"""ticker,transaction_type,quantity,price,close_price,transaction_date,fees,notes
+aaa,buy,10,100.5,,2023-01-02,1,first
+BBB,hold,5,200,,2023-01-03,,
+CCC,sell,-1,abc,,2023-13-01,,
+DDD,sell,3,50,55,2023-02-01,0.5,
+"""
+
+
+def test_csv_import_inserts_valid_rows_and_reports_the_rest(client):
+    http, factory = client
+    response = http.post("/api/v1/portfolio/transactions/import", content=CSV, headers={"content-type": "text/csv"})
+    body = response.json()
+
+    assert response.status_code == 200
+    assert body["received"] == 4 and body["inserted"] == 2
+    assert [e["row"] for e in body["errors"]] == [1, 2]
+    assert body["errors"][0]["errors"] == ["transaction_type must be 'buy' or 'sell'"]
+    assert set(body["errors"][1]["errors"]) == {
+        "quantity must be positive", "price is not a number", "transaction_date is not a date (YYYY-MM-DD)",
+    }
+    rows = factory().query(Transaction).order_by(Transaction.id).all()
+    assert [(r.ticker, float(r.price), r.close_price, r.notes) for r in rows] == [
+        ("AAA", 100.5, None, "first"), ("DDD", 50.0, 55, None),
+    ]
+
+
+def test_atomic_import_inserts_nothing_on_errors(client):
+    http, factory = client
+    response = http.post("/api/v1/portfolio/transactions/import?atomic=true", content=CSV)
+    assert response.json()["inserted"] == 0 and factory().query(Transaction).count() == 0
+
+    missing = http.post("/api/v1/portfolio/positions/import", content=b"ticker,quantity\nAAA,1\n")
+    assert missing.status_code == 400 and "purchase_price" in missing.json()["detail"]
+
+
+@pytest.mark.parametrize("fmt", ["csv", "json", "arrow"])
+def test_export_round_trips_through_import(client, fmt):
+    http, factory = client
+    records = [
+        {"ticker": f"T{i}", "quantity": i + 1, "purchase_price": 10.25, "purchase_date": "2023-01-02"}
+        for i in range(12)
+    ]
+    response = http.post("/api/v1/portfolio/positions/import", content=json.dumps(records),
+                         headers={"content-type": "application/json"})
+    assert response.json()["inserted"] == 12
+
+    export = http.get(f"/api/v1/portfolio/positions/export?format={fmt}")
+    assert export.status_code == 200
+    if fmt == "arrow":
+        table = pa.ipc.open_stream(export.content).read_all()
+    elif fmt == "csv":
+        table = pa_csv.read_csv(io.BytesIO(export.content))
+    else:
+        table = pa.Table.from_pylist([json.loads(line) for line in export.content.splitlines()])
+    assert table.num_rows == 12 and table.column("ticker").to_pylist()[:2] == ["T0", "T1"]
+
+    again = http.post(f"/api/v1/portfolio/positions/import?format={fmt}", content=export.content)
+    assert again.json()["inserted"] == 12 and not again.json()["errors"]
+    db = factory()
+    assert db.query(Position).count() == 24
+    assert sorted(float(p.quantity) for p in db.query(Position).filter(Position.id > 12)) == list(range(1, 13))
@@ -0,0 +1,122 @@
+import asyncio
+
+from fastapi_cache import FastAPICache
+
+from app.cache import BoundedMemoryBackend, SQLiteBackend, cache
+
+
+async def test_bounded_backend_evicts_least_recently_used():
+    backend = BoundedMemoryBackend(max_bytes=300, compress_min_bytes=10_000)
+    await backend.set("a", b"x" * 100)
+    await backend.set("b", b"y" * 100)
+    await backend.set("c", b"z" * 100)
+    assert await backend.get("a") == b"x" * 100  # touch "a" so "b" is oldest
+    await backend.set("d", b"w" * 100)
+    assert await backend.get("b") is None
+    assert await backend.get("a") is not None
+    assert backend.size() == (3, 300)
+
+
+async def test_bounded_backend_compresses_large_payloads():
+    backend = BoundedMemoryBackend(max_bytes=10_000, compress_min_bytes=100)
+    payload = b'{"close": [1.0, 1.0, 1.0]}' * 200
+    await backend.set("k", payload)
+    assert backend.size()[1] < len(payload)
+    assert await backend.get("k") == payload
+
+
+async def test_concurrent_misses_compute_once():
+    FastAPICache.reset()
+    FastAPICache.init(BoundedMemoryBackend(), prefix="test")
+    calls = 0
+
+    @cache(expire=60)
+    async def slow(x: int) -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return x * 2
+
+    results = await asyncio.gather(*(slow(x=21) for _ in range(5)))
+    assert results == [42] * 5
+    assert calls == 1
+    assert await slow(x=21) == 42
+    assert calls == 1
+    FastAPICache.reset()
+
+
+async def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    writer = SQLiteBackend(path, max_bytes=10_000, compress_min_bytes=100)
+    reader = SQLiteBackend(path, max_bytes=10_000, compress_min_bytes=100)
+    payload = b'{"close": [1.0, 2.0]}' * 50
+    await writer.set("fastapi-cache:timeseries:k", payload, expire=60)
+    ttl, value = await reader.get_with_ttl("fastapi-cache:timeseries:k")
+    assert value == payload
+    assert 0 < ttl <= 60
+    assert await reader.clear(namespace="fastapi-cache:timeseries") == 1
+    assert await writer.get("fastapi-cache:timeseries:k") is None
+
+
+async def test_entries_follow_delta_table_version(tmp_path, monkeypatch):
+    import pyarrow as pa
+    from deltalake import write_deltalake
+
+    from app.cache import version_poller
+
+    table_path = str(tmp_path / "stocks")
+    write_deltalake(table_path, pa.table({"symbol": ["AAA"], "close": [1.0]}))
+    monkeypatch.setattr(version_poller, "tables", {"stocks": table_path})
+    monkeypatch.setattr(version_poller, "versions", {"stocks": None})
+    monkeypatch.setattr(version_poller, "_handles", {})
+    FastAPICache.reset()
+    FastAPICache.init(BoundedMemoryBackend(), prefix="test")
+    calls = 0
+
+    @cache(namespace="versioned", expire=1, depends_on=("stocks",))
+    async def compute() -> int:
+        nonlocal calls
+        calls += 1
+        return calls
+
+    await version_poller.poll()
+    assert await compute() == 1
+    assert await compute() == 1
+
+    write_deltalake(table_path, pa.table({"symbol": ["BBB"], "close": [2.0]}), mode="append")
+    await version_poller.poll()
+    assert version_poller.get("stocks") == 1
+    assert await compute() == 2
+    FastAPICache.reset()
+
+
+async def test_versioned_entries_skip_none_and_can_keep_their_ttl(monkeypatch):
+    from app.cache import version_poller
+
+    monkeypatch.setattr(version_poller, "versions", {"stocks": 3})
+    backend = BoundedMemoryBackend()
+    FastAPICache.reset()
+    FastAPICache.init(backend, prefix="test")
+    calls, expires = 0, []
+    original_set = backend.set
+
+    async def spy_set(key, value, expire=None):
+        expires.append(expire)
+        await original_set(key, value, expire)
+
+    monkeypatch.setattr(backend, "set", spy_set)
+
+    @cache(namespace="price", expire=300, depends_on=("stocks",), versioned_expire=True)
+    async def price(ticker: str):
+        nonlocal calls
+        calls += 1
+        return None if ticker == "MISSING" else 1.5
+
+    assert await price(ticker="MISSING") is None
+    assert await price(ticker="MISSING") is None
+    assert calls == 2 and expires == []
+
+    assert await price(ticker="AAA") == 1.5
+    assert await price(ticker="AAA") == 1.5
+    assert calls == 3 and expires == [300]
+    FastAPICache.reset()
@@ -0,0 +1,56 @@
+from app.cache import backtest_key_builder, timeseries_key_builder
+from app.cache.keys import NormalizedHitTracker
+from app.core.metrics import CACHE_NORMALIZED_HITS
+from app.core.settings import settings
+from app.schemas.backtest import BacktestRequest
+from app.schemas.timeseries import TimeseriesRequest
+
+
+def _endpoint():
+    pass
+
+
+def _ts_key(symbol, body):
+    return timeseries_key_builder(
+        _endpoint, "ns", args=(), kwargs={"symbol": symbol, "request": TimeseriesRequest(**body)}
+    )
+
+
+def test_timeseries_key_ignores_case_order_and_default_params():
+    a = _ts_key("vnm", {"indicators": [{"name": "rsi"}, {"name": "macd", "params": {"fastperiod": 12}}]})
+    b = _ts_key("VNM", {"indicators": [{"name": "MACD"}, {"name": "rsi", "params": {"timeperiod": 14.0}}]})
+    assert a == b
+    c = _ts_key("VNM", {"indicators": [{"name": "rsi", "params": {"timeperiod": 7}}]})
+    assert c != _ts_key("VNM", {"indicators": [{"name": "rsi"}]})
+
+
+def test_backtest_key_ignores_symbol_order_and_case(tmp_path, monkeypatch):
+    watchlist = tmp_path / "watchlist.csv"
+    watchlist.write_text("VNM\nFPT\n")
+    monkeypatch.setattr(settings, "watchlist_path", str(watchlist))
+
+    def key(symbols):
+        body = BacktestRequest(strategy="Squeeze Breakout", start_date="2024-01-01", symbols=symbols)
+        return backtest_key_builder(_endpoint, "ns", args=(), kwargs={"request": body})
+
+    assert key(["fpt", "VNM", "FPT"]) == key(["VNM", "FPT"])
+    assert key([]) == key(None) == key(["fpt", "vnm"])
+    assert key(["VNM"]) != key(["FPT"])
+
+
+def test_normalized_hits_count_each_new_spelling_once():
+    tracker = NormalizedHitTracker()
+    counter = CACHE_NORMALIZED_HITS.labels("tracker-test")
+    start = counter._value.get()
+
+    tracker.record_set("k", "raw-a")
+    tracker.record_hit("tracker-test", "k", "raw-a")
+    tracker.record_hit("tracker-test", "k", "raw-b")
+    tracker.record_hit("tracker-test", "k", "raw-b")
+    assert counter._value.get() == start + 1
+
+    # Repopulated by another spelling after an eviction: the first one still hits normally
+    tracker.record_set("k", "raw-c")
+    tracker.record_hit("tracker-test", "k", "raw-a")
+    tracker.record_hit("tracker-test", "k", "raw-c")
+    assert counter._value.get() == start + 1
@@ -0,0 +1,69 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+from pypfopt import EfficientFrontier
+
+from app.db.models.market import StockSymbol
+from app.db.models.portfolio import Position
+from app.schemas.portfolio import OptimizationConstraints, OptimizationMethod, OptimizationRequest
+from app.services import portfolio_service
+from app.services.constrained import ConstraintSet, max_sharpe
+from app.services.risk_model import RiskModel
+
+
+@pytest.fixture
+def db(db_session):
+    db_session.add_all([
+        StockSymbol(symbol="AAA", id_sector_level_3=10),
+        StockSymbol(symbol="BBB", id_sector_level_3=10),
+        StockSymbol(symbol="CCC", id_sector_level_3=20),
+        Position(ticker="AAA", quantity=10, purchase_price=100, purchase_date=date(2023, 1, 2)),
+    ])
+    db_session.commit()
+    return db_session
+
+
+def test_max_sharpe_matches_pypfopt_with_bounds_and_sector_cap():
+    rng = np.random.default_rng(0)
+    n = 12
+    returns = rng.normal(0.001, 0.02, (500, n)) + rng.normal(0, 0.01, (500, 1))
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)), columns=[f"S{i}" for i in range(n)])
+    model = RiskModel.from_prices(prices)
+    sectors = np.zeros((2, n))
+    sectors[0, :6] = sectors[1, 6:] = 1
+
+    ef = EfficientFrontier(model.mu, model.cov(), weight_bounds=(0, 0.2))
+    ef.add_constraint(lambda w: sectors[0] @ w <= 0.4)
+    ef.max_sharpe()
+    cs = ConstraintSet(np.zeros(n), np.full(n, 0.2), sectors[:1], np.array([0.4]))
+    for _ in range(2):  # second call reuses the compiled program
+        ours = max_sharpe(model.mu, model.cov(), cs)
+        np.testing.assert_allclose(ours.to_numpy(), np.array(list(ef.weights)), atol=1e-6)
+
+
+@pytest.mark.parametrize("method", list(OptimizationMethod))
+def test_every_method_honors_constraints(stocks_table, db, method):
+    constraints = OptimizationConstraints(max_weight=0.45, sector_caps={10: 0.6}, max_turnover=1.2)
+    req = OptimizationRequest(
+        tickers=["AAA", "BBB", "CCC"], start_date=date(2023, 1, 1), method=method,
+        risk_free_rate=-0.3, constraints=constraints,
+    )
+    weights = portfolio_service.optimize_portfolio(db, req).weights
+    w = np.array([weights.get(s, 0.0) for s in ("AAA", "BBB", "CCC")])
+    tol = 1e-4
+    assert abs(w.sum() - 1) < tol
+    assert w.max() <= 0.45 + tol
+    assert w[0] + w[1] <= 0.6 + tol
+    # Only AAA is held, so the current weights are (1, 0, 0)
+    assert np.abs(w - [1, 0, 0]).sum() <= 1.2 + tol
+
+
+def test_infeasible_constraints_raise(stocks_table, db):
+    req = OptimizationRequest(
+        tickers=["AAA", "BBB", "CCC"], start_date=date(2023, 1, 1), method=OptimizationMethod.HRP,
+        constraints={"max_weight": 0.3},
+    )
+    with pytest.raises(ValueError):
+        portfolio_service.optimize_portfolio(db, req)
@@ -0,0 +1,40 @@
+from sqlalchemy import select, text
+from sqlalchemy.pool import StaticPool
+
+from app.core.settings import settings
+from app.db.base import Base, make_engine
+from app.db.models.market import StockSymbol
+
+
+def test_file_engine_applies_pragmas_and_pools_connections(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    assert not isinstance(engine.pool, StaticPool)
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == -settings.sqlite_cache_size_kib
+        assert conn.execute(text("PRAGMA temp_store")).scalar() == 2  # MEMORY
+    engine.dispose()
+
+
+def test_memory_engine_shares_one_connection():
+    engine = make_engine("sqlite://")
+    assert isinstance(engine.pool, StaticPool)
+    Base.metadata.create_all(engine, tables=[StockSymbol.__table__])
+    with engine.connect() as conn:
+        assert conn.execute(select(StockSymbol)).all() == []
+
+
+def test_sector_lookups_use_the_indexes():
+    engine = make_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.connect() as conn:
+        for sql, index in [
+            ("SELECT symbol FROM stock_symbol WHERE id_sector_level_3 = 7", "ix_stock_symbol_sector_level_3"),
+            ("SELECT symbol FROM stock_symbol WHERE id_sector_level_4 = 7", "ix_stock_symbol_sector_level_4"),
+            ("SELECT id FROM stock_symbol WHERE symbol = 'AAA'", "ix_stock_symbol_symbol"),
+            ("SELECT id FROM sector WHERE level = 3", "ix_sector_level"),
+            ("SELECT id FROM positions WHERE purchase_date >= '2023-01-01'", "ix_positions_purchase_date"),
+        ]:
+            detail = " ".join(row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql)))
+            assert index in detail, (sql, detail)
@@ -0,0 +1,40 @@
+from datetime import datetime
+
+import pytest
+
+from app.stores.delta_scan import PushdownError, build_filter, scan_delta
+
+
+def test_symbol_filter_prunes_files(stocks_table):
+    table, scan = scan_delta(stocks_table, symbols=["BBB"], columns=["date", "symbol", "close"])
+    assert set(table.column("symbol").to_pylist()) == {"BBB"}
+    assert scan.pushdown is True
+    assert (scan.files_total, scan.files_scanned, scan.files_pruned) == (3, 1, 2)
+    assert scan.row_groups_scanned == scan.row_groups_total == 1
+    assert scan.rows == 300 and scan.bytes == table.nbytes
+
+
+def test_date_filter_reads_only_matching_rows(stocks_table):
+    table, scan = scan_delta(stocks_table, start=datetime(2023, 12, 1), end=datetime(2023, 12, 31))
+    assert scan.pushdown is True
+    assert scan.rows == table.num_rows == 3 * 21
+
+
+def test_no_filter_is_not_a_fallback(stocks_table):
+    table, scan = scan_delta(stocks_table)
+    assert scan.pushdown is None
+    assert table.num_rows == 900
+
+
+def test_bad_filter_falls_back_or_fails_in_strict_mode(stocks_table):
+    table, scan = scan_delta(stocks_table, start="not a date", strict=False)
+    assert scan.pushdown is False
+    assert table.num_rows == 900
+    with pytest.raises(PushdownError):
+        scan_delta(stocks_table, start="not a date", strict=True)
+
+
+def test_build_filter_rejects_invalid_bounds():
+    assert build_filter() is None
+    with pytest.raises(ValueError):
+        build_filter(start="not a date")
@@ -0,0 +1,127 @@
+from collections import deque
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.db.models.portfolio import Transaction
+from app.schemas.portfolio import LotMethod, TransactionCreate
+from app.services import portfolio_service
+from app.services.ledger import Ledger, _Batch, get_ledger, replay_ticker
+
+
+def _random_rows(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    rows, held, day = [], 0, date(2023, 1, 2)
+    for i in range(n):
+        day += timedelta(days=int(rng.integers(0, 3)))
+        if held and rng.random() < 0.4:
+            qty = int(rng.integers(1, held + 1))
+            rows.append(("AAA", day, i + 1, "sell", qty, float(rng.uniform(50, 150)), None, 1.0))
+            held -= qty
+        else:
+            qty = int(rng.integers(1, 50))
+            rows.append(("AAA", day, i + 1, "buy", qty, float(rng.uniform(50, 150)), None, 2.0))
+            held += qty
+    return rows
+
+
+def _reference(rows, method):
+    lots, realized = deque(), 0.0
+    for _, _, _, side, qty, price, _, fees in rows:
+        if side == "buy":
+            lots.append([qty, price + fees / qty])
+            if method == LotMethod.AVERAGE:
+                total = sum(q for q, _ in lots)
+                lots = deque([[total, sum(q * c for q, c in lots) / total]])
+            continue
+        realized += qty * price - fees
+        while qty > 1e-12:
+            take = min(qty, lots[0][0])
+            realized -= take * lots[0][1]
+            lots[0][0] -= take
+            qty -= take
+            if lots[0][0] <= 1e-12:
+                lots.popleft()
+    return realized, [(q, c) for q, c in lots]
+
+
+@pytest.mark.parametrize("method", [LotMethod.FIFO, LotMethod.AVERAGE])
+def test_replay_matches_lot_by_lot_accounting(method):
+    rows = _random_rows()
+    book = replay_ticker(None, _Batch.from_rows(rows), method)
+    realized, lots = _reference(rows, method)
+
+    assert book.realized == pytest.approx(realized, rel=1e-9)
+    np.testing.assert_allclose(book.lots[:, :2], np.array(lots), rtol=1e-9)
+    assert book.unmatched == 0
+
+    # Replaying in chunks from the checkpoint gives the same book
+    chunked = None
+    for part in np.array_split(np.arange(len(rows)), 7):
+        chunked = replay_ticker(chunked, _Batch.from_rows([rows[i] for i in part]), method)
+    assert chunked.realized == pytest.approx(book.realized, rel=1e-9)
+    np.testing.assert_allclose(chunked.lots, book.lots, rtol=1e-9)
+
+
+def test_closed_position_sells_use_close_price_and_oversells_are_unmatched():
+    rows = [
+        ("AAA", date(2023, 1, 2), 1, "buy", 10, 100.0, None, 0.0),
+        # As written by close_position: price is the purchase price, close_price the sale price
+        ("AAA", date(2023, 2, 1), 2, "sell", 4, 100.0, 120.0, 1.0),
+        ("AAA", date(2023, 3, 1), 3, "sell", 8, 90.0, 130.0, 0.0),
+    ]
+    book = replay_ticker(None, _Batch.from_rows(rows), LotMethod.FIFO)
+    assert book.sells[:, 1].tolist() == pytest.approx([79.0, 6 * 30 + 2 * 40])
+    assert book.unmatched == 2 and book.quantity == 0
+
+
+def _add(db_session, day, side, qty, price, ticker="AAA"):
+    db_session.add(Transaction(ticker=ticker, transaction_type=side, quantity=qty, price=price, transaction_date=day, fees=0))
+    db_session.commit()
+
+
+def test_ledger_replays_only_transactions_after_the_checkpoint(db_session):
+    ledger = Ledger()
+    _add(db_session, date(2023, 1, 2), "buy", 10, 100)
+    _add(db_session, date(2023, 1, 5), "buy", 10, 110)
+    _add(db_session, date(2023, 1, 9), "buy", 5, 50, ticker="bbb ")
+    books, replayed = ledger.replay(db_session, LotMethod.FIFO)
+    assert replayed == 3 and set(books) == {"AAA", "BBB"}
+
+    _add(db_session, date(2023, 2, 1), "sell", 15, 120)
+    books, replayed = ledger.replay(db_session, LotMethod.FIFO)
+    assert replayed == 1
+    assert books["AAA"].realized == pytest.approx(10 * 20 + 5 * 10)
+    assert books["AAA"].lots.tolist() == [[5, 110, date(2023, 1, 5).toordinal()]]
+
+    assert ledger.replay(db_session, LotMethod.FIFO)[1] == 0
+
+    # A backdated buy changes which lots the sell consumed: AAA is replayed in full
+    _add(db_session, date(2023, 1, 3), "buy", 10, 90)
+    books, replayed = ledger.replay(db_session, LotMethod.FIFO)
+    assert replayed == 4
+    assert books["AAA"].realized == pytest.approx(10 * 20 + 5 * 30)
+
+    db_session.query(Transaction).filter(Transaction.ticker == "bbb ").delete()
+    db_session.commit()
+    assert set(ledger.replay(db_session, LotMethod.FIFO)[0]) == {"AAA"}
+
+
+def test_deleted_transaction_whose_id_is_reused_is_not_served_stale(db_session, monkeypatch):
+    monkeypatch.setattr(portfolio_service, "revalue_from", lambda db_session, since: None)
+
+    def create(side, qty, price):
+        return portfolio_service.create_transaction(db_session, TransactionCreate(
+            ticker="AAA", transaction_type=side, quantity=qty, price=price, transaction_date=date(2023, 1, 2), fees=0,
+        ))
+
+    create("buy", 10, 100)
+    sell = create("sell", 4, 120)
+    assert get_ledger(db_session).positions[0].quantity == 6
+
+    portfolio_service.delete_transaction(db_session, sell.id)
+    # Same count and id sum as before the delete
+    assert create("sell", 1, 200).id == sell.id
+    position = get_ledger(db_session).positions[0]
+    assert position.quantity == 9 and position.realized_profit_loss == pytest.approx(100)
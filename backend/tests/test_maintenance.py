@@ -0,0 +1,48 @@
+import pytest
+from deltalake import DeltaTable, write_deltalake
+
+from app.stores.maintenance import TARGETS, advise, inspect_table, main, optimize_table
+
+
+@pytest.fixture
+def fragmented_stocks(tmp_path, monkeypatch, make_ohlcv):
+    """Stocks table written as many small date slices, each holding every symbol."""
+    from app.core.settings import settings
+
+    path = str(tmp_path / "stocks")
+    df = make_ohlcv(symbols=[f"S{i:02d}" for i in range(12)], days=120).sort_values(["date", "symbol"])
+    for _, part in df.groupby(df["date"].dt.to_period("M")):
+        write_deltalake(path, part, mode="append")
+    monkeypatch.setattr(settings, "stocks_delta_table", path)
+    return path
+
+
+def test_inspect_reports_layout_and_advice(fragmented_stocks):
+    target = TARGETS["stocks"]
+    layout = inspect_table(target)
+    assert layout.files == 6
+    assert layout.small_file_ratio == 1.0
+    assert layout.files_per_key == 6  # every file spans every symbol
+    assert set(layout.queries) == {"one_symbol", "last_30d", "one_symbol_1y"}
+    assert layout.queries["one_symbol"].bytes == layout.total_bytes
+    advice = advise(target, layout)
+    assert any(a.startswith("compact") for a in advice)
+    assert any(a.startswith("z-order") for a in advice)
+
+
+def test_z_order_reduces_bytes_scanned(fragmented_stocks):
+    target = TARGETS["stocks"]
+    before = inspect_table(target)
+    # Small target size so the rewrite produces several symbol-clustered files
+    optimize_table(target, target_size=before.total_bytes // 4)
+    after = inspect_table(target)
+    assert after.version > before.version
+    assert after.files_per_key < before.files_per_key
+    assert after.queries["one_symbol"].bytes < before.queries["one_symbol"].bytes
+    assert len(DeltaTable(fragmented_stocks).to_pandas()) == 12 * 120
+
+
+def test_cli_inspect_prints_report(fragmented_stocks, capsys):
+    main(["inspect", "--table", "stocks"])
+    out = capsys.readouterr().out
+    assert out.startswith("[stocks] version 5: 6 files")
@@ -0,0 +1,60 @@
+from datetime import date
+
+import pytest
+from pypfopt import HRPOpt
+
+from app.core.settings import settings
+from app.schemas.portfolio import BatchOptimizationRequest, OptimizationMethod, OptimizationRequest
+from app.services import optimizers, portfolio_service
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(settings, "optimization_workers", 2)
+    yield
+    optimizers.shutdown_pool()
+
+
+async def test_batch_runs_methods_and_frontier_over_one_risk_model(stocks_table, pool):
+    req = BatchOptimizationRequest(
+        tickers=["AAA", "BBB", "CCC"],
+        start_date=date(2023, 1, 1),
+        methods=[OptimizationMethod.HRP, OptimizationMethod.EFFICIENT_FRONTIER, OptimizationMethod.CLA, OptimizationMethod.HRP],
+        frontier_points=5,
+        # The synthetic prices drift down, so max Sharpe needs a lower risk-free rate
+        risk_free_rate=-0.3,
+    )
+    batch = await portfolio_service.optimize_portfolio_batch(None, req)
+
+    assert [r.method for r in batch.results] == [OptimizationMethod.HRP, OptimizationMethod.EFFICIENT_FRONTIER, OptimizationMethod.CLA]
+    assert not batch.errors
+    assert {"risk_model", "frontier", "total", "hrp", "ef", "cla"} <= set(batch.timing)
+    vols = [p.volatility for p in batch.frontier]
+    assert len(vols) == 5 and vols == sorted(vols)
+
+    single = portfolio_service.optimize_portfolio(None, OptimizationRequest(
+        tickers=req.tickers, start_date=req.start_date, method=OptimizationMethod.EFFICIENT_FRONTIER, risk_free_rate=-0.3,
+    ))
+    assert batch.results[1].weights == pytest.approx(single.weights)
+
+
+async def test_batch_reports_failed_methods(stocks_table, pool):
+    req = BatchOptimizationRequest(
+        tickers=["AAA", "BBB", "CCC"],
+        start_date=date(2023, 1, 1),
+        methods=[OptimizationMethod.EFFICIENT_FRONTIER, OptimizationMethod.HRP],
+    )
+    batch = await portfolio_service.optimize_portfolio_batch(None, req)
+    assert [r.method for r in batch.results] == [OptimizationMethod.HRP]
+    assert "risk-free rate" in batch.errors["ef"]
+
+
+def test_hrp_matches_pypfopt(make_ohlcv):
+    prices = make_ohlcv(symbols=[f"S{i:02d}" for i in range(20)], days=260).pivot(index="date", columns="symbol", values="close")
+    returns = prices.pct_change().iloc[1:]
+    weights, performance = optimizers.hrp(returns, risk_free_rate=0.01)
+    reference = HRPOpt(returns)
+    expected = reference.optimize()
+    assert list(weights) == list(expected)
+    assert list(weights.values()) == pytest.approx(list(expected.values()), abs=1e-12)
+    assert performance == pytest.approx(reference.portfolio_performance(risk_free_rate=0.01))
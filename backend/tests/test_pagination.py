@@ -0,0 +1,120 @@
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.settings import settings
+from app.db.base import get_db
+from app.db.models.portfolio import Position, Transaction
+from app.main import app
+from app.services.pagination import NEXT_CURSOR_HEADER, encode_cursor
+
+
+@pytest.fixture
+def factory(session_factory):
+    db = session_factory()
+    # Several transactions per day so pages split inside a date
+    db.add_all(
+        Transaction(ticker=("AAA", "BBB")[i % 2], transaction_type=("buy", "buy", "sell")[i % 3], quantity=1,
+                    price=10 + i, transaction_date=date(2023, 1, 2) + timedelta(days=i // 3), fees=0)
+        for i in range(25)
+    )
+    db.add_all(
+        Position(ticker=t, quantity=1, purchase_price=5, purchase_date=date(2023, 1, 2) + timedelta(days=i))
+        for i, t in enumerate(["CCC", "AAA", "BBB", "AAA"])
+    )
+    db.commit()
+    db.close()
+    return session_factory
+
+
+@pytest.fixture
+def client(factory):
+    def override():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def _pages(client, url):
+    pages, cursor = [], None
+    while True:
+        response = client.get(url + (f"&cursor={cursor}" if cursor else ""))
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return pages
+
+
+def test_transaction_pages_follow_the_full_listing(client):
+    full = client.get("/api/v1/portfolio/transactions").json()
+    assert len(full) == 25 and NEXT_CURSOR_HEADER not in client.get("/api/v1/portfolio/transactions").headers
+    assert [(t["transaction_date"], t["id"]) for t in full] == sorted(
+        ((t["transaction_date"], t["id"]) for t in full), reverse=True
+    )
+    assert full[0]["price"] == "34.000000"
+
+    pages = _pages(client, "/api/v1/portfolio/transactions?limit=4")
+    assert [len(p) for p in pages] == [4] * 6 + [1]
+    assert [t for p in pages for t in p] == full
+
+
+def test_transaction_filters_and_projection(client):
+    pages = _pages(
+        client,
+        "/api/v1/portfolio/transactions?limit=2&ticker=aaa&transaction_type=buy"
+        "&start_date=2023-01-03&end_date=2023-01-07&fields=id,transaction_date",
+    )
+    rows = [t for p in pages for t in p]
+    assert rows and all(set(t) == {"id", "transaction_date"} for t in rows)
+    assert all("2023-01-03" <= t["transaction_date"] <= "2023-01-07" for t in rows)
+    expected = [
+        i + 1 for i in range(25)
+        if i % 2 == 0 and i % 3 != 2 and date(2023, 1, 3) <= date(2023, 1, 2) + timedelta(days=i // 3) <= date(2023, 1, 7)
+    ]
+    assert sorted(t["id"] for t in rows) == expected
+
+    assert client.get("/api/v1/portfolio/transactions?fields=id,secret").status_code == 400
+    assert client.get("/api/v1/portfolio/transactions?limit=2&cursor=nonsense").status_code == 400
+    # Well-formed cursors with values of the wrong type
+    for values in ([20230105, 3], ["2023-01-05", "3"], ["2023-13-05", 3], ["2023-01-05", True]):
+        response = client.get(f"/api/v1/portfolio/transactions?limit=2&cursor={encode_cursor(values)}")
+        assert response.status_code == 400, values
+    assert client.get(f"/api/v1/portfolio/positions?limit=2&cursor={encode_cursor([1, 1])}").status_code == 400
+
+
+def test_position_pages_with_current_prices(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "stocks_delta_table", str(tmp_path / "missing"))
+    pages = _pages(client, "/api/v1/portfolio/positions?limit=3&fields=ticker,current_price")
+    rows = [r for p in pages for r in p]
+    assert [r["ticker"] for r in rows] == ["AAA", "AAA", "BBB", "CCC"]
+    # No price history to value them: the purchase price stands in
+    assert all(set(r) == {"ticker", "current_price"} and r["current_price"] == "5.000000" for r in rows)
+
+
+def test_keyset_queries_use_the_composite_indexes(factory):
+    db = factory()
+    plan = db.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM transactions WHERE ticker = 'AAA' "
+        "AND (transaction_date, id) < ('2023-01-05', 10) ORDER BY transaction_date DESC, id DESC LIMIT 5"
+    )).all()
+    detail = " ".join(row[-1] for row in plan)
+    assert "ix_transactions_ticker_date_id" in detail and "TEMP B-TREE" not in detail
+
+
+def test_list_routes_document_projected_rows_and_cursor_header(client):
+    paths = client.get("/openapi.json").json()["paths"]
+    for path, model in (("/api/v1/portfolio/positions", "Position"), ("/api/v1/portfolio/transactions", "Transaction")):
+        ok = paths[path]["get"]["responses"]["200"]
+        rows = ok["content"]["application/json"]["schema"]
+        assert rows["type"] == "array" and rows["items"]["title"] == f"{model}Fields"
+        assert "required" not in rows["items"] and "ticker" in rows["items"]["properties"]
+        assert NEXT_CURSOR_HEADER in ok["headers"]
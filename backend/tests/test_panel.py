@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from app.stores.panel import build_panel
+
+FIELDS = ["open", "high", "low", "close", "volume"]
+
+
+@pytest.fixture
+def long_table(make_ohlcv):
+    df = make_ohlcv(symbols=("CCC", "AAA", "BBB"), days=40)
+    # Ragged panel: BBB starts late, AAA has a hole, rows arrive unordered in several chunks
+    df = df[~((df.symbol == "BBB") & (df.date < "2023-01-10"))]
+    df = df[~((df.symbol == "AAA") & df.date.between("2023-01-20", "2023-01-25"))]
+    df = df.sample(frac=1, random_state=0)
+    return pa.concat_tables([
+        pa.Table.from_pandas(df.iloc[i:i + 30], preserve_index=False) for i in range(0, len(df), 30)
+    ]), df
+
+
+def test_panel_matches_pandas_unstack(long_table):
+    table, df = long_table
+    expected = df.set_index(["date", "symbol"]).sort_index().unstack(level=1).bfill().ffill()
+    wide = build_panel(table, FIELDS).fill().to_frame()
+    assert wide.columns.equals(expected.columns)
+    assert (wide.index == expected.index).all()
+    np.testing.assert_array_equal(wide.to_numpy(), expected.to_numpy())
+
+
+def test_panel_keeps_gaps_until_filled(long_table):
+    table, _ = long_table
+    panel = build_panel(table, ["close"])
+    assert panel.symbols == ["AAA", "BBB", "CCC"]
+    assert np.isnan(panel.fields["close"][:, 1]).sum() == 6  # BBB before 2023-01-10
+    assert (np.diff(panel.dates.astype("datetime64[D]").astype(int)) > 0).all()
@@ -0,0 +1,91 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+from deltalake import write_deltalake
+
+from app.core.settings import settings
+from app.db.models.portfolio import Position
+from app.services import portfolio_analytics
+from app.services.portfolio_analytics import Holding
+from app.services.price_history import load_closes
+
+
+@pytest.fixture
+def db(db_session):
+    db_session.add_all([
+        Position(ticker="AAA", quantity=10, purchase_price=100, purchase_date=date(2023, 1, 2)),
+        Position(ticker="BBB", quantity=5, purchase_price=200, purchase_date=date(2023, 3, 1)),
+    ])
+    db_session.commit()
+    return db_session
+
+
+@pytest.fixture
+def sector_table(tmp_path, monkeypatch, make_ohlcv):
+    path = str(tmp_path / "sector")
+    prices = make_ohlcv(symbols=("IDX",), seed=1)
+    df = pd.DataFrame({"date": prices["date"], "sector_type": 3, "sector_id": 7, "sector_name": "Index",
+                       "close": prices["close"]})
+    write_deltalake(path, pa.Table.from_pandas(df, preserve_index=False))
+    monkeypatch.setattr(settings, "sector_delta_table", path)
+    return prices.set_index("date")["close"]
+
+
+def test_load_closes_aligns_tickers(stocks_table, make_ohlcv):
+    closes = load_closes(["bbb", "AAA", "ZZZ"], date(2023, 2, 1), date(2023, 3, 31))
+    expected = make_ohlcv().pivot(index="date", columns="symbol", values="close").loc["2023-02-01":"2023-03-31"]
+
+    assert list(closes.columns) == ["AAA", "BBB", "ZZZ"]
+    np.testing.assert_allclose(closes[["AAA", "BBB"]].to_numpy(), expected[["AAA", "BBB"]].to_numpy())
+    assert closes.index.equals(expected.index) and closes["ZZZ"].isna().all()
+
+
+async def test_analytics_treat_purchases_as_cash_flows(db, stocks_table, sector_table, cache_backend, make_ohlcv):
+    result = await portfolio_analytics.get_portfolio_analytics(db, benchmark_id=7)
+    prices = make_ohlcv().pivot(index="date", columns="symbol", values="close")
+
+    assert result.dates[0] == date(2023, 1, 2) and result.missing == []
+    buy = result.dates.index(date(2023, 3, 1))
+    assert result.invested[buy - 1] == 1000 and result.invested[buy] == 2000
+    assert result.equity[-1] == pytest.approx(10 * prices["AAA"].iloc[-1] + 5 * prices["BBB"].iloc[-1])
+
+    # Time-weighted: buying BBB leaves the return of the day unchanged
+    day_return = (1 + result.cumulative_return[buy]) / (1 + result.cumulative_return[buy - 1]) - 1
+    expected = (10 * prices["AAA"].iloc[buy] + 5 * prices["BBB"].iloc[buy] - 1000) / (10 * prices["AAA"].iloc[buy - 1]) - 1
+    assert day_return == pytest.approx(expected)
+    assert result.max_drawdown == pytest.approx(-min(result.drawdown)) and result.max_drawdown > 0
+
+    growth = 1 + np.array(result.cumulative_return)
+    portfolio = growth[1:] / growth[:-1] - 1
+    bench = sector_table.pct_change().to_numpy()[1:]
+    assert result.beta == pytest.approx(np.cov(portfolio, bench)[0, 1] / np.var(bench, ddof=1))
+    assert result.benchmark == "sector:3:7"
+
+
+async def test_analytics_cached_per_holdings_snapshot(db, stocks_table, cache_backend, monkeypatch):
+    calls = []
+    original = portfolio_analytics.load_closes
+    monkeypatch.setattr(portfolio_analytics, "load_closes", lambda *a: calls.append(a) or original(*a))
+
+    first = await portfolio_analytics.get_portfolio_analytics(db)
+    assert await portfolio_analytics.get_portfolio_analytics(db) == first
+    assert len(calls) == 1
+
+    db.add(Position(ticker="CCC", quantity=1, purchase_price=300, purchase_date=date(2023, 6, 1)))
+    db.commit()
+    changed = await portfolio_analytics.get_portfolio_analytics(db)
+    assert len(calls) == 2 and changed.equity != first.equity
+
+
+def test_holding_bought_before_the_window_enters_at_its_first_close():
+    closes = pd.DataFrame({"AAA": [150.0, 153.0, 156.0]}, index=pd.bdate_range("2024-01-02", periods=3))
+    holdings = [Holding("AAA", 10, date(2023, 1, 2), 100.0), Holding("AAA", 1, date(2024, 1, 3), 140.0)]
+    result = portfolio_analytics.compute_analytics(holdings, closes, window_start=date(2024, 1, 1))
+
+    assert result.cumulative_return[0] == 0.0 and result.invested[0] == 1000
+    # Second day: 10 shares gain 30, the in-window buy at 140 is worth 153
+    assert result.cumulative_return[1] == pytest.approx((10 * (153 - 150) + 153 - 140) / 1500)
+    assert result.total_return == pytest.approx((1 + result.cumulative_return[1]) * (11 * 156 / (11 * 153)) - 1)
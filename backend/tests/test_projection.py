@@ -0,0 +1,138 @@
+import threading
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from deltalake import write_deltalake
+
+from app.core.settings import settings
+from app.schemas.portfolio import OptimizationMethod, OptimizationRequest
+from app.services import backtest_service, portfolio_service, report_service, risk_model, stock_service
+
+
+@pytest.fixture
+def scanned_columns(monkeypatch):
+    """Record the ``columns`` every stock_service Delta scan projects to."""
+    calls = []
+    scan_delta = stock_service.scan_delta
+
+    def spy(table_uri, **kwargs):
+        calls.append(kwargs.get("columns"))
+        return scan_delta(table_uri, **kwargs)
+
+    monkeypatch.setattr(stock_service, "scan_delta", spy)
+    return calls
+
+
+def test_build_features_projects_feature_store(tmp_path, monkeypatch, scanned_columns, make_ohlcv):
+    path = str(tmp_path / "features")
+    df = make_ohlcv(symbols=("AAA",), days=30)[["date", "symbol"]]
+    rng = np.random.default_rng(0)
+    for column in backtest_service.FEATURE_STORE_COLUMNS[2:] + ["unused_feature"]:
+        df[column] = rng.uniform(1, 2, len(df))
+    write_deltalake(path, df)
+    monkeypatch.setattr(settings, "stocks_feature_store", path)
+
+    trades = df[["date", "symbol"]].iloc[5:10].assign(**{"return": 0.01})
+    features = backtest_service.build_features(trades)
+    assert scanned_columns == [backtest_service.FEATURE_STORE_COLUMNS]
+    assert "unused_feature" not in features.columns
+    assert set(backtest_service.FEATURES_LIST) <= set(features.columns)
+    assert len(features) == 5
+
+
+def test_optimize_portfolio_projects_closes(stocks_table, scanned_columns):
+    req = OptimizationRequest(tickers=["AAA", "BBB", "CCC"], start_date=date(2023, 1, 1), method=OptimizationMethod.HRP)
+    result = portfolio_service.optimize_portfolio(None, req)
+    assert scanned_columns == [risk_model.PRICE_COLUMNS]
+    assert abs(sum(result.weights.values()) - 1) < 1e-6
+
+
+def test_reports_project_declared_columns(tmp_path, monkeypatch):
+    path = str(tmp_path / "reports")
+    write_deltalake(path, pd.DataFrame({
+        "id": [1, 2], "mack": ["AAA", "BBB"], "tenbaocao": ["a", "b"], "url": ["u1", "u2"],
+        "nguon": ["n", "n"], "ngaykn": ["2024-01-01", "2024-01-02"], "rsnganh": ["r", "r"],
+        "body": ["long text", "long text"],
+    }))
+    monkeypatch.setattr(settings, "wichart_report_delta_table", path)
+    store = report_service.WichartReportStore()
+    assert list(store.get_data(mack="aaa", columns=report_service.REPORT_COLUMNS).columns) == report_service.REPORT_COLUMNS
+
+
+async def test_sector_timeseries_projects_declared_columns(tmp_path, monkeypatch, scanned_columns):
+    path = str(tmp_path / "sector")
+    write_deltalake(path, pd.DataFrame({
+        "date": pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-01"]), "sector_type": [3, 3, 4],
+        "sector_id": [1, 1, 2], "sector_name": ["Banks", "Banks", "Retail"], "close": [1.0, 2.0, 9.0],
+        "volume": [5.0, 6.0, 7.0],
+    }))
+    monkeypatch.setattr(settings, "sector_delta_table", path)
+    result = await stock_service.get_sector_timeseries("3")
+    assert scanned_columns == [stock_service.SECTOR_TIMESERIES_COLUMNS]
+    assert [s.name for s in result.sector_data] == ["Banks"] and result.sector_data[0].data == [1.0, 2.0]
+
+
+async def test_backtest_prefetch_covers_the_sweep_and_is_collected_on_failure(monkeypatch, make_ohlcv):
+    ohlcv = make_ohlcv(symbols=("AAA", "BBB"), days=30).set_index(["date", "symbol"])
+    panel = ohlcv[backtest_service.BACKTEST_STOCK_COLUMNS[2:]].unstack("symbol")
+
+    class Panel:
+        def fill(self):
+            return self
+
+        def to_frame(self):
+            return panel
+
+    prefetched, loaded, sweep_threads = [], threading.Event(), []
+
+    def load_feature_store(**kwargs):
+        prefetched.append(kwargs)
+        loaded.set()
+        return pd.DataFrame()
+
+    def failing_sweep(stocks, strategy_name):
+        sweep_threads.append(threading.get_ident())
+        loaded.wait(5)
+        raise ValueError("sweep failed")
+
+    monkeypatch.setattr(backtest_service, "_load_price_panel", lambda **kwargs: Panel())
+    monkeypatch.setattr(backtest_service, "_load_feature_store", load_feature_store)
+    monkeypatch.setattr(backtest_service, "run_strategy_sweep", failing_sweep)
+    monkeypatch.setattr("app.services.ml_models.get_models", lambda: None)
+
+    with pytest.raises(ValueError, match="sweep failed"):
+        await backtest_service.run_backtest("any", "2023-01-16", symbols=["AAA"])
+    assert len(prefetched) == 1
+    assert prefetched[0]["symbols"] == ["AAA"]
+    assert prefetched[0]["start"] == datetime(2023, 1, 16)
+    assert prefetched[0]["end"] == panel.index.max()
+    # The sweep ran off the event loop's thread
+    assert sweep_threads and sweep_threads[0] != threading.get_ident()
+
+
+async def test_hot_read_paths_push_symbol_and_date_filters(stocks_table, cache_backend, monkeypatch):
+    from app.services import rollups
+
+    scans = []
+    scan_delta = stock_service.scan_delta
+
+    def spy(table_uri, **kwargs):
+        table, scan = scan_delta(table_uri, **kwargs)
+        scans.append((kwargs.get("symbols"), kwargs.get("start"), kwargs.get("end"), scan.pushdown))
+        return table, scan
+
+    monkeypatch.setattr(stock_service, "scan_delta", spy)
+    monkeypatch.setattr(rollups, "scan_delta", spy)
+
+    frame = await stock_service.get_stock_timeseries("AAA", start_date="2023-03-01", end_date="2023-03-31")
+    assert str(frame.dates[0]) == "2023-03-01" and str(frame.dates[-1]) == "2023-03-31"
+    assert scans.pop() == (["AAA"], datetime(2023, 3, 1), datetime(2023, 3, 31), True)
+
+    rollups.RollupStore().get("BBB", "1M")
+    assert scans.pop() == (["BBB"], None, None, True)
+
+    assert await stock_service.get_current_price("CCC") is None  # no bars in the last days
+    symbols, start, end, pushdown = scans.pop()
+    assert symbols == ["CCC"] and end - start == timedelta(days=3) and pushdown
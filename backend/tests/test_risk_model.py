@@ -0,0 +1,90 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+from deltalake import write_deltalake
+from pypfopt import expected_returns, risk_models
+
+from app.cache.versioning import version_poller
+from app.schemas.portfolio import OptimizationMethod, OptimizationRequest
+from app.services import portfolio_service, stock_service
+from app.services.risk_model import RiskModel, RiskModelCache
+
+
+@pytest.fixture
+def prices(make_ohlcv):
+    return make_ohlcv().pivot(index="date", columns="symbol", values="close")
+
+
+def _assert_matches_pypfopt(model, prices):
+    pd.testing.assert_series_equal(model.mu, expected_returns.mean_historical_return(prices), check_names=False)
+    pd.testing.assert_frame_equal(model.cov(), risk_models.sample_cov(prices), check_names=False)
+
+
+def test_running_sums_match_pypfopt_after_append_and_trim(prices):
+    model = RiskModel.from_prices(prices.iloc[:200])
+    _assert_matches_pypfopt(model, prices.iloc[:200])
+
+    start = prices.index[60]
+    model = model.extended(prices.iloc[150:], start=start)
+    assert model.prices.index[0] == start and len(model.returns) == len(model.prices) - 1
+    _assert_matches_pypfopt(model, prices.iloc[60:])
+    shrunk = model.cov("ledoit_wolf")
+    assert model.cov("ledoit_wolf") is shrunk
+    with pytest.raises(ValueError):
+        model.cov("nope")
+
+
+def test_cache_reads_only_new_bars_when_the_version_moves(tmp_path, monkeypatch, make_ohlcv, prices):
+    path = str(tmp_path / "stocks")
+    df = make_ohlcv()
+    cutoff = df["date"].unique()[249]
+    write_deltalake(path, pa.Table.from_pandas(df[df["date"] <= cutoff], preserve_index=False))
+    monkeypatch.setattr(stock_service.settings, "stocks_delta_table", path)
+    monkeypatch.setitem(version_poller.versions, "stocks", 0)
+
+    starts = []
+    scan_delta = stock_service.scan_delta
+
+    def spy(table_uri, **kwargs):
+        starts.append(kwargs.get("start"))
+        return scan_delta(table_uri, **kwargs)
+
+    monkeypatch.setattr(stock_service, "scan_delta", spy)
+    cache = RiskModelCache()
+    first = cache.get(["CCC", "aaa", "BBB"], start=date(2023, 1, 1))
+    assert cache.get(["AAA", "BBB", "CCC"], start=date(2023, 1, 1)) is first
+    assert len(starts) == 1
+
+    write_deltalake(path, pa.Table.from_pandas(df[df["date"] > cutoff], preserve_index=False), mode="append")
+    monkeypatch.setitem(version_poller.versions, "stocks", 1)
+    model = cache.get(["AAA", "BBB", "CCC"], start=date(2023, 1, 1))
+    assert starts[1] == pd.Timestamp(cutoff)
+    assert len(model.prices) == 300
+    _assert_matches_pypfopt(model, prices)
+
+
+def test_cache_leaves_out_symbols_listed_inside_the_window(tmp_path, monkeypatch, make_ohlcv, prices):
+    path = str(tmp_path / "stocks")
+    df = make_ohlcv()
+    listed = df["date"].unique()[100]
+    df = df[(df["symbol"] != "CCC") | (df["date"] >= listed)]
+    write_deltalake(path, pa.Table.from_pandas(df, preserve_index=False))
+    monkeypatch.setattr(stock_service.settings, "stocks_delta_table", path)
+
+    model = RiskModelCache().get(["AAA", "BBB", "CCC", "ZZZ"], start=date(2023, 1, 1))
+    assert model.symbols == ["AAA", "BBB"] and model.dropped == ["CCC", "ZZZ"]
+    _assert_matches_pypfopt(model, prices[["AAA", "BBB"]])
+
+    # Callers are told which requested tickers the weights leave out
+    req = OptimizationRequest(tickers=["AAA", "BBB", "CCC"], method=OptimizationMethod.HRP,
+                              start_date=date(2023, 1, 1))
+    result = portfolio_service.optimize_portfolio(None, req)
+    assert set(result.weights) <= {"AAA", "BBB"} and result.missing == ["CCC"]
+
+    # From the listing on, it has a full history
+    late = RiskModelCache().get(["AAA", "BBB", "CCC"], start=pd.Timestamp(listed).date())
+    assert late.symbols == ["AAA", "BBB", "CCC"] and late.cov().loc["CCC", "CCC"] > 0
+    assert late.dropped == []
@@ -0,0 +1,177 @@
+import pandas as pd
+import pyarrow as pa
+from fastapi.testclient import TestClient
+
+from app.core.metrics import CACHE_NORMALIZED_HITS
+from app.main import app
+from app.services.timeseries_format import ARROW_STREAM_MEDIA_TYPE, negotiate_format
+
+client = TestClient(app)
+
+BODY = {"indicators": [{"name": "rsi"}, {"name": "macd"}], "start_date": "2023-03-01"}
+
+
+def test_json_response_keeps_timeseries_shape(stocks_table, cache_backend):
+    res = client.post("/api/v1/timeseries/aaa", json=BODY)
+    assert res.status_code == 200
+    data = res.json()
+    assert data["symbol"] == "AAA"
+    assert data["timestamps"][0] == "2023-03-01"
+    assert len(data["timeseries"]["close"]) == len(data["timestamps"])
+    assert data["indicators"]["rsi"][0] is None  # NaN warm-up encoded as null
+    assert set(data["indicators"]["macd"]) == {"macd", "signal", "histogram"}
+    assert data["indicators"]["sma"] is None
+
+
+def test_arrow_response_matches_json(stocks_table, cache_backend):
+    as_json = client.post("/api/v1/timeseries/AAA", json=BODY).json()
+    res = client.post("/api/v1/timeseries/AAA", json=BODY, headers={"Accept": ARROW_STREAM_MEDIA_TYPE})
+    assert res.headers["content-type"] == ARROW_STREAM_MEDIA_TYPE
+    table = pa.ipc.open_stream(res.content).read_all()
+    assert table.schema.metadata[b"symbol"] == b"AAA"
+    assert table.column("close").to_pylist() == as_json["timeseries"]["close"]
+    assert table.column("macd.signal").to_pylist() == as_json["indicators"]["macd"]["signal"]
+
+
+def test_negotiate_format_prefers_highest_quality():
+    assert negotiate_format(None) == "application/json"
+    assert negotiate_format("*/*") == "application/json"
+    assert negotiate_format(f"application/json;q=0.5, {ARROW_STREAM_MEDIA_TYPE}") == ARROW_STREAM_MEDIA_TYPE
+
+
+def test_batch_matches_single_symbol_endpoint(stocks_table, cache_backend):
+    body = {"symbols": ["bbb", "AAA", "ZZZ"], "indicators": [
+        {"name": "rsi"}, {"name": "vwap", "params": {"window": 20}}, {"name": "atr_trailing"},
+    ]}
+    res = client.post("/api/v1/timeseries/batch", json=body)
+    assert res.status_code == 200
+    data = res.json()
+    assert list(data["series"]) == ["AAA", "BBB"]
+    assert data["missing"] == ["ZZZ"]
+    single = client.post("/api/v1/timeseries/BBB", json={"indicators": body["indicators"]}).json()
+    assert data["timestamps"] == single["timestamps"]
+    assert data["series"]["BBB"]["timeseries"]["close"] == single["timeseries"]["close"]
+    assert data["series"]["BBB"]["indicators"]["rsi"] == single["indicators"]["rsi"]
+    assert data["series"]["BBB"]["indicators"]["vwap_highest"] == single["indicators"]["vwap_highest"]
+    assert data["series"]["BBB"]["indicators"]["atr_trailing"] == single["indicators"]["atr_trailing"]
+
+
+def test_weekly_interval_resamples_daily_bars(stocks_table, cache_backend):
+    daily = client.post("/api/v1/timeseries/AAA", json={}).json()
+    weekly = client.post("/api/v1/timeseries/AAA", json={"interval": "1w", "indicators": [{"name": "rsi"}]}).json()
+    df = pd.DataFrame(daily["timeseries"], index=pd.to_datetime(daily["timestamps"]))
+    expected = df.groupby(df.index.to_period("W")).agg(
+        {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+    )
+    assert weekly["interval"] == "1w"
+    assert weekly["timeseries"]["high"] == expected["high"].tolist()
+    assert weekly["timeseries"]["volume"] == expected["volume"].tolist()
+    assert weekly["timestamps"][1] == "2023-01-09"
+
+
+def test_max_points_downsamples_after_indicators(stocks_table, cache_backend):
+    body = {"indicators": [{"name": "rsi"}]}
+    full = client.post("/api/v1/timeseries/AAA", json=body).json()
+    small = client.post("/api/v1/timeseries/AAA", json={**body, "max_points": 50}).json()
+    assert len(small["timestamps"]) == 50
+    assert small["meta"] == {"source_points": len(full["timestamps"]), "points": 50}
+    assert max(small["timeseries"]["high"]) == max(full["timeseries"]["high"])
+    assert small["timeseries"]["close"][-1] == full["timeseries"]["close"][-1]
+    assert small["indicators"]["rsi"][-1] == full["indicators"]["rsi"][-1]
+    assert set(small["indicators"]["rsi"]) - {None} <= set(full["indicators"]["rsi"])
+
+
+def test_rollups_update_incrementally(stocks_table, cache_backend, monkeypatch, make_ohlcv):
+    from deltalake import write_deltalake
+    from app.cache.versioning import version_poller
+    from app.services.rollups import rollup_store
+
+    monkeypatch.setitem(version_poller.versions, "stocks", 1)
+    weekly = rollup_store.get("AAA", "1w")
+    daily = client.post("/api/v1/timeseries/AAA", json={"interval": "1w", "indicators": [{"name": "sma"}]}).json()
+    assert weekly.ohlcv["high"].tolist() == daily["timeseries"]["high"]
+
+    # Ten more daily bars: the open week is rebuilt and new weeks are appended
+    more = make_ohlcv(symbols=("AAA",), days=310, seed=1).iloc[300:]
+    write_deltalake(stocks_table, more, mode="append")
+    monkeypatch.setitem(version_poller.versions, "stocks", 2)
+    load_daily, since = rollup_store._load_daily, []
+
+    def spy(table_uri, symbol, start):
+        since.append(start)
+        return load_daily(table_uri, symbol, start)
+
+    monkeypatch.setattr(rollup_store, "_load_daily", spy)
+    updated = rollup_store.get("AAA", "1w")
+    assert since[0] is not None  # incremental read, not a full rebuild
+    rollup_store.invalidate("AAA")
+    rebuilt = rollup_store.get("AAA", "1w")
+    assert updated.dates.tolist() == rebuilt.dates.tolist()
+    assert updated.ohlcv["close"].tolist() == rebuilt.ohlcv["close"].tolist()
+    assert len(updated.dates) > len(weekly.dates)
+
+
+def _normalized_hits(namespace):
+    return CACHE_NORMALIZED_HITS.labels(namespace)._value.get()
+
+
+def test_differently_spelled_requests_count_as_normalized_hits(stocks_table, cache_backend):
+    single, batch = _normalized_hits("timeseries"), _normalized_hits("timeseries_batch")
+    first = client.post("/api/v1/timeseries/aaa", json={"indicators": [{"name": "RSI"}, {"name": "macd"}]}).json()
+    again = client.post("/api/v1/timeseries/AAA", json={"indicators": [{"name": "macd"}, {"name": "rsi"}]}).json()
+    assert again == first and _normalized_hits("timeseries") == single + 1
+
+    client.post("/api/v1/timeseries/batch", json={"symbols": ["bbb", "AAA"]})
+    client.post("/api/v1/timeseries/batch", json={"symbols": ["AAA", "BBB", "aaa"]})
+    assert _normalized_hits("timeseries_batch") == batch + 1
+
+
+def test_rollup_ranges_match_the_daily_path(stocks_table, cache_backend):
+    # Mid-week / mid-month ends: the cut periods only hold the bars inside the range
+    for interval, start, end in [("1w", "2023-03-08", "2023-05-17"), ("1M", "2023-02-15", "2023-06-14"),
+                                 ("1w", "2023-03-08", "2023-03-09")]:
+        body = {"interval": interval, "start_date": start, "end_date": end}
+        rollup = client.post("/api/v1/timeseries/AAA", json=body).json()
+        daily = client.post("/api/v1/timeseries/AAA", json={**body, "indicators": [{"name": "sma"}]}).json()
+        assert rollup["timestamps"] == daily["timestamps"] and rollup["timestamps"][0] == start
+        assert rollup["timeseries"] == daily["timeseries"]
+
+
+def test_rollup_reads_of_different_symbols_do_not_wait_for_each_other(stocks_table, monkeypatch):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from app.services.rollups import RollupStore
+
+    store = RollupStore()
+    # Both loads must be in flight at once to get past the barrier
+    barrier = threading.Barrier(2, timeout=5)
+    load_daily = store._load_daily
+
+    def slow(table_uri, symbol, since):
+        barrier.wait()
+        return load_daily(table_uri, symbol, since)
+
+    monkeypatch.setattr(store, "_load_daily", slow)
+    with ThreadPoolExecutor(2) as pool:
+        frames = list(pool.map(lambda s: store.get(s, "1M"), ["AAA", "BBB"]))
+    assert [f.symbol for f in frames] == ["AAA", "BBB"]
+
+
+def test_rollup_store_evicts_the_least_recently_read_symbol(stocks_table, monkeypatch):
+    from app.services.rollups import RollupStore
+
+    one = RollupStore()
+    one.get("AAA", "1w")
+    entry_bytes = one._entries.get((stocks_table, "AAA")).nbytes
+
+    # Room for one symbol's rollups only
+    store = RollupStore(max_bytes=int(entry_bytes * 1.5))
+    loads = []
+    load_daily = store._load_daily
+    monkeypatch.setattr(store, "_load_daily", lambda *args: loads.append(args[1]) or load_daily(*args))
+    first = store.get("AAA", "1w")
+    store.get("BBB", "1w")
+    assert (stocks_table, "AAA") not in store._entries and store._entries.bytes <= store._entries.max_bytes
+    again = store.get("AAA", "1w")
+    assert loads == ["AAA", "BBB", "AAA"]
+    assert again.dates.tolist() == first.dates.tolist()
@@ -0,0 +1,104 @@
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db.models.market import StockSymbol
+from app.services import stock_service, universe_service
+from app.services.universe_service import UniverseNotFound, UniverseService, resolve_symbols
+
+
+@pytest.fixture
+def symbols(session_factory):
+    db = session_factory()
+    db.add_all([
+        StockSymbol(symbol="AAA", id_sector_level_3=10, id_sector_level_4=100),
+        StockSymbol(symbol="BBB", id_sector_level_3=10, id_sector_level_4=101),
+        StockSymbol(symbol="CCC", id_sector_level_3=20, id_sector_level_4=200),
+    ])
+    db.commit()
+    db.close()
+    return session_factory
+
+
+@pytest.fixture
+def service(tmp_path, symbols):
+    watchlist = tmp_path / "watchlist.csv"
+    watchlist.write_text("aaa\nBBB\n\nbbb\n")
+    custom = tmp_path / "universes.json"
+    return UniverseService(
+        watchlist_path=lambda: str(watchlist),
+        custom_path=lambda: str(custom),
+        session_factory=symbols,
+    )
+
+
+def test_resolves_watchlist_sectors_and_custom(service):
+    assert service.resolve("watchlist") == ["AAA", "BBB"]
+    assert service.resolve("sector:3:10") == ["AAA", "BBB"]
+    assert service.resolve("sector:4:200") == ["CCC"]
+    assert service.resolve("all") is None
+
+    assert service.save_custom("banks", ["ccc", "aaa"]) == ["AAA", "CCC"]
+    assert service.resolve("custom:banks") == ["AAA", "CCC"]
+    assert service.list() == {"watchlist": 2, "custom:banks": 2}
+    assert service.delete_custom("banks")
+    assert not service.delete_custom("banks")
+
+    for bad in ("custom:banks", "sector:5:10", "sector:3:99", "nope"):
+        with pytest.raises(UniverseNotFound):
+            service.resolve(bad)
+
+
+def test_watchlist_reloads_only_when_file_changes(service, monkeypatch):
+    reads = []
+    real_open = open
+
+    def counting_open(path, *args, **kwargs):
+        reads.append(path)
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", counting_open)
+    service.resolve("watchlist")
+    service.resolve("watchlist")
+    assert len(reads) == 1
+
+    path = service.watchlist_path()
+    with real_open(path, "w") as f:
+        f.write("CCC\n")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert service.resolve("watchlist") == ["CCC"]
+    assert len(reads) == 2
+
+
+def test_loaders_require_symbols_or_universe(stocks_table, service, monkeypatch):
+    monkeypatch.setattr(universe_service, "universes", service)
+    with pytest.raises(ValueError):
+        resolve_symbols(None, None)
+
+    df = stock_service._load_delta_stocks(universe="sector:3:10", columns=["date", "symbol", "close"])
+    assert sorted(df["symbol"].unique()) == ["AAA", "BBB"]
+    df = stock_service._load_delta_stocks(universe="all", columns=["date", "symbol", "close"])
+    assert sorted(df["symbol"].unique()) == ["AAA", "BBB", "CCC"]
+
+
+def test_universe_routes(service, monkeypatch):
+    from app.api.v1.routes import universe as universe_route
+    from app.main import app as fastapi_app
+
+    monkeypatch.setattr(universe_route, "universes", service)
+    client = TestClient(fastapi_app)
+
+    r = client.put("/api/v1/universe/custom/growth", json={"symbols": ["bbb", "aaa"]})
+    assert r.status_code == 200
+    assert r.json() == {"id": "custom:growth", "symbols": ["AAA", "BBB"]}
+    assert json.loads(open(service.custom_path()).read()) == {"growth": ["AAA", "BBB"]}
+
+    r = client.get("/api/v1/universe")
+    assert {"id": "custom:growth", "size": 2} in r.json()["universes"]
+    assert client.get("/api/v1/universe/sector:3:20").json()["symbols"] == ["CCC"]
+    assert client.get("/api/v1/universe/custom:missing").status_code == 404
+    assert client.delete("/api/v1/universe/custom/growth").status_code == 200
+    assert client.delete("/api/v1/universe/custom/growth").status_code == 404
@@ -0,0 +1,158 @@
+from datetime import date
+from decimal import Decimal
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from deltalake import write_deltalake
+
+from app.db.models.portfolio import PortfolioSnapshot, Position
+from app.schemas.portfolio import ClosePositionRequest, PositionCreate, TransactionCreate
+from app.services import portfolio_service, valuation
+
+
+@pytest.fixture
+def closes(make_ohlcv):
+    return make_ohlcv().pivot(index="date", columns="symbol", values="close")
+
+
+def _position(ticker, quantity, price, purchase_date):
+    return PositionCreate(ticker=ticker, quantity=quantity, purchase_price=price, purchase_date=purchase_date)
+
+
+def _rows(db_session):
+    valuation.wait_for_revaluation()
+    db_session.expire_all()
+    return {(r.date, r.ticker): r for r in db_session.query(PortfolioSnapshot).all()}
+
+
+async def test_snapshots_follow_position_changes(db_session, stocks_table, closes):
+    portfolio_service.create_position(db_session, _position("AAA", 10, 100, date(2023, 1, 2)))
+    rows = _rows(db_session)
+    assert len(rows) == len(closes) and min(rows)[0] == date(2023, 1, 2)
+
+    # A later purchase only rewrites the days from its date on
+    before = {key: row.id for key, row in rows.items() if key[0] < date(2023, 6, 1)}
+    portfolio_service.create_position(db_session, _position("BBB", 5, 200, date(2023, 6, 1)))
+    rows = _rows(db_session)
+    assert {key: row.id for key, row in rows.items() if key[0] < date(2023, 6, 1)} == before
+    assert (date(2023, 6, 1), "BBB") in rows and (date(2023, 5, 31), "BBB") not in rows
+
+    summary = await portfolio_service.get_portfolio_summary(db_session)
+    last = closes.iloc[-1]
+    assert float(summary.total_value) == pytest.approx(10 * last["AAA"] + 5 * last["BBB"])
+    assert summary.total_invested == Decimal(2000)
+    assert {p.ticker: float(p.current_price) for p in summary.positions} == pytest.approx(
+        {"AAA": last["AAA"], "BBB": last["BBB"]}
+    )
+
+
+def test_closing_a_position_records_realized_profit(db_session, stocks_table):
+    position = portfolio_service.create_position(db_session, _position("AAA", 10, 100, date(2023, 1, 2)))
+    _rows(db_session)
+    portfolio_service.close_position(db_session, ClosePositionRequest(
+        position_id=position.id, quantity_to_close=4, closing_price=120, closing_date=date(2023, 3, 1), fees=1,
+    ))
+    valuation.wait_for_revaluation()
+    history = valuation.get_valuation_history(db_session, ticker="aaa")
+    by_date = {point.date: point for point in history}
+
+    assert by_date[date(2023, 2, 28)].realized_profit_loss == 0
+    assert by_date[date(2023, 3, 1)].realized_profit_loss == pytest.approx(Decimal(79))
+    # The days before the close still hold all 10 shares
+    assert all(point.invested == 1000 for point in history if point.date < date(2023, 3, 1))
+    assert all(point.invested == 600 for point in history if point.date >= date(2023, 3, 1))
+
+
+def test_deleting_a_position_keeps_the_days_it_was_held(db_session, stocks_table):
+    kept = portfolio_service.create_position(db_session, _position("AAA", 10, 100, date(2023, 1, 2)))
+    gone = portfolio_service.create_position(db_session, _position("BBB", 5, 200, date(2023, 1, 2)))
+    before = {key: float(row.value) for key, row in _rows(db_session).items()}
+
+    portfolio_service.delete_position(db_session, gone.id)
+    rows = _rows(db_session)
+    assert {key: float(row.value) for key, row in rows.items() if key[0] < date.today()} == before
+    latest = valuation.latest_snapshot(db_session)
+    assert set(latest) == {"AAA"} and float(latest["AAA"].quantity) == float(kept.quantity)
+
+
+def test_backdated_change_keeps_closed_and_deleted_history(db_session, stocks_table):
+    # Each change settles first: the worker and the test share the one in-memory connection
+    closed = portfolio_service.create_position(db_session, _position("AAA", 10, 100, date(2023, 1, 2)))
+    partly = portfolio_service.create_position(db_session, _position("BBB", 5, 200, date(2023, 1, 2)))
+    deleted = portfolio_service.create_position(db_session, _position("CCC", 2, 50, date(2023, 1, 2)))
+    _rows(db_session)
+    for position, quantity in ((closed, 10), (partly, 3)):
+        portfolio_service.close_position(db_session, ClosePositionRequest(
+            position_id=position.id, quantity_to_close=quantity, closing_price=120, closing_date=date(2023, 3, 1),
+        ))
+        _rows(db_session)
+    portfolio_service.delete_position(db_session, deleted.id)
+    before = {key: (float(row.quantity), round(float(row.value), 6)) for key, row in _rows(db_session).items()}
+
+    portfolio_service.create_transaction(db_session, TransactionCreate(
+        ticker="DDD", transaction_type="buy", quantity=1, price=10, transaction_date=date(2023, 1, 3),
+    ))
+    after = {key: (float(row.quantity), round(float(row.value), 6)) for key, row in _rows(db_session).items()}
+    held = {key: row for key, row in after.items() if key[1] != "DDD" and key[0] < date.today()}
+    assert held == {key: row for key, row in before.items() if key[0] < date.today()}
+    assert after[(date(2023, 2, 28), "AAA")][0] == 10 and after[(date(2023, 3, 1), "AAA")][0] == 0
+    assert after[(date(2023, 2, 28), "BBB")][0] == 5 and after[(date(2023, 3, 1), "BBB")][0] == 2
+    assert (date(2023, 2, 28), "CCC") in after
+
+
+def test_closed_lots_are_held_on_a_first_build(db_session, stocks_table):
+    position = portfolio_service.create_position(db_session, _position("AAA", 10, 100, date(2023, 1, 2)))
+    _rows(db_session)
+    portfolio_service.close_position(db_session, ClosePositionRequest(
+        position_id=position.id, quantity_to_close=4, closing_price=120, closing_date=date(2023, 3, 1),
+    ))
+    _rows(db_session)
+    db_session.query(PortfolioSnapshot).delete()
+    db_session.commit()
+    valuation.refresh_snapshots(db_session)
+    rows = _rows(db_session)
+    assert float(rows[(date(2023, 2, 28), "AAA")].quantity) == 10
+    assert float(rows[(date(2023, 3, 1), "AAA")].quantity) == 6
+
+
+async def test_first_summary_schedules_the_build_without_waiting(db_session, stocks_table, monkeypatch):
+    db_session.add(Position(ticker="AAA", quantity=10, purchase_price=100, purchase_date=date(2023, 1, 2)))
+    db_session.commit()
+    scheduled, revalue_from, wait = [], valuation.revalue_from, valuation.wait_for_revaluation
+    monkeypatch.setattr(valuation, "revalue_from", lambda session, since: scheduled.append(since))
+    monkeypatch.setattr(valuation, "wait_for_revaluation", lambda: pytest.fail("waited on the request path"))
+    summary = await portfolio_service.get_portfolio_summary(db_session)
+    assert summary.total_value == 0 and [p.ticker for p in summary.positions] == ["AAA"]
+    assert scheduled == [None]
+
+    # The scheduled build, run here rather than alongside the request on the shared connection
+    monkeypatch.setattr(valuation, "wait_for_revaluation", wait)
+    revalue_from(db_session, None)
+    assert _rows(db_session) and set(valuation.latest_snapshot(db_session)) == {"AAA"}
+
+
+def test_failed_revaluation_stays_dirty_until_retried(db_session, stocks_table, monkeypatch):
+    original = valuation.load_closes
+    monkeypatch.setattr(valuation, "load_closes", lambda *a: 1 / 0)
+    portfolio_service.create_position(db_session, _position("AAA", 10, 100, date(2023, 1, 2)))
+    assert _rows(db_session) == {} and valuation._dirty[db_session.get_bind()] == date(2023, 1, 2)
+
+    # The next change retries from the earliest dirty date
+    monkeypatch.setattr(valuation, "load_closes", original)
+    portfolio_service.create_position(db_session, _position("BBB", 5, 200, date(2023, 6, 1)))
+    rows = _rows(db_session)
+    assert min(rows)[0] == date(2023, 1, 2) and db_session.get_bind() not in valuation._dirty
+
+
+def test_new_bars_extend_the_latest_snapshot(db_session, stocks_table, closes, make_ohlcv):
+    portfolio_service.create_position(db_session, _position("AAA", 10, 100, date(2023, 1, 2)))
+    latest = max(_rows(db_session))[0]
+
+    bar = make_ohlcv(symbols=("AAA",), days=1).assign(date=pd.Timestamp(latest) + pd.offsets.BDay(), close=150.0)
+    write_deltalake(stocks_table, pa.Table.from_pandas(bar, preserve_index=False), mode="append")
+    assert valuation.refresh_snapshots(db_session) == 2
+
+    newest = max(_rows(db_session).values(), key=lambda row: row.date)
+    assert newest.date > latest and float(newest.value) == 1500.0
+    assert len(_rows(db_session)) == len(closes) + 1
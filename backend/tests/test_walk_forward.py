@@ -0,0 +1,81 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.settings import settings
+from app.schemas.portfolio import OptimizationMethod, WalkForwardRequest
+from app.services import optimizers, walk_forward
+from app.services.constrained import ConstraintSet
+from app.services.risk_model import RiskModel, risk_model_cache
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(settings, "optimization_workers", 2)
+    yield
+    optimizers.shutdown_pool()
+
+
+def test_window_models_match_fresh_estimates(make_ohlcv):
+    prices = make_ohlcv(days=400).pivot(index="date", columns="symbol", values="close")
+    dates = prices.index.to_numpy().astype("datetime64[D]")
+    indices = walk_forward.rebalance_indices(dates, 130, "1M")
+    for t, model in zip(indices, walk_forward.window_models(prices, indices, lookback=120)):
+        fresh = RiskModel.from_prices(prices.iloc[t - 121:t])
+        assert model.prices.index[-1] == prices.index[t - 1] and len(model.returns) == 120
+        np.testing.assert_allclose(model.mu, fresh.mu, rtol=1e-9)
+        np.testing.assert_allclose(model.cov(), fresh.cov(), rtol=1e-9)
+
+
+async def test_walk_forward_simulates_monthly_rebalances(stocks_table, pool, make_ohlcv):
+    risk_model_cache.invalidate()
+    req = WalkForwardRequest(
+        tickers=["AAA", "BBB", "CCC"], start_date=date(2023, 6, 1), method=OptimizationMethod.HRP,
+        lookback=60, transaction_cost_bps=10,
+    )
+    result = await walk_forward.run_walk_forward(None, req)
+
+    assert [r.date for r in result.rebalances][:2] == [date(2023, 6, 1), date(2023, 7, 3)]
+    assert len(result.rebalances) == 9 and not any(r.error for r in result.rebalances)
+    assert len(result.equity) == len(result.dates) and result.equity[0] == 1.0
+    first = result.rebalances[0]
+    assert first.turnover == pytest.approx(1.0) and first.cost == pytest.approx(0.001)
+
+    # Within the first month the equity is the cost-adjusted, buy-and-hold value of the weights
+    prices = make_ohlcv().pivot(index="date", columns="symbol", values="close")
+    start = prices.index.get_loc(pd.Timestamp("2023-06-01")) - 1
+    w = np.array([first.weights.get(s, 0.0) for s in prices.columns])
+    held = 0.999 * (prices.iloc[start:start + 5] / prices.iloc[start]).to_numpy() @ w
+    np.testing.assert_allclose(result.equity[1:5], held[1:5], rtol=1e-9)
+    assert {"data", "risk_models", "optimization", "simulation", "total"} <= set(result.timing)
+
+
+async def test_turnover_limit_applies_between_rebalances(stocks_table):
+    req = WalkForwardRequest(
+        tickers=["AAA", "BBB", "CCC"], start_date=date(2023, 6, 1), method=OptimizationMethod.EFFICIENT_FRONTIER,
+        lookback=60, risk_free_rate=-0.5, constraints={"max_weight": 0.6, "max_turnover": 0.2},
+    )
+    result = await walk_forward.run_walk_forward(None, req)
+    assert not any(r.error for r in result.rebalances)
+    assert all(r.turnover <= 0.2 + 1e-4 for r in result.rebalances[1:])
+    assert all(max(r.weights.values()) <= 0.6 + 1e-4 for r in result.rebalances)
+
+
+def test_windows_before_a_listing_leave_the_symbol_out(make_ohlcv):
+    prices = make_ohlcv(days=400).pivot(index="date", columns="symbol", values="close")
+    prices.iloc[:200, prices.columns.get_loc("CCC")] = np.nan
+    dates = prices.index.to_numpy().astype("datetime64[D]")
+    indices = walk_forward.rebalance_indices(dates, 130, "1M")
+    cs = ConstraintSet(lower=np.zeros(3), upper=np.full(3, 0.6), sectors=np.zeros((0, 3)), sector_caps=np.zeros(0))
+
+    for t, model in zip(indices, walk_forward.window_models(prices, indices, lookback=120)):
+        method, mu, cov, _, _, window_cs = walk_forward._solve_window(
+            OptimizationMethod.EFFICIENT_FRONTIER, model, "sample", 0.0, cs
+        )
+        listed = t - 121 >= 200
+        assert ("CCC" in mu.index) == listed and len(window_cs.upper) == len(mu)
+        fresh = RiskModel.from_prices(prices.iloc[t - 121:t][list(mu.index)])
+        np.testing.assert_allclose(mu, fresh.mu, rtol=1e-9)
+        np.testing.assert_allclose(cov, fresh.cov(), rtol=1e-9)